@@ -0,0 +1,222 @@
+"""Deterministic synthetic library data at several scale factors.
+
+Titles and authors are sampled from the real catalog
+(`data/books_clean_debug2.csv`, read through its Parquet snapshot); ISBNs are
+synthetic but checksum-valid (`979` prefix) and unique, so `isbn13` keeps its
+unique index. Borrower names come from small built-in lists.
+
+Transactions follow a realistic mix: most loans are returned (about 1 in 8
+late), a few percent are still open and about a third of those are overdue.
+A book has at most one open loan and its `book_status` matches (`borrowed`
+while lent). Dates are relative to `as_of` (default today), so "overdue"
+means the same thing whenever the data is generated. The same seed and scale
+always produce the same rows.
+
+    python -m benchmarks.datagen --scale small [--url sqlite:///bench.db] [--seed 42]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src.catalog_snapshot import load_catalog
+from src.migrations import ensure_schema
+
+
+class Scale(NamedTuple):
+    books: int
+    borrowers: int
+    transactions: int
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(2_000, 500, 10_000),
+    "small": Scale(10_000, 2_000, 100_000),
+    "medium": Scale(100_000, 20_000, 1_000_000),
+    "large": Scale(1_000_000, 100_000, 10_000_000),
+}
+DATA_DIR = os.path.join(_PROJECT_ROOT, "benchmarks", "data")
+DEFAULT_SEED = 42
+CHUNK_ROWS = 200_000
+
+LOAN_DAYS = 14
+OPEN_FRACTION = 0.06
+OVERDUE_FRACTION = 0.35
+LATE_FRACTION = 0.12
+REMOVED_FRACTION = 0.005
+
+FIRST_NAMES = (
+    "Ana", "Beatriz", "Carla", "Daniel", "Eduardo", "Fernanda", "Gabriel", "Helena", "Igor", "Julia",
+    "Lucas", "Mariana", "Nuno", "Olivia", "Pedro", "Rafaela", "Sofia", "Tiago", "Vitor", "Yara",
+)
+LAST_NAMES = (
+    "Almeida", "Barbosa", "Costa", "Dias", "Ferreira", "Gomes", "Lima", "Martins", "Nunes", "Oliveira",
+    "Pereira", "Ribeiro", "Santos", "Silva", "Souza", "Teixeira", "Vieira", "Chen", "Muller", "Smith",
+)
+RELATIONSHIPS = ("family", "friend", "neighbor", "colleague", "student")
+
+
+def default_url(scale: str) -> str:
+    return f"sqlite:///{os.path.join(DATA_DIR, f'bench-{scale}.db')}"
+
+
+def synthetic_isbn13(numbers: np.ndarray) -> np.ndarray:
+    """Valid ISBN-13 strings `979` + 9 digits of `numbers` + check digit."""
+    digits = np.zeros((len(numbers), 12), dtype=np.int64)
+    digits[:, :3] = (9, 7, 9)
+    rest = numbers.astype(np.int64)
+    for pos in range(11, 2, -1):
+        digits[:, pos] = rest % 10
+        rest //= 10
+    check = (10 - (digits @ np.tile([1, 3], 6)) % 10) % 10
+    body = np.char.mod("%09d", numbers.astype(np.int64))
+    return np.char.add(np.char.add("979", body), check.astype(str))
+
+
+def _insert(conn, table: str, df: pd.DataFrame) -> None:
+    # driver-level executemany with tuples: no per-row dict/bind processing
+    mark = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    sql = f"INSERT INTO {table} ({', '.join(df.columns)}) VALUES ({', '.join([mark] * len(df.columns))})"
+    rows = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+    conn.exec_driver_sql(sql, rows)
+
+
+def _chunks(total: int, size: int) -> Iterator[range]:
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+
+def _books(rng: np.random.Generator, n: int, open_books: np.ndarray, removed: np.ndarray) -> pd.DataFrame:
+    catalog = load_catalog(columns=["title", "authors"]).dropna(subset=["title"])
+    pick = rng.integers(0, len(catalog), size=n)
+    status = np.full(n, "available", dtype=object)
+    status[removed] = "REMOVED"
+    status[open_books] = "borrowed"
+    isbn13 = synthetic_isbn13(np.arange(1, n + 1))
+    return pd.DataFrame({
+        "book_id": np.arange(1, n + 1),
+        "title": catalog["title"].to_numpy(dtype=object)[pick],
+        "author": catalog["authors"].astype(object).to_numpy()[pick],
+        "ISBN": isbn13,
+        "isbn13": isbn13,
+        "cost_book": np.round(rng.uniform(5, 60, size=n), 2),
+        "book_status": status,
+    })
+
+
+def _borrowers(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    ids = np.arange(1, n + 1)
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), size=n)]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), size=n)]
+    emails = [f"{f.lower()}.{l.lower()}{i}@example.com" for f, l, i in zip(first, last, ids)]
+    return pd.DataFrame({
+        "person_id": ids,
+        "first_name": first,
+        "last_name": last,
+        "relationship_type": np.array(RELATIONSHIPS, dtype=object)[rng.integers(0, len(RELATIONSHIPS), size=n)],
+        "phone_number": [f"+55 11 9{i:08d}" for i in ids],
+        "email": emails,
+        "address": None,
+    })
+
+
+def _closed_loans(rng: np.random.Generator, ids: range, scale: Scale, lendable: np.ndarray, as_of: date) -> pd.DataFrame:
+    n = len(ids)
+    loan = pd.Timestamp(as_of) - pd.to_timedelta(rng.integers(LOAN_DAYS + 1, 3 * 365, size=n), unit="D")
+    due = loan + pd.Timedelta(days=LOAN_DAYS)
+    late = rng.random(n) < LATE_FRACTION
+    kept = np.where(late, rng.integers(LOAN_DAYS + 1, LOAN_DAYS + 30, size=n), rng.integers(1, LOAN_DAYS + 1, size=n))
+    returned = np.minimum(loan + pd.to_timedelta(kept, unit="D"), pd.Timestamp(as_of))
+    return pd.DataFrame({
+        "transaction_id": np.arange(ids.start + 1, ids.stop + 1),
+        "book_id": lendable[rng.integers(0, len(lendable), size=n)],
+        "person_id": rng.integers(1, scale.borrowers + 1, size=n),
+        "loan_date": loan.date,
+        "due_date": due.date,
+        "actual_return_date": pd.DatetimeIndex(returned).date,
+    })
+
+
+def _open_loans(rng: np.random.Generator, first_id: int, open_books: np.ndarray, scale: Scale, as_of: date) -> pd.DataFrame:
+    n = len(open_books)
+    overdue = rng.random(n) < OVERDUE_FRACTION
+    age = np.where(overdue, rng.integers(LOAN_DAYS + 1, 90, size=n), rng.integers(0, LOAN_DAYS, size=n))
+    loan = pd.Timestamp(as_of) - pd.to_timedelta(age, unit="D")
+    return pd.DataFrame({
+        "transaction_id": np.arange(first_id, first_id + n),
+        "book_id": open_books,
+        "person_id": rng.integers(1, scale.borrowers + 1, size=n),
+        "loan_date": loan.date,
+        "due_date": (loan + pd.Timedelta(days=LOAN_DAYS)).date,
+        "actual_return_date": None,
+    })
+
+
+def generate(engine, scale: str = "small", seed: int = DEFAULT_SEED, as_of: Optional[date] = None, chunk_rows: int = CHUNK_ROWS) -> Dict[str, int]:
+    """Fill an empty database with the `scale` dataset; returns the row counts."""
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale '{scale}'; choose one of {', '.join(SCALES)}.")
+    size = SCALES[scale]
+    as_of = as_of or date.today()
+    ensure_schema(engine)
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT COUNT(*) FROM books")).scalar():
+            raise ValueError("Target database already has books; generate into an empty database.")
+
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    n_open = min(int(size.transactions * OPEN_FRACTION), size.books // 2)
+    shuffled = rng.permutation(np.arange(1, size.books + 1))
+    removed = shuffled[:int(size.books * REMOVED_FRACTION)]
+    open_books = np.sort(shuffled[len(removed):len(removed) + n_open])
+    lendable = shuffled[len(removed):]
+
+    books = _books(rng, size.books, open_books - 1, removed - 1)
+    with engine.begin() as conn:
+        for part in _chunks(len(books), chunk_rows):
+            _insert(conn, "books", books.iloc[part.start:part.stop])
+    with engine.begin() as conn:
+        _insert(conn, "borrowers", _borrowers(rng, size.borrowers))
+    n_closed = size.transactions - n_open
+    for part in _chunks(n_closed, chunk_rows):
+        with engine.begin() as conn:
+            _insert(conn, "transactions", _closed_loans(rng, part, size, lendable, as_of))
+    with engine.begin() as conn:
+        _insert(conn, "transactions", _open_loans(rng, n_closed + 1, open_books, size, as_of))
+
+    from src.CRUD_Blueprint import _rebuild_dashboard_counters
+
+    _rebuild_dashboard_counters(engine)
+    counts = {"books": size.books, "borrowers": size.borrowers, "transactions": size.transactions, "open_loans": n_open}
+    elapsed = time.perf_counter() - started
+    print(f"[Bench] Generated '{scale}' dataset in {elapsed:.1f}s: " + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+    return counts
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic library dataset.")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--url", help="target database (default: SQLite file under benchmarks/data/)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--as-of", type=date.fromisoformat, help="reference date for loan dates (default: today)")
+    args = parser.parse_args(argv)
+    url = args.url or default_url(args.scale)
+    if url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(os.path.abspath(url[len("sqlite:///"):])), exist_ok=True)
+    generate(create_engine(url), args.scale, args.seed, args.as_of)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
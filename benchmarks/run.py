@@ -0,0 +1,336 @@
+"""Time the public CRUD_Blueprint functions against a synthetic dataset.
+
+Each case times one public read or write function (the Google Books / FX
+web pipelines are left out: they measure the network, not us). Inputs are
+prepared untimed beforehand, e.g. the loans that `process_return` closes.
+Every call is timed on its own; results report min/median/p95/mean in ms.
+
+Results go to `benchmarks/results/<backend>-<scale>-<timestamp>.json`. If a
+baseline exists (`benchmarks/baselines/<backend>-<scale>.json`, or
+`--baseline`), medians are compared and cases more than `--threshold`
+slower or faster are flagged. `--save-baseline` stores the current run as
+the baseline.
+
+The dataset is generated on first use (see `benchmarks.datagen`); the write
+cases modify it slightly, so use `--regenerate` for strictly comparable runs.
+
+    python -m benchmarks.run --scale small [--backend sqlite mysql] [--mysql-url URL]
+        [--repeat 20] [--only get_active_loans create_loan] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import sqlalchemy
+from sqlalchemy import create_engine, text
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from benchmarks.datagen import DEFAULT_SEED, SCALES, default_url, generate
+
+RESULTS_DIR = os.path.join(_PROJECT_ROOT, "benchmarks", "results")
+BASELINES_DIR = os.path.join(_PROJECT_ROOT, "benchmarks", "baselines")
+DEFAULT_REPEAT = 20
+DEFAULT_THRESHOLD = 0.10
+WARMUP = 2
+BATCH_ROWS = 500
+LOAN_BATCH = 10
+
+
+class Case(NamedTuple):
+    name: str
+    kind: str
+    # n -> n argument tuples, prepared untimed
+    prepare: Callable[[int], List[tuple]]
+    call: Callable[..., Any]
+
+
+class Fixture:
+    """Ids and names sampled (deterministically) from the dataset."""
+
+    def __init__(self, engine, seed: int = DEFAULT_SEED) -> None:
+        self.rng = np.random.default_rng(seed)
+        with engine.connect() as conn:
+            self.book_ids = [r[0] for r in conn.execute(text("SELECT book_id FROM books ORDER BY book_id LIMIT 5000"))]
+            self.available = [r[0] for r in conn.execute(text(
+                "SELECT book_id FROM books WHERE book_status = 'available' ORDER BY book_id DESC LIMIT 20000"
+            ))]
+            self.person_ids = [r[0] for r in conn.execute(text("SELECT person_id FROM borrowers ORDER BY person_id LIMIT 5000"))]
+            self.last_names = sorted({r[0] for r in conn.execute(text("SELECT last_name FROM borrowers LIMIT 1000")) if r[0]})
+            self.title_words = sorted({
+                word for (title,) in conn.execute(text("SELECT title FROM books LIMIT 2000"))
+                for word in (title or "").split() if len(word) > 4 and word.isalpha()
+            })
+        self.counter = int(time.time())
+
+    def pick(self, values: Sequence[Any], n: int) -> List[Any]:
+        return [values[i] for i in self.rng.integers(0, len(values), size=n)]
+
+    def take_available(self, n: int) -> List[int]:
+        if len(self.available) < n:
+            raise RuntimeError("Not enough available books left for the loan cases; use --regenerate.")
+        taken, self.available = self.available[:n], self.available[n:]
+        return taken
+
+    def unique(self) -> int:
+        self.counter += 1
+        return self.counter
+
+
+def _cases(crud, fx: Fixture) -> List[Case]:
+    def same(n, *args):
+        return [args] * n
+
+    def books(n):
+        return [(b,) for b in fx.pick(fx.book_ids, n)]
+
+    def people(n):
+        return [(p,) for p in fx.pick(fx.person_ids, n)]
+
+    def new_records(count):
+        base = fx.unique() * 10_000
+        return [{"title": f"Bench book {base + i}", "author": "Bench Author", "cost": 10} for i in range(count)]
+
+    def open_loans(n, batch=1):
+        ids = fx.take_available(n * batch)
+        person = fx.person_ids[0]
+        results = crud.create_loans(person, ids)
+        return [r for r in results if r["status"] == "active"]
+
+    def loan_then_return_tx(n):
+        return [(loan["transaction_id"],) for loan in open_loans(n)]
+
+    def loan_then_return_book(n):
+        return [(loan["book_id"],) for loan in open_loans(n)]
+
+    def loan_batches(n):
+        loans = open_loans(n, LOAN_BATCH)
+        return [([loan["transaction_id"] for loan in loans[i:i + LOAN_BATCH]],) for i in range(0, len(loans), LOAN_BATCH)]
+
+    reads = [
+        Case("get_dashboard_stats", "read", lambda n: same(n), crud.get_dashboard_stats),
+        Case("get_books", "read", lambda n: [(w,) for w in fx.pick(fx.title_words, n)], lambda w: crud.get_books(title=w)),
+        Case("get_books_page", "read", lambda n: same(n), lambda: crud.get_books_page(page_size=50)),
+        Case("search_books_fuzzy", "read", lambda n: [(w,) for w in fx.pick(fx.title_words, n)], crud.search_books_fuzzy),
+        Case("get_book_by_id", "read", books, crud.get_book_by_id),
+        Case("get_borrowers", "read", lambda n: [(l,) for l in fx.pick(fx.last_names, n)], lambda l: crud.get_borrowers(last_name=l)),
+        Case("get_borrowers_page", "read", lambda n: same(n), lambda: crud.get_borrowers_page(page_size=50)),
+        Case("get_borrower_by_id", "read", people, crud.get_borrower_by_id),
+        Case("get_active_loans", "read", lambda n: same(n), crud.get_active_loans),
+        Case("get_active_loans_page", "read", lambda n: same(n), lambda: crud.get_active_loans_page(page_size=50)),
+        Case("get_overdue_loans", "read", lambda n: same(n), crud.get_overdue_loans),
+        Case("get_overdue_loans_page", "read", lambda n: same(n), lambda: crud.get_overdue_loans_page(page_size=50)),
+        Case("get_loan_history_by_book", "read", books, crud.get_loan_history_by_book),
+        Case("get_loan_history_by_book_page", "read", books, lambda b: crud.get_loan_history_by_book_page(b, page_size=50)),
+        Case("get_loan_history_by_borrower", "read", people, crud.get_loan_history_by_borrower),
+        Case("get_loan_history_by_borrower_page", "read", people, lambda p: crud.get_loan_history_by_borrower_page(p, page_size=50)),
+        Case("get_most_borrowed_books", "read", lambda n: same(n), crud.get_most_borrowed_books),
+        Case("get_most_active_borrowers", "read", lambda n: same(n), crud.get_most_active_borrowers),
+    ]
+    writes = [
+        Case("create_book", "write", lambda n: [(r["title"],) for r in new_records(n)], lambda t: crud.create_book(t, "Bench Author", cost=10)),
+        Case("create_books", "write", lambda n: [(new_records(BATCH_ROWS),) for _ in range(n)], crud.create_books),
+        Case("update_book_details", "write", books, lambda b: crud.update_book_details(b, cost=12.5)),
+        Case("update_book_status", "write", lambda n: [(b,) for b in fx.take_available(n)], lambda b: crud.update_book_status(b, "AVAILABLE")),
+        Case("create_borrower", "write", lambda n: [(f"Bench{fx.unique()}",) for _ in range(n)], lambda f: crud.create_borrower(f, "Runner")),
+        Case("update_borrower_contact", "write", people, lambda p: crud.update_borrower_contact(p, email=f"bench{p}@example.com")),
+        Case(
+            "create_loan", "write",
+            lambda n: list(zip(fx.take_available(n), fx.pick(fx.person_ids, n))),
+            crud.create_loan,
+        ),
+        Case("process_return", "write", loan_then_return_tx, crud.process_return),
+        Case("process_return_by_book", "write", loan_then_return_book, lambda b: crud.process_return_by_book(book_id=b)),
+        Case(
+            "create_loans", "write",
+            lambda n: [(p, fx.take_available(LOAN_BATCH)) for p in fx.pick(fx.person_ids, n)],
+            crud.create_loans,
+        ),
+        Case("process_returns", "write", loan_batches, lambda ids: crud.process_returns(transaction_ids=ids)),
+    ]
+    return reads + writes
+
+
+def _summary(samples_ms: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+    }
+
+
+def run_case(case: Case, repeat: int, max_seconds: float) -> Dict[str, Any]:
+    args = case.prepare(WARMUP + repeat)
+    samples: List[float] = []
+    budget_end = time.perf_counter() + max_seconds
+    for i, call_args in enumerate(args):
+        start = time.perf_counter()
+        case.call(*call_args)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if i >= WARMUP:
+            samples.append(elapsed)
+            if len(samples) >= 3 and time.perf_counter() > budget_end:
+                break
+    return {"kind": case.kind, **_summary(samples)}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    """Median ratio current/baseline per case, flagged `slower` / `faster` / `same`."""
+    comparison: Dict[str, Any] = {}
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        verdict = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        comparison[name] = {"baseline_median_ms": base["median_ms"], "median_ms": result["median_ms"], "ratio": round(ratio, 3), "verdict": verdict}
+    return comparison
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_PROJECT_ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def use_database(url: str):
+    """Point CRUD_Blueprint (through db_connection) at `url`; returns the CRUD module."""
+    os.environ["DATABASE_URL"] = url
+    from src import CRUD_Blueprint as crud
+    from src.db_connection import reset_engine
+    from src.trigram_index import reset_trigram_index
+
+    reset_engine()
+    reset_trigram_index()
+    return crud
+
+
+def prepare_database(url: str, scale: str, seed: int, regenerate: bool) -> None:
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        if regenerate:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    elif regenerate:
+        raise ValueError("--regenerate only deletes SQLite files; empty the MySQL database yourself.")
+    engine = create_engine(url)
+    try:
+        from src.migrations import ensure_schema
+
+        ensure_schema(engine)
+        with engine.connect() as conn:
+            has_books = conn.execute(text("SELECT COUNT(*) FROM books")).scalar()
+        if not has_books:
+            generate(engine, scale, seed)
+    finally:
+        engine.dispose()
+
+
+def run_backend(backend: str, url: str, scale: str, repeat: int, only: Optional[Sequence[str]], max_seconds: float, seed: int, regenerate: bool) -> Dict[str, Any]:
+    prepare_database(url, scale, seed, regenerate)
+    crud = use_database(url)
+    engine = crud.get_engine()
+    with engine.connect() as conn:
+        rows = {table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() for table in ("books", "borrowers", "transactions")}
+    fx = Fixture(engine, seed)
+    results: Dict[str, Any] = {}
+    for case in _cases(crud, fx):
+        if only and case.name not in only:
+            continue
+        results[case.name] = run_case(case, repeat, max_seconds)
+        r = results[case.name]
+        print(f"[Bench] {backend:<6} {case.name:<36} median {r['median_ms']:>10.3f} ms  p95 {r['p95_ms']:>10.3f} ms  (n={r['n']})")
+    return {
+        "meta": {
+            "backend": backend,
+            "dialect": engine.dialect.name,
+            "url": engine.url.render_as_string(hide_password=True),
+            "scale": scale,
+            "rows": rows,
+            "seed": seed,
+            "repeat": repeat,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def _print_comparison(comparison: Dict[str, Any]) -> None:
+    for name, c in comparison.items():
+        mark = {"slower": "!!", "faster": "++"}.get(c["verdict"], "  ")
+        print(f"{mark} {name:<36} {c['baseline_median_ms']:>10.3f} -> {c['median_ms']:>10.3f} ms  x{c['ratio']:.2f}  {c['verdict']}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the CRUD_Blueprint API on a synthetic dataset.")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--backend", nargs="+", choices=["sqlite", "mysql"], default=["sqlite"])
+    parser.add_argument("--sqlite-url", help="default: SQLite file under benchmarks/data/")
+    parser.add_argument("--mysql-url", default=os.environ.get("BENCH_MYSQL_URL"), help="local MySQL URL (or BENCH_MYSQL_URL)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed calls per case (default: %(default)s)")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="stop a case after this long (at least 3 samples)")
+    parser.add_argument("--only", nargs="+", help="run only these cases")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the SQLite dataset before running")
+    parser.add_argument("--baseline", help="baseline JSON to compare with (default: benchmarks/baselines/<backend>-<scale>.json)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative change flagged as slower/faster")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 if any case is slower")
+    args = parser.parse_args(argv)
+
+    regressions = 0
+    for backend in args.backend:
+        if backend == "mysql":
+            if not args.mysql_url:
+                parser.error("--backend mysql needs --mysql-url or BENCH_MYSQL_URL")
+            url = args.mysql_url
+        else:
+            url = args.sqlite_url or default_url(args.scale)
+        result = run_backend(backend, url, args.scale, args.repeat, args.only, args.max_seconds, args.seed, args.regenerate)
+
+        baseline_path = args.baseline or os.path.join(BASELINES_DIR, f"{backend}-{args.scale}.json")
+        if os.path.exists(baseline_path):
+            with open(baseline_path, encoding="utf-8") as fh:
+                result["comparison"] = compare(result, json.load(fh), args.threshold)
+            print(f"[Bench] Compared with {baseline_path}:")
+            _print_comparison(result["comparison"])
+            regressions += sum(c["verdict"] == "slower" for c in result["comparison"].values())
+
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out_path = os.path.join(RESULTS_DIR, f"{backend}-{args.scale}-{stamp}.json")
+        with open(out_path, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2, default=str)
+        print(f"[Bench] Results written to {out_path}")
+        if args.save_baseline:
+            os.makedirs(BASELINES_DIR, exist_ok=True)
+            with open(os.path.join(BASELINES_DIR, f"{backend}-{args.scale}.json"), "w", encoding="utf-8") as fh:
+                json.dump({k: v for k, v in result.items() if k != "comparison"}, fh, indent=2, default=str)
+            print(f"[Bench] Saved as baseline for {backend}-{args.scale}")
+    return 1 if args.fail_on_regression and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""Concurrent clerk workload: throughput, latency and consistency under contention.
+
+N workers (threads, or processes with `--processes`) replay a weighted mix
+of operations against the CRUD_Blueprint API for a fixed duration:
+
+    search     get_books(title=...) / search_books_fuzzy
+    loan       create_loan on a book from a small shared "hot" set
+    return     process_return_by_book on a hot book
+    history    get_loan_history_by_book / get_loan_history_by_borrower
+    dashboard  get_dashboard_stats + get_active_loans_page
+
+Loans and returns target the same few hot books on purpose, so clerks race
+for the same copies. A loan of a book that is already out, or a return of
+one that is not, is an expected conflict, reported apart from real errors.
+Deadlocks, lock wait timeouts and SQLite "database is locked" are counted as
+`lock_errors`.
+
+When the run ends the database is checked for consistency:
+- a book with two open transactions (double checkout);
+- book_status disagreeing with the open loans;
+- dashboard counters and per-due-date counts drifting from the base tables.
+
+The report gives ops/sec and p50/p95/p99 per operation. It is printed and
+written to `benchmarks/results/workload-<timestamp>.json`. The exit status
+is 1 when a consistency violation was found.
+
+    python -m benchmarks.workload --workers 8 --duration 30 \
+        [--mix search=30,loan=15,return=15,history=20,dashboard=20] [--processes] [--url URL]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from benchmarks.datagen import DEFAULT_SEED, SCALES, default_url
+from benchmarks.run import RESULTS_DIR, prepare_database, use_database
+
+DEFAULT_MIX = {"search": 30, "loan": 15, "return": 15, "history": 20, "dashboard": 20}
+# MySQL: 1213 deadlock, 1205 lock wait timeout
+_LOCK_ERROR_CODES = {1205, 1213}
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation '{name}' in mix; choose from {', '.join(DEFAULT_MIX)}.")
+        mix[name] = float(weight or 1)
+    if not sum(mix.values()) > 0:
+        raise ValueError("The operation mix needs at least one positive weight.")
+    return mix
+
+
+def _is_lock_error(exc: BaseException) -> bool:
+    if not isinstance(exc, DBAPIError):
+        return False
+    orig = getattr(exc, "orig", None)
+    code = orig.args[0] if orig is not None and orig.args else None
+    return code in _LOCK_ERROR_CODES or "database is locked" in str(orig).lower()
+
+
+def _worker(config: Dict[str, Any]) -> Dict[str, Any]:
+    """One clerk: run the mix until the deadline; returns latencies and outcomes per operation."""
+    crud = use_database(config["url"]) if config["own_engine"] else config["crud"]
+    rng = np.random.default_rng(config["seed"])
+    names = list(config["mix"])
+    weights = np.array([config["mix"][n] for n in names], dtype=float)
+    weights /= weights.sum()
+    hot, people, words = config["hot_books"], config["person_ids"], config["title_words"]
+
+    def search():
+        word = words[rng.integers(len(words))]
+        if rng.random() < 0.5:
+            crud.get_books(title=word)
+        else:
+            crud.search_books_fuzzy(word)
+
+    def loan():
+        crud.create_loan(int(hot[rng.integers(len(hot))]), int(people[rng.integers(len(people))]))
+
+    def give_back():
+        crud.process_return_by_book(book_id=int(hot[rng.integers(len(hot))]))
+
+    def history():
+        if rng.random() < 0.5:
+            crud.get_loan_history_by_book(int(hot[rng.integers(len(hot))]))
+        else:
+            crud.get_loan_history_by_borrower(int(people[rng.integers(len(people))]))
+
+    def dashboard():
+        crud.get_dashboard_stats()
+        crud.get_active_loans_page(page_size=50)
+
+    ops = {"search": search, "loan": loan, "return": give_back, "history": history, "dashboard": dashboard}
+    latencies: Dict[str, List[float]] = {n: [] for n in names}
+    outcomes: Dict[str, Dict[str, int]] = {n: {"ok": 0, "conflicts": 0, "lock_errors": 0, "errors": 0} for n in names}
+    error_samples: List[str] = []
+    deadline = config["deadline"]
+    while time.time() < deadline:
+        name = names[rng.choice(len(names), p=weights)]
+        start = time.perf_counter()
+        try:
+            ops[name]()
+            outcome = "ok"
+        except ValueError:
+            # book already lent / no open loan: another clerk got there first
+            outcome = "conflicts"
+        except Exception as e:
+            outcome = "lock_errors" if _is_lock_error(e) else "errors"
+            if len(error_samples) < 5:
+                error_samples.append(f"{name}: {type(e).__name__}: {str(e).splitlines()[0][:200]}")
+        latencies[name].append((time.perf_counter() - start) * 1000.0)
+        outcomes[name][outcome] += 1
+    return {"latencies": latencies, "outcomes": outcomes, "error_samples": error_samples}
+
+
+def check_consistency(engine) -> Dict[str, Any]:
+    """Invariants that concurrent loans/returns must preserve; returns the violations found."""
+    checks = {
+        "books_with_multiple_open_loans": """
+            SELECT book_id, COUNT(*) FROM transactions
+            WHERE actual_return_date IS NULL
+            GROUP BY book_id HAVING COUNT(*) > 1
+        """,
+        "borrowed_without_open_loan": """
+            SELECT b.book_id, b.book_status FROM books b
+            WHERE LOWER(b.book_status) = 'borrowed'
+              AND NOT EXISTS (SELECT 1 FROM transactions t WHERE t.book_id = b.book_id AND t.actual_return_date IS NULL)
+        """,
+        "open_loan_on_unborrowed_book": """
+            SELECT b.book_id, b.book_status FROM books b
+            JOIN transactions t ON t.book_id = b.book_id AND t.actual_return_date IS NULL
+            WHERE LOWER(b.book_status) <> 'borrowed'
+        """,
+        "due_counts_drift": """
+            SELECT d.due_date, d.open_loans, COALESCE(o.n, 0) FROM loan_due_counts d
+            LEFT JOIN (
+                SELECT due_date, COUNT(*) AS n FROM transactions
+                WHERE actual_return_date IS NULL AND due_date IS NOT NULL GROUP BY due_date
+            ) o ON o.due_date = d.due_date
+            WHERE d.open_loans <> COALESCE(o.n, 0)
+        """,
+    }
+    violations: Dict[str, Any] = {}
+    with engine.connect() as conn:
+        for name, sql in checks.items():
+            rows = conn.execute(text(sql)).fetchall()
+            if rows:
+                violations[name] = {"count": len(rows), "examples": [list(map(str, r)) for r in rows[:5]]}
+        counters = dict(conn.execute(text("SELECT counter_name, counter_value FROM dashboard_counters")).fetchall())
+        actual = conn.execute(text("""
+            SELECT
+                (SELECT COUNT(*) FROM books),
+                (SELECT COUNT(*) FROM books WHERE LOWER(book_status) = 'available'),
+                (SELECT COUNT(*) FROM books WHERE LOWER(book_status) = 'borrowed'),
+                (SELECT COUNT(*) FROM transactions WHERE actual_return_date IS NULL),
+                (SELECT COUNT(*) FROM borrowers)
+        """)).one()
+    expected = dict(zip(("total_books", "available_books", "borrowed_books", "active_loans", "total_borrowers"), actual))
+    drift = {k: {"counter": int(counters.get(k, 0)), "actual": int(v)} for k, v in expected.items() if int(counters.get(k, 0)) != int(v)}
+    if drift:
+        violations["dashboard_counter_drift"] = drift
+    return violations
+
+
+def _summarize(worker_results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    operations: Dict[str, Any] = {}
+    names = {name for r in worker_results for name in r["latencies"]}
+    total = 0
+    for name in sorted(names):
+        samples = np.array([ms for r in worker_results for ms in r["latencies"].get(name, [])])
+        outcome = {k: sum(r["outcomes"][name][k] for r in worker_results if name in r["outcomes"]) for k in ("ok", "conflicts", "lock_errors", "errors")}
+        total += len(samples)
+        operations[name] = {
+            "count": int(len(samples)),
+            "ops_per_sec": round(len(samples) / elapsed, 2),
+            **outcome,
+            **({
+                "p50_ms": round(float(np.percentile(samples, 50)), 3),
+                "p95_ms": round(float(np.percentile(samples, 95)), 3),
+                "p99_ms": round(float(np.percentile(samples, 99)), 3),
+                "max_ms": round(float(samples.max()), 3),
+            } if len(samples) else {}),
+        }
+    return {
+        "total_ops": total,
+        "ops_per_sec": round(total / elapsed, 2),
+        "lock_errors": sum(op["lock_errors"] for op in operations.values()),
+        "errors": sum(op["errors"] for op in operations.values()),
+        "operations": operations,
+        "error_samples": [s for r in worker_results for s in r["error_samples"]][:10],
+    }
+
+
+def run_workload(url: str, workers: int, duration: float, mix: Dict[str, float], processes: bool = False, hot_books: int = 50, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    crud = use_database(url)
+    engine = crud.get_engine()
+    with engine.connect() as conn:
+        available = [r[0] for r in conn.execute(text(
+            "SELECT book_id FROM books WHERE LOWER(book_status) = 'available' ORDER BY book_id LIMIT :n"
+        ), {"n": int(hot_books)})]
+        person_ids = [r[0] for r in conn.execute(text("SELECT person_id FROM borrowers ORDER BY person_id LIMIT 1000"))]
+        words = sorted({
+            w for (title,) in conn.execute(text("SELECT title FROM books LIMIT 2000"))
+            for w in (title or "").split() if len(w) > 4 and w.isalpha()
+        })
+    if not available or not person_ids:
+        raise ValueError("The database needs available books and borrowers; generate a dataset first.")
+    # build lazy indexes/caches before the clock starts
+    crud.get_dashboard_stats()
+    if mix.get("search"):
+        crud.search_books_fuzzy(words[0] if words else "book")
+
+    started = time.time()
+    base = {
+        "url": url, "mix": mix, "hot_books": available, "person_ids": person_ids,
+        "title_words": words or ["book"], "deadline": started + duration, "own_engine": processes,
+    }
+    configs = [{**base, "seed": seed + i, "crud": None if processes else crud} for i in range(workers)]
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool(max_workers=workers) as executor:
+        worker_results = list(executor.map(_worker, configs))
+    elapsed = time.time() - started
+
+    report = _summarize(worker_results, elapsed)
+    violations = check_consistency(engine)
+    return {
+        "meta": {
+            "url": engine.url.render_as_string(hide_password=True),
+            "dialect": engine.dialect.name,
+            "workers": workers,
+            "mode": "processes" if processes else "threads",
+            "duration_s": round(elapsed, 2),
+            "mix": mix,
+            "hot_books": len(available),
+            "seed": seed,
+            "started_at": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        },
+        **report,
+        "consistency_violations": violations,
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    meta = report["meta"]
+    print(f"[Workload] {meta['workers']} {meta['mode']} x {meta['duration_s']}s on {meta['dialect']}: "
+          f"{report['total_ops']:,} ops, {report['ops_per_sec']:,.1f} ops/s, "
+          f"lock errors {report['lock_errors']}, errors {report['errors']}")
+    for name, op in report["operations"].items():
+        if not op["count"]:
+            continue
+        print(f"[Workload]   {name:<10} {op['ops_per_sec']:>9.1f} ops/s  p50 {op['p50_ms']:>8.2f}  p95 {op['p95_ms']:>8.2f}  "
+              f"p99 {op['p99_ms']:>8.2f} ms  ok {op['ok']}  conflicts {op['conflicts']}  "
+              f"lock errors {op['lock_errors']}  errors {op['errors']}")
+    for sample in report["error_samples"]:
+        print(f"[Workload]   ! {sample}")
+    if report["consistency_violations"]:
+        print(f"[Workload] CONSISTENCY VIOLATIONS: {json.dumps(report['consistency_violations'])}")
+    else:
+        print("[Workload] No consistency violations")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent clerks against the CRUD_Blueprint API.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds (default: %(default)s)")
+    parser.add_argument("--mix", help="weights, e.g. search=30,loan=15,return=15,history=20,dashboard=20")
+    parser.add_argument("--processes", action="store_true", help="one process per worker instead of threads")
+    parser.add_argument("--hot-books", type=int, default=50, help="books the loans/returns compete for")
+    parser.add_argument("--scale", choices=list(SCALES), default="small", help="dataset generated if the database is empty")
+    parser.add_argument("--url", help="database URL (default: the benchmark SQLite file for --scale)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    url = args.url or default_url(args.scale)
+    prepare_database(url, args.scale, args.seed, regenerate=False)
+    report = run_workload(url, args.workers, args.duration, mix, args.processes, args.hot_books, args.seed)
+    _print_report(report)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"workload-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, default=str)
+    print(f"[Workload] Report written to {out_path}")
+    return 1 if report["consistency_violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,288 @@
 """Merged CRUD blueprint module.
 
 Exports the CRUD functions defined in `notebooks/CRUD_Blueprint.ipynb`.
-Notebook implementations take precedence. The module prefers the
-centralized `src.db_connection.get_engine()` but will fall back to
-legacy helpers if necessary.
+Notebook implementations take precedence. All functions share the pooled
+engine of `src.db_connection.get_engine()`.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 from datetime import date, timedelta, datetime
-import requests
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+import os
+import base64
+import json
+import numpy as np
 import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import Date, bindparam, text
+
+from .book_search import fulltext_clause, substring_mode
+from .db_connection import get_engine as _get_engine
+from .google_books_cache import ResponseCache, get_response_cache
+from .http_client import http_get
+from .instrumentation import instrument_functions
+from .isbn import ensure_isbn13_column, insert_new_book_sql, normalize_isbn, normalize_isbn_series, upsert_books_sql
+from .matching import best_matches, normalize_text, token_sort_ratio
+from .migrations import ensure_schema
+from .fx_rates import CONVERTED_CURRENCIES, convert_prices, get_exchange_rates, normalize_currency
+from .trigram_index import get_trigram_index, index_book
 
 
 def get_engine():
-	"""Return a SQLAlchemy Engine.
+	"""Return the shared SQLAlchemy Engine (`src.db_connection.get_engine()`)."""
+	return _get_engine()
+
+
+# ----------------
+# DASHBOARD COUNTERS
+# ----------------
+# `dashboard_counters` holds one row per headline number and
+# `loan_due_counts` the number of open loans per due date (overdue is then a
+# SUM over past due dates). Every write that changes one of these numbers
+# adjusts them inside its own transaction; `rebuild_dashboard_counters()`
+# recomputes everything from scratch (run it after bulk loads that bypass
+# this module, e.g. `sql_to_python.py`).
+DASHBOARD_COUNTERS = ("total_books", "available_books", "borrowed_books", "active_loans", "total_borrowers")
+_STATUS_COUNTERS = {"available": "available_books", "borrowed": "borrowed_books"}
+_COUNTERS_READY: set = set()
+
+
+def _ensure_dashboard_counters(engine) -> None:
+	"""Bring the schema up to date on first use and seed the counters if empty."""
+	key = str(engine.url)
+	if key in _COUNTERS_READY:
+		return
+	ensure_schema(engine)
+	with engine.connect() as conn:
+		seeded = conn.execute(text("SELECT COUNT(*) FROM dashboard_counters")).scalar()
+	if not seeded:
+		_rebuild_dashboard_counters(engine)
+	_COUNTERS_READY.add(key)
+
+
+def _status_deltas(old_status: Optional[str], new_status: Optional[str]) -> Dict[str, int]:
+	"""Counter adjustments for a book moving from `old_status` to `new_status`."""
+	deltas: Dict[str, int] = {}
+	old_counter = _STATUS_COUNTERS.get(str(old_status).lower()) if old_status is not None else None
+	new_counter = _STATUS_COUNTERS.get(str(new_status).lower()) if new_status is not None else None
+	if old_counter == new_counter:
+		return deltas
+	if old_counter:
+		deltas[old_counter] = deltas.get(old_counter, 0) - 1
+	if new_counter:
+		deltas[new_counter] = deltas.get(new_counter, 0) + 1
+	return deltas
+
+
+def _bump_counters(conn, deltas: Dict[str, int]) -> None:
+	"""Apply counter deltas within the caller's transaction."""
+	params = [{"name": name, "delta": int(delta)} for name, delta in deltas.items() if delta]
+	if not params:
+		return
+	conn.execute(
+		text("UPDATE dashboard_counters SET counter_value = counter_value + :delta WHERE counter_name = :name"),
+		params,
+	)
+
+
+def _add_deltas(total: Dict[str, int], deltas: Dict[str, int]) -> Dict[str, int]:
+	for name, delta in deltas.items():
+		total[name] = total.get(name, 0) + delta
+	return total
+
 
-	Prefer `src.db_connection.get_engine()`; fall back to legacy helpers.
+def _insert_returning(conn, sql: str, params: Dict[str, Any], columns: str) -> Optional[List[Any]]:
+	"""Run the INSERT `sql` with `RETURNING columns`; None where the dialect has no RETURNING.
+
+	Generated ids need not be consecutive (`auto_increment_increment`,
+	Galera, interleaved auto-inc locks), so they are never derived from
+	`lastrowid`: callers without RETURNING (MySQL) look the rows up by a
+	natural key or insert them one by one.
 	"""
+	if not conn.dialect.insert_returning:
+		return None
+	return conn.execute(text(f"{sql} RETURNING {columns}"), params).fetchall()
+
+
+def _bump_due_count(conn, due_date, delta: int) -> None:
+	"""Adjust the open-loan count for `due_date` within the caller's transaction."""
+	if due_date is None or not delta:
+		return
+	if conn.dialect.name == "mysql":
+		sql = """
+			INSERT INTO loan_due_counts (due_date, open_loans) VALUES (:due_date, :delta)
+			ON DUPLICATE KEY UPDATE open_loans = open_loans + VALUES(open_loans)
+		"""
+	else:
+		sql = """
+			INSERT INTO loan_due_counts (due_date, open_loans) VALUES (:due_date, :delta)
+			ON CONFLICT (due_date) DO UPDATE SET open_loans = loan_due_counts.open_loans + excluded.open_loans
+		"""
+	conn.execute(text(sql), {"due_date": due_date, "delta": int(delta)})
+
+
+# ----------------
+# DIALECT-PORTABLE SQL
+# ----------------
+# The few expressions that differ between MySQL and the embedded SQLite mode.
+# Query templates reference them as `{today}`, `{borrower_name}` and
+# `{days_overdue}` and are rendered per engine by `_sql`. Date columns are
+# typed with `_DATE_TYPES` so both drivers hand back `date` objects (SQLite
+# stores them as ISO strings).
+_DIALECT_SQL = {
+	"mysql": {
+		"today": "CURRENT_DATE",
+		"borrower_name": "CONCAT(br.first_name, ' ', br.last_name)",
+		"days_overdue": "DATEDIFF(CURRENT_DATE, t.due_date)",
+	},
+	"sqlite": {
+		# local date, like the `date.today()` loans are written with
+		"today": "date('now', 'localtime')",
+		"borrower_name": "(br.first_name || ' ' || br.last_name)",
+		"days_overdue": "CAST(julianday('now', 'localtime', 'start of day') - julianday(t.due_date) AS INTEGER)",
+	},
+}
+# Standard SQL (PostgreSQL and friends)
+_DEFAULT_DIALECT_SQL = {
+	"today": "CURRENT_DATE",
+	"borrower_name": "CONCAT(br.first_name, ' ', br.last_name)",
+	"days_overdue": "(CURRENT_DATE - t.due_date)",
+}
+_DATE_TYPES = {"loan_date": Date(), "due_date": Date(), "actual_return_date": Date()}
+
+
+def _sql(engine, template: str) -> str:
+	"""Render a query template for `engine`'s dialect."""
+	return template.format(**_DIALECT_SQL.get(engine.dialect.name, _DEFAULT_DIALECT_SQL))
+
+
+def _dated(sql: str):
+	"""`text(sql)` with the loan date columns typed as dates."""
+	return text(sql).columns(**_DATE_TYPES)
+
+
+# ----------------
+# KEYSET PAGINATION
+# ----------------
+# List functions have `*_page` variants that return one `Page` at a time.
+# The continuation token encodes the sort key of the last row returned (e.g.
+# `(due_date, transaction_id)`), and the next page is fetched with
+# `WHERE key > last_key ORDER BY key LIMIT n`: the database seeks straight to
+# the position through the index, so deep pages cost the same as the first
+# one and rows inserted meanwhile never shift or duplicate entries.
+class Page(NamedTuple):
+	"""One page of results plus the token for the next page (None on the last page)."""
+	rows: Any
+	next_cursor: Optional[str]
+
+
+def _cursor_value(value: Any) -> Any:
+	if isinstance(value, (date, datetime)):
+		return value.isoformat()
+	if isinstance(value, Decimal):
+		return str(value)
+	return value
+
+
+def _encode_cursor(scope: str, values: Sequence[Any]) -> str:
+	payload = json.dumps({"s": scope, "v": [_cursor_value(v) for v in values]}, separators=(",", ":"))
+	return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(scope: str, cursor: str, n_keys: int) -> List[Any]:
 	try:
-		from .db_connection import get_engine as _get_engine
+		padded = cursor + "=" * (-len(cursor) % 4)
+		payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+	except Exception:
+		raise ValueError("Invalid pagination cursor.")
+	if payload.get("s") != scope or len(payload.get("v") or []) != n_keys:
+		raise ValueError(f"Pagination cursor does not belong to '{scope}'.")
+	return payload["v"]
+
 
-		return _get_engine()
+def _cursor_scope(cursor: str) -> Optional[str]:
+	"""Scope a cursor was issued for, or None when it cannot be read."""
+	try:
+		padded = cursor + "=" * (-len(cursor) % 4)
+		return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")).get("s")
 	except Exception:
-		try:
-			from .sql_to_python import get_engine as _get_engine
+		return None
 
-			return _get_engine()
-		except Exception:
-			try:
-				from .sql_to_python import engine as _engine
 
-				if _engine is None:
-					raise RuntimeError("Engine exists but is None")
-				return _engine
-			except Exception:
-				raise RuntimeError("Database engine is not configured. Create `src/db_connection.py`.")
+def _keyset_predicate(keys: Sequence[Tuple[str, str]], descending: bool, first: int = 0) -> str:
+	"""`(k1 > :c0) OR (k1 = :c0 AND k2 > :c1) ...` for the given sort keys.
+
+	`first` is the number of the cursor parameter bound to `keys[0]`.
+	"""
+	op = "<" if descending else ">"
+	clauses = []
+	for i, (expr, _) in enumerate(keys):
+		equal = [f"{keys[j][0]} = :_cursor{first + j}" for j in range(i)]
+		clauses.append("(" + " AND ".join(equal + [f"{expr} {op} :_cursor{first + i}"]) + ")")
+	return "(" + " OR ".join(clauses) + ")"
+
+
+def _keyset_page(
+	engine,
+	scope: str,
+	sql: str,
+	params: Dict[str, Any],
+	keys: Sequence[Tuple[str, str]],
+	page_size: int,
+	cursor: Optional[str] = None,
+	descending: bool = False,
+	nullable_first: bool = False,
+) -> Tuple[pd.DataFrame, Optional[str]]:
+	"""Run `sql` (which must end in a WHERE clause) for one keyset page.
+
+	`keys` are `(sql expression, result column)` pairs forming a unique,
+	non-null sort key. With `nullable_first` the first key may be NULL:
+	NULLs sort lowest (as in SQLite and MySQL), and the NULL group is read
+	with a query of its own, so every query stays an index range scan on
+	bare columns instead of an OR (or a `COALESCE(...)`) the planner cannot
+	seek. Returns the page as a DataFrame and the next cursor.
+	"""
+	page_size = int(page_size)
+	if page_size < 1:
+		raise ValueError("page_size must be positive.")
+	params = dict(params)
+	queries = [sql]
+	if cursor:
+		values = _decode_cursor(scope, cursor, len(keys))
+		for i, value in enumerate(values):
+			if value is not None:
+				params[f"_cursor{i}"] = value
+		first = keys[0][0]
+		if not nullable_first:
+			queries = [f"{sql} AND {_keyset_predicate(keys, descending)}"]
+		elif values[0] is None:
+			# inside the NULL group, continue on the remaining keys
+			queries = [f"{sql} AND {first} IS NULL AND {_keyset_predicate(keys[1:], descending, first=1)}"]
+			if not descending:
+				queries.append(f"{sql} AND {first} IS NOT NULL")
+		else:
+			# the redundant bound on the first key lets the planner seek
+			bound = "<=" if descending else ">="
+			queries = [f"{sql} AND {first} {bound} :_cursor0 AND {_keyset_predicate(keys, descending)}"]
+			if descending:
+				queries.append(f"{sql} AND {first} IS NULL")
+	direction = "DESC" if descending else "ASC"
+	order = " ORDER BY " + ", ".join(f"{expr} {direction}" for expr, _ in keys) + " LIMIT :_page_limit"
+	rows: List[Any] = []
+	with engine.connect() as conn:
+		for query in queries:
+			params["_page_limit"] = page_size + 1 - len(rows)
+			result = conn.execute(_dated(query + order), params)
+			columns = list(result.keys())
+			rows += result.fetchall()
+			if len(rows) > page_size:
+				break
+	next_cursor = None
+	if len(rows) > page_size:
+		rows = rows[:page_size]
+		last = rows[-1]._mapping
+		next_cursor = _encode_cursor(scope, [last[column] for _, column in keys])
+	return pd.DataFrame(rows, columns=columns), next_cursor
 
 
 # ----------------
@@ -51,55 +298,310 @@ def fetch_all_books(engine) -> pd.DataFrame:
 
 
 def create_book(title, author, isbn=None, cost=None):
-	"""Insert a new book into `books` and return a confirmation string."""
+	"""Insert a new book into `books` and return a confirmation string.
+
+	The ISBN is validated and stored in canonical ISBN-13 form in `isbn13`;
+	if a book with the same ISBN already exists it is updated (title, author
+	and, when given, cost) instead of duplicated.
+	"""
 	if not title:
 		raise ValueError("title is required")
-	query = text("""
-	INSERT INTO books (title, author, ISBN, cost_book, book_status)
-	VALUES (:title, :author, :isbn, :cost, :status)
-	""")
-	with get_engine().connect() as conn:
+	isbn13 = normalize_isbn(isbn) if isbn else None
+	if isbn and isbn13 is None:
+		raise ValueError(f"Invalid ISBN: {isbn}")
+	engine = get_engine()
+	_ensure_dashboard_counters(engine)
+	ensure_isbn13_column(engine)
+	insert_sql = text(insert_new_book_sql(engine))
+	update_columns = ("title", "author", "cost_book") if cost is not None else ("title", "author")
+	update_sql = text(f"UPDATE books SET {', '.join(f'{col} = :{col}' for col in update_columns)} WHERE isbn13 = :isbn13")
+	params = {
+		"title": title,
+		"author": author,
+		"ISBN": isbn,
+		"isbn13": isbn13,
+		"cost_book": cost,
+		"book_status": "AVAILABLE",
+	}
+	with engine.connect() as conn:
+		transaction = conn.begin()
+		try:
+			# the insert itself decides: of two concurrent callers with the same
+			# ISBN only one inserts (and counts the book), the other updates
+			result = conn.execute(insert_sql, params)
+			book_id = getattr(result, "lastrowid", None)
+			existing_id = None
+			if isbn13 is not None:
+				existing_id = conn.execute(text("SELECT book_id FROM books WHERE isbn13 = :isbn13"), {"isbn13": isbn13}).scalar()
+				if existing_id is None:
+					raise RuntimeError(f"Book with ISBN {isbn13} was neither inserted nor found.")
+			# on MySQL a duplicate also reports one (found) row; its lastrowid is
+			# never the stored book's id
+			if result.rowcount == 1 and (existing_id is None or book_id == existing_id):
+				deltas = _status_deltas(None, "AVAILABLE")
+				deltas["total_books"] = 1
+				_bump_counters(conn, deltas)
+				transaction.commit()
+				index_book(book_id, title, author or "")
+				return f"Added book '{title}' by {author}."
+			conn.execute(update_sql, params)
+			transaction.commit()
+			index_book(existing_id, title, author or "")
+			return f"Book with ISBN {isbn13} already exists (id {existing_id}); updated it."
+		except Exception:
+			transaction.rollback()
+			raise
+
+
+# Rows per multi-row INSERT in create_books (6 bind parameters per row)
+CREATE_BOOKS_BATCH_SIZE = 1000
+
+
+def _prepare_book_records(records) -> pd.DataFrame:
+	"""Validate `create_books` input as a whole; raises ValueError listing the bad rows."""
+	df = records.copy() if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+	df = df.rename(columns={c: str(c).strip() for c in df.columns})
+	df = df.rename(columns={"authors": "author", "cost_book": "cost"})
+	if "title" not in df.columns:
+		raise ValueError("records need a 'title' column")
+	text_cols = {}
+	for col in ("title", "author", "ISBN", "isbn", "isbn13"):
+		if col in df.columns:
+			text_cols[col] = df[col].astype("string").str.strip().replace("", pd.NA)
+	title = text_cols["title"]
+	author = text_cols.get("author", pd.Series(pd.NA, index=df.index, dtype="string"))
+	raw_isbn = pd.Series(pd.NA, index=df.index, dtype="string")
+	for col in ("isbn13", "ISBN", "isbn"):
+		if col in text_cols:
+			raw_isbn = raw_isbn.where(raw_isbn.notna(), text_cols[col].to_numpy())
+	isbn13 = normalize_isbn_series(raw_isbn)
+	cost_raw = df["cost"] if "cost" in df.columns else pd.Series(None, index=df.index, dtype=object)
+	cost = pd.to_numeric(cost_raw, errors="coerce")
+
+	errors: List[str] = []
+	for pos in np.flatnonzero(title.isna().to_numpy()):
+		errors.append(f"row {pos + 1}: title is required")
+	for pos in np.flatnonzero((raw_isbn.notna() & isbn13.isna()).to_numpy()):
+		errors.append(f"row {pos + 1}: invalid ISBN {raw_isbn.iloc[pos]}")
+	for pos in np.flatnonzero((cost.isna() & cost_raw.notna() & cost_raw.astype("string").str.strip().ne("")).to_numpy()):
+		errors.append(f"row {pos + 1}: invalid cost {cost_raw.iloc[pos]}")
+	if errors:
+		more = f" (and {len(errors) - 10} more)" if len(errors) > 10 else ""
+		raise ValueError("Invalid book records: " + "; ".join(errors[:10]) + more)
+
+	out = pd.DataFrame({
+		"title": title.to_numpy(dtype=object),
+		"author": author.to_numpy(dtype=object, na_value=None),
+		"ISBN": raw_isbn.to_numpy(dtype=object, na_value=None),
+		"isbn13": isbn13.to_numpy(dtype=object, na_value=None),
+		"cost_book": cost.astype(object).where(cost.notna(), None).to_numpy(),
+		"book_status": "AVAILABLE",
+	})
+	return out
+
+
+def create_books(records) -> List[int]:
+	"""Insert many books in one transaction; returns their book_ids in input order.
+
+	`records` is a list of dicts or a DataFrame with `title` (required),
+	`author`, `isbn` (or `ISBN` / `isbn13`) and `cost`. All rows are validated
+	before anything is written. Books whose ISBN already exists (or repeats
+	within `records`) are updated like in `create_book` and keep their id;
+	the rest go in with multi-row INSERTs.
+	"""
+	df = _prepare_book_records(records)
+	if df.empty:
+		return []
+	engine = get_engine()
+	_ensure_dashboard_counters(engine)
+	ensure_isbn13_column(engine)
+
+	ids: List[Optional[int]] = [None] * len(df)
+	has_isbn = df["isbn13"].notna().to_numpy()
+	keyed = df[has_isbn]
+	plain_pos = np.flatnonzero(~has_isbn)
+	select_ids = text("SELECT isbn13, book_id FROM books WHERE isbn13 IN :isbns").bindparams(bindparam("isbns", expanding=True))
+	with engine.connect() as conn:
 		transaction = conn.begin()
 		try:
-			conn.execute(
-				query,
-				{
-					"title": title,
-					"author": author,
-					"isbn": isbn,
-					"cost": cost,
-					"status": "AVAILABLE",
-				},
-			)
+			inserted = 0
+			if not keyed.empty:
+				# last occurrence wins, as if the rows were created one by one
+				unique = keyed.drop_duplicates("isbn13", keep="last").copy()
+				# ...except that a missing cost never clears an earlier one
+				last_cost = keyed.dropna(subset=["cost_book"]).groupby("isbn13")["cost_book"].last()
+				unique["cost_book"] = unique["isbn13"].map(last_cost).astype(object).where(unique["isbn13"].isin(last_cost.index), None)
+				isbns = unique["isbn13"].tolist()
+				existing = set()
+				for start in range(0, len(isbns), CREATE_BOOKS_BATCH_SIZE):
+					existing.update(r[0] for r in conn.execute(select_ids, {"isbns": isbns[start:start + CREATE_BOOKS_BATCH_SIZE]}))
+				records_keyed = unique.to_dict("records")
+				conn.execute(text(upsert_books_sql(engine, ("title", "author"))), records_keyed)
+				# existing books only take a cost when one was given
+				with_cost = [
+					{"isbn13": rec["isbn13"], "cost": rec["cost_book"]}
+					for rec in records_keyed
+					if rec["cost_book"] is not None and rec["isbn13"] in existing
+				]
+				if with_cost:
+					conn.execute(text("UPDATE books SET cost_book = :cost WHERE isbn13 = :isbn13"), with_cost)
+				id_by_isbn: Dict[str, int] = {}
+				for start in range(0, len(isbns), CREATE_BOOKS_BATCH_SIZE):
+					id_by_isbn.update((r[0], int(r[1])) for r in conn.execute(select_ids, {"isbns": isbns[start:start + CREATE_BOOKS_BATCH_SIZE]}))
+				for pos in np.flatnonzero(has_isbn):
+					ids[pos] = id_by_isbn[df["isbn13"].iat[pos]]
+				inserted += len(isbns) - len(existing)
+
+			for start in range(0, len(plain_pos), CREATE_BOOKS_BATCH_SIZE):
+				batch = plain_pos[start:start + CREATE_BOOKS_BATCH_SIZE]
+				params: Dict[str, Any] = {}
+				rows_sql: List[str] = []
+				for i, pos in enumerate(batch):
+					row = df.iloc[pos]
+					rows_sql.append(f"(:t{i}, :a{i}, :i{i}, NULL, :c{i}, 'AVAILABLE')")
+					params.update({f"t{i}": row["title"], f"a{i}": row["author"], f"i{i}": row["ISBN"], f"c{i}": row["cost_book"]})
+				insert_sql = "INSERT INTO books (title, author, ISBN, isbn13, cost_book, book_status) VALUES "
+				returned = _insert_returning(conn, insert_sql + ", ".join(rows_sql), params, "book_id")
+				if returned is not None:
+					# one statement assigns increasing ids in VALUES order
+					new_ids = sorted(int(r[0]) for r in returned)
+				else:
+					# no natural key without an ISBN: one INSERT (and lastrowid) per book
+					new_ids = [
+						int(conn.execute(text(insert_sql + row_sql), params).lastrowid)
+						for row_sql in rows_sql
+					]
+				for pos, book_id in zip(batch, new_ids):
+					ids[pos] = book_id
+				inserted += len(batch)
+
+			if inserted:
+				deltas = _status_deltas(None, "AVAILABLE")
+				deltas = {name: delta * inserted for name, delta in deltas.items()}
+				deltas["total_books"] = inserted
+				_bump_counters(conn, deltas)
 			transaction.commit()
-			return f"Added book '{title}' by {author}."
 		except Exception:
 			transaction.rollback()
 			raise
 
+	for book_id, title, author in zip(ids, df["title"], df["author"]):
+		index_book(book_id, title, author or "")
+	return [int(book_id) for book_id in ids]
+
+
+def _books_filter_sql(engine, title=None, author=None, genre=None, status=None, fulltext: bool = True, merge: bool = False) -> Tuple[str, Dict[str, Any], Optional[str]]:
+	"""Return `(FROM ... WHERE ... sql, params, relevance sql)` for a books search.
 
-def get_books(title: Optional[str] = None, author: Optional[str] = None, genre: Optional[str] = None, status: Optional[str] = None, limit: int = 100) -> pd.DataFrame:
-	query = "SELECT * FROM books WHERE 1=1"
+	With `merge` the full-text matches are ORed with the LIKE matches. The
+	relevance sql is None when the search runs on LIKE alone
+	(`fulltext=False`, no full-text index, or no title/author given).
+	"""
 	params: Dict[str, Any] = {}
+	clause = fulltext_clause(engine, title=title, author=author) if fulltext else None
+	like: List[str] = []
 	if title:
-		query += " AND title LIKE :title"
+		like.append("b.title LIKE :title")
 		params["title"] = f"%{title}%"
 	if author:
-		query += " AND author LIKE :author"
+		like.append("b.author LIKE :author")
 		params["author"] = f"%{author}%"
+	if clause is None:
+		query = "FROM books b WHERE 1=1" + "".join(f" AND {cond}" for cond in like)
+		score_sql = None
+	elif merge:
+		query = f"FROM books b WHERE (({clause['filter_sql']}) OR ({' AND '.join(like)}))"
+		params.update(clause["params"])
+		score_sql = clause["row_score_sql"]
+	else:
+		query = f"{clause['from_sql']} WHERE {clause['where_sql']}"
+		params = dict(clause["params"])
+		score_sql = clause["score_sql"]
 	if genre:
-		query += " AND genre = :genre"
+		query += " AND b.genre = :genre"
 		params["genre"] = genre
 	if status:
-		query += " AND status = :status"
+		query += " AND b.status = :status"
 		params["status"] = status
-	query += " LIMIT :limit"
-	params["limit"] = int(limit)
-	query_text = text(query)
+	return query, params, score_sql
+
+
+def get_books(title: Optional[str] = None, author: Optional[str] = None, genre: Optional[str] = None, status: Optional[str] = None, limit: int = 100, ranked: bool = False) -> pd.DataFrame:
+	"""Search books by title/author (and genre/status).
+
+	Title and author searches go through the full-text backend in
+	`book_search` when it is available, which matches word prefixes.
+	Substrings inside a word ("obbit") are matched with `LIKE '%x%'`:
+	by default only when the full-text search finds nothing, or always
+	(same books as a LIKE search) with `LIANES_SEARCH_SUBSTRING=merge`; see
+	`book_search`. With `ranked=True` results are ordered by relevance and a
+	`relevance` column is added.
+	"""
+	engine = get_engine()
+	merge = substring_mode() == "merge"
+
+	def run(fulltext: bool):
+		from_where, params, score_sql = _books_filter_sql(engine, title, author, genre, status, fulltext=fulltext, merge=merge)
+		select = "SELECT b.*"
+		if ranked:
+			select += f", {score_sql or '0'} AS relevance"
+		query = f"{select} {from_where}"
+		if ranked:
+			query += " ORDER BY relevance DESC"
+		query += " LIMIT :limit"
+		params["limit"] = int(limit)
+		with engine.connect() as conn:
+			result = conn.execute(text(query), params)
+			df = pd.DataFrame(result.fetchall(), columns=result.keys())
+		return df, score_sql is not None
+
+	df, used_fulltext = run(True)
+	if df.empty and used_fulltext and not merge:
+		df, _ = run(False)
+	return df
+
+
+def get_books_page(title: Optional[str] = None, author: Optional[str] = None, genre: Optional[str] = None, status: Optional[str] = None, page_size: int = 50, cursor: Optional[str] = None) -> Page:
+	"""Keyset-paginated `get_books`, ordered by `book_id`.
+
+	Substring matching follows `get_books`. In the default `fallback` mode a
+	full-text search that finds nothing is repeated with LIKE; the pages of
+	that fallback carry their own cursor scope, so the following pages stay
+	on LIKE.
+	"""
+	engine = get_engine()
+	keys = [("b.book_id", "book_id")]
+	if substring_mode() == "merge":
+		from_where, params, _ = _books_filter_sql(engine, title, author, genre, status, merge=True)
+		df, next_cursor = _keyset_page(engine, "books_merge", f"SELECT b.* {from_where}", params, keys, page_size, cursor)
+		return Page(df, next_cursor)
+	like = cursor is not None and _cursor_scope(cursor) == "books_like"
+	from_where, params, score_sql = _books_filter_sql(engine, title, author, genre, status, fulltext=not like)
+	df, next_cursor = _keyset_page(engine, "books_like" if like else "books", f"SELECT b.* {from_where}", params, keys, page_size, cursor)
+	if df.empty and cursor is None and score_sql is not None:
+		from_where, params, _ = _books_filter_sql(engine, title, author, genre, status, fulltext=False)
+		df, next_cursor = _keyset_page(engine, "books_like", f"SELECT b.* {from_where}", params, keys, page_size, None)
+	return Page(df, next_cursor)
+
+
+def search_books_fuzzy(query: str, k: int = 10) -> pd.DataFrame:
+	"""Typo-tolerant title/author search through the in-memory trigram index.
+
+	Returns up to `k` books ordered by similarity, with a `similarity` column.
+	"""
+	matches = get_trigram_index().search(query, k=k)
+	if not matches:
+		return pd.DataFrame()
+	book_ids = [book_id for book_id, _ in matches]
+	query_text = text("SELECT * FROM books WHERE book_id IN :book_ids").bindparams(bindparam("book_ids", expanding=True))
 	with get_engine().connect() as conn:
-		result = conn.execute(query_text, params)
+		result = conn.execute(query_text, {"book_ids": book_ids})
 		df = pd.DataFrame(result.fetchall(), columns=result.keys())
-	return df
+	if df.empty:
+		return df
+	scores = dict(matches)
+	df["similarity"] = df["book_id"].map(scores)
+	return df.sort_values("similarity", ascending=False, kind="stable").reset_index(drop=True)
 
 
 def get_book_by_id(book_id):
@@ -125,8 +627,14 @@ def update_book_details(book_id, title=None, author=None, isbn=None, genre=None,
 		set_clauses.append("author = :author")
 		params["author"] = author
 	if isbn is not None:
+		isbn13 = normalize_isbn(isbn) if isbn else None
+		if isbn and isbn13 is None:
+			raise ValueError(f"Invalid ISBN: {isbn}")
+		ensure_isbn13_column(get_engine())
 		set_clauses.append("isbn = :isbn")
+		set_clauses.append("isbn13 = :isbn13")
 		params["isbn"] = isbn
+		params["isbn13"] = isbn13
 	if genre is not None:
 		set_clauses.append("genre = :genre")
 		params["genre"] = genre
@@ -142,102 +650,125 @@ def update_book_details(book_id, title=None, author=None, isbn=None, genre=None,
 		try:
 			conn.execute(query, params)
 			transaction.commit()
+			if title is not None or author is not None:
+				index_book(book_id, title, author)
 			return f"Updated book id {book_id}."
 		except Exception:
 			transaction.rollback()
 			raise
 
 
+def _change_book_status(conn, book_id, new_status, check=None) -> Optional[str]:
+	"""Set `book_id`'s status and adjust the counters; returns the old status (None: no such book).
+
+	`check(old_status)` may raise to refuse the change. The UPDATE only applies
+	while the status is still the one read (MySQL also locks the row), so a
+	concurrent change makes us re-read rather than count from a stale status.
+	"""
+	lock = " FOR UPDATE" if conn.dialect.name == "mysql" else ""
+	read_sql = text(f"SELECT book_status FROM books WHERE book_id = :book_id{lock}")
+	update_sql = text("UPDATE books SET book_status = :new_status WHERE book_id = :book_id AND book_status = :old_status")
+	for _ in range(5):
+		old_status = conn.execute(read_sql, {"book_id": book_id}).scalar()
+		if old_status is None:
+			return None
+		if check is not None:
+			check(old_status)
+		if conn.execute(update_sql, {"new_status": new_status, "book_id": book_id, "old_status": old_status}).rowcount == 1:
+			_bump_counters(conn, _status_deltas(old_status, new_status))
+			return old_status
+	raise RuntimeError(f"Status of book id {book_id} keeps changing concurrently; please retry.")
+
+
 def update_book_status(book_id, new_status):
 	allowed_statuses = {"AVAILABLE", "BORROWED", "LOST", "DAMAGED", "REMOVED"}
 	if new_status not in allowed_statuses:
 		raise ValueError(f"Invalid status '{new_status}'. Allowed statuses: {allowed_statuses}")
-	query = text("UPDATE books SET book_status = :new_status WHERE book_id = :book_id")
-	with get_engine().connect() as conn:
-		transaction = conn.begin()
-		try:
-			conn.execute(query, {"new_status": new_status, "book_id": book_id})
-			transaction.commit()
-			return f"Updated status of book id {book_id} to '{new_status}'."
-		except Exception:
-			transaction.rollback()
-			raise
+	engine = get_engine()
+	_ensure_dashboard_counters(engine)
+	with engine.begin() as conn:
+		if _change_book_status(conn, book_id, new_status) is None:
+			raise ValueError(f"Book with ID {book_id} does not exist.")
+	return f"Updated status of book id {book_id} to '{new_status}'."
 
 
 def delete_book(book_id):
 	# Notebook recommends logical delete: set status to 'REMOVED'
-	query_status = text("SELECT book_status FROM books WHERE book_id = :book_id")
-	query_update = text("UPDATE books SET book_status = 'REMOVED' WHERE book_id = :book_id")
-	with get_engine().connect() as conn:
-		transaction = conn.begin()
-		try:
-			result = conn.execute(query_status, {"book_id": book_id})
-			row = result.mappings().fetchone()
-			if row is None:
-				raise ValueError(f"Book id {book_id} not found.")
-			current_status = row.get("book_status")
-			if str(current_status).upper() == "BORROWED":
-				raise ValueError(f"Cannot delete book id {book_id} as it is currently BORROWED.")
-			conn.execute(query_update, {"book_id": book_id})
-			transaction.commit()
-			return f"Book id {book_id} marked as REMOVED."
-		except Exception:
-			transaction.rollback()
-			raise
+	def not_borrowed(status):
+		if str(status).upper() == "BORROWED":
+			raise ValueError(f"Cannot delete book id {book_id} as it is currently BORROWED.")
+
+	engine = get_engine()
+	_ensure_dashboard_counters(engine)
+	with engine.begin() as conn:
+		if _change_book_status(conn, book_id, "REMOVED", check=not_borrowed) is None:
+			raise ValueError(f"Book id {book_id} not found.")
+	return f"Book id {book_id} marked as REMOVED."
 
 
 # --------------------------------------
 # Google Books lookup, parsing and bulk price update
 # --------------------------------------
 GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
+# Concurrent Google Books lookups in update_missing_prices_from_web
+GOOGLE_BOOKS_MAX_WORKERS = int(os.environ.get("GOOGLE_BOOKS_MAX_WORKERS", "8"))
+# Books written per transaction by the price pipelines
+PRICE_WRITE_BATCH_SIZE = int(os.environ.get("LIANES_PRICE_WRITE_BATCH", "500"))
 
 
 def get_exchange_rate(from_currency: str, to_currency: str = "EUR") -> Optional[float]:
-	"""Try to fetch a live FX rate from exchangerate.host. Returns None on failure.
+	"""Return today's FX rate `from_currency -> to_currency`, or None if unavailable.
 
-	Falls back to None so caller may choose a default or skip conversion.
+	Goes through `fx_rates.get_exchange_rates` (in-process memo, then the
+	`exchange_rates` table, then the live API). Prefer calling that directly
+	with every currency of a batch.
 	"""
 	if not from_currency:
 		return None
-	try:
-		url = "https://api.exchangerate.host/latest"
-		params = {"base": from_currency.upper(), "symbols": to_currency.upper()}
-		r = requests.get(url, params=params, timeout=6)
-		r.raise_for_status()
-		data = r.json()
-		rates = data.get("rates", {})
-		rate = rates.get(to_currency.upper())
-		if rate:
-			return float(rate)
-	except Exception as e:
-		print(f"[FX] Could not fetch FX rate {from_currency}->{to_currency}: {e}")
-	return None
+	return get_exchange_rates([from_currency], to_currency).get(normalize_currency(from_currency))
 
 
-def google_books_lookup(query: str, max_results: int = 5, api_key: Optional[str] = None) -> List[Dict[str, Any]]:
-	"""Consulta Google Books usando uma query (isbn:xxx ou title/author).
-
-	Retorna lista de items (podem ser vazias).
-	"""
+def _google_books_params(query: str, max_results: int, api_key: Optional[str]) -> Dict[str, Any]:
+	"""Query string of a volumes search (shared with `async_crud.google_books_lookup`)."""
 	params = {
 		"q": query,
 		"maxResults": int(max_results),
 		"printType": "books",
 		"country": "BR",
 	}
-	if api_key is None:
-		api_key = None
 	if api_key:
 		params["key"] = api_key
+	return params
+
+
+def google_books_lookup(query: str, max_results: int = 5, api_key: Optional[str] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+	"""Consulta Google Books usando uma query (isbn:xxx ou title/author).
+
+	Respostas ficam no cache persistente de `google_books_cache` (inclusive as
+	vazias); `use_cache=False` força a ida à API. As requisições passam pelo
+	cliente compartilhado de `http_client` (keep-alive, retries com backoff e
+	circuit breaker).
+
+	Retorna lista de items (podem ser vazias).
+	"""
+	params = _google_books_params(query, max_results, api_key)
+	cache = get_response_cache() if use_cache else None
+	cache_key = ResponseCache.make_key(query, params) if cache is not None else None
+	if cache is not None:
+		cached = cache.get(cache_key)
+		if cached is not None:
+			return cached
 
 	try:
-		resp = requests.get(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
-		resp.raise_for_status()
+		resp = http_get(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
 		data = resp.json()
-		return data.get("items", [])
+		items = data.get("items", [])
 	except Exception as e:
 		print(f"[GoogleBooks] API error for query '{query}': {e}")
 		return []
+	if cache is not None:
+		cache.put(cache_key, query, items)
+	return items
 
 
 def parse_google_item(item: Dict[str, Any]) -> Dict[str, Any]:
@@ -277,15 +808,8 @@ def parse_google_item(item: Dict[str, Any]) -> Dict[str, Any]:
 	}
 
 
-def _normalize_text(s: Optional[str]) -> str:
-	if not s:
-		return ""
-	import re
-
-	s = s.lower().strip()
-	s = re.sub(r"[^a-z0-9\s]", " ", s)
-	s = re.sub(r"\s+", " ", s)
-	return s
+# Memoized, precompiled normalization shared with the trigram index
+_normalize_text = normalize_text
 
 
 def _author_matches(db_author: Optional[str], api_authors: List[str]) -> bool:
@@ -293,9 +817,13 @@ def _author_matches(db_author: Optional[str], api_authors: List[str]) -> bool:
 		return True
 	db_norm = _normalize_text(db_author)
 	for a in api_authors:
-		if a and db_norm in _normalize_text(a):
+		if not a:
+			continue
+		api_norm = _normalize_text(a)
+		if db_norm in api_norm or api_norm in db_norm:
 			return True
-		if a and _normalize_text(a) in db_norm:
+		# same words in another order ("Tolkien, J.R.R." vs "J.R.R. Tolkien")
+		if token_sort_ratio(db_norm, api_norm) == 1.0:
 			return True
 	return False
 
@@ -308,11 +836,17 @@ def _title_matches(db_title: Optional[str], api_title: Optional[str]) -> bool:
 	return dbn in apin or apin in dbn
 
 
-def update_missing_prices_from_web(limit: int = 50, api_key: Optional[str] = None) -> List[Dict[str, Any]]:
+def update_missing_prices_from_web(limit: int = 50, api_key: Optional[str] = None, max_workers: Optional[int] = None, batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
 	"""
 	Objetivo final: para cada livro sem preço, tentar achar preço via Google Books
 	seguindo a estratégia: ISBN -> validar título/autor -> se falhar, buscar por título+autor
 
+	As buscas na API rodam em paralelo (`max_workers`, padrão
+	`GOOGLE_BOOKS_MAX_WORKERS`); `max_workers=1` mantém o modo sequencial.
+	As gravações são feitas em lotes de `batch_size` livros por transação
+	(padrão `PRICE_WRITE_BATCH_SIZE`). Só preços em BRL são convertidos para
+	EUR ("€"); os demais são gravados na moeda informada pelo Google Books.
+
 	Retorna lista de registros atualizados com detalhes.
 	"""
 	engine = get_engine()
@@ -332,142 +866,218 @@ def update_missing_prices_from_web(limit: int = 50, api_key: Optional[str] = Non
 		print("ℹ️ No books with missing prices found.")
 		return []
 
-	updated_rows: List[Dict[str, Any]] = []
-	print(f"🔍 Found {len(rows)} book(s) with missing prices. Processing...")
-
-	for row in rows:
-		book_id = row.get("book_id")
-		isbn = row.get("ISBN")
-		title = row.get("title")
-		author = row.get("author")
-		old_cost = row.get("cost_book")
-		updated = False
-		updated_info: Dict[str, Any] = {
-			"book_id": book_id,
-			"title": title,
-			"old_isbn": isbn,
-			"old_cost": old_cost,
-			"new_isbn": None,
-			"new_cost": None,
-			"currency": None,
-			"matched_by": None,
-			"updated_at": None,
-		}
-
-		# 1) Try ISBN search if ISBN present
-		candidates = []
-		if isbn:
-			q = f"isbn:{isbn}"
-			items = google_books_lookup(q, max_results=3, api_key=api_key)
-			candidates = items or []
-
-		# parse candidates and validate title/author
-		chosen = None
-		for it in candidates:
+	workers = max(1, int(max_workers if max_workers is not None else GOOGLE_BOOKS_MAX_WORKERS))
+	print(f"🔍 Found {len(rows)} book(s) with missing prices. Processing with {workers} worker(s)...")
+
+	# Lookups for different books overlap in the pool; results come back in
+	# input order and DB updates stay on this thread.
+	pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 and len(rows) > 1 else None
+	try:
+		if pool is not None:
+			matches = list(pool.map(lambda r: _find_web_price_match(r, api_key), rows))
+		else:
+			matches = [_find_web_price_match(r, api_key) for r in rows]
+	finally:
+		if pool is not None:
+			pool.shutdown(wait=True, cancel_futures=True)
+
+	# One FX lookup for every currency seen in this run
+	converted = _convert_chosen_prices([chosen for chosen, _ in matches])
+	pending = []
+	for row, match, price in zip(rows, matches, converted):
+		update = _web_price_update(row, match, price)
+		if update is not None:
+			pending.append(update)
+
+	updated_rows = []
+	for update in _write_price_updates(engine, pending, batch_size):
+		info = update["info"]
+		updated_rows.append(info)
+		print(f"✅ Updated book_id={info['book_id']} (ISBN {info['old_isbn']} -> {info['new_isbn']}) price {info['new_cost']} {info['currency']}")
+
+	print(f"🎉 Processing finished. {len(updated_rows)} book(s) updated.")
+	return updated_rows
+
+
+def _find_web_price_match(row, api_key: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+	"""Network half of the price update: return `(parsed item, matched_by)` or `(None, None)`.
+
+	Strategy: ISBN -> validate title/author -> otherwise search by title+author.
+	Safe to run concurrently for different books.
+	"""
+	isbn = row.get("ISBN")
+	title = row.get("title")
+	author = row.get("author")
+
+	# 1) Try ISBN search if ISBN present
+	candidates = []
+	if isbn:
+		q = f"isbn:{isbn}"
+		items = google_books_lookup(q, max_results=3, api_key=api_key)
+		candidates = items or []
+
+	# parse candidates and validate title/author
+	for it in candidates:
+		parsed = parse_google_item(it)
+		if parsed.get("price") is None:
+			continue
+		if _title_matches(title, parsed.get("title")) and _author_matches(author, parsed.get("authors", [])):
+			return parsed, "isbn"
+
+	# 2) If not chosen by ISBN, try title+author search
+	qparts = []
+	if title:
+		qparts.append(f"intitle:{title}")
+	if author:
+		qparts.append(f"inauthor:{author}")
+	q = "+".join(qparts) if qparts else title or author or ""
+	if q:
+		items = google_books_lookup(q, max_results=5, api_key=api_key)
+		for it in items:
 			parsed = parse_google_item(it)
+			# if parsed has an isbn and price, consider it
 			if parsed.get("price") is None:
 				continue
-			if _title_matches(title, parsed.get("title")) and _author_matches(author, parsed.get("authors", [])):
-				chosen = parsed
-				updated_info["matched_by"] = "isbn"
-				break
+			# if title matches reasonably
+			if _title_matches(title, parsed.get("title")):
+				return parsed, "title_author"
+	return None, None
 
-		# 2) If not chosen by ISBN, try title+author search
-		if chosen is None:
-			qparts = []
-			if title:
-				qparts.append(f"intitle:{title}")
-			if author:
-				qparts.append(f"inauthor:{author}")
-			q = "+".join(qparts) if qparts else title or author or ""
-			if q:
-				items = google_books_lookup(q, max_results=5, api_key=api_key)
-				for it in items:
-					parsed = parse_google_item(it)
-					# if parsed has an isbn and price, consider it
-					if parsed.get("price") is None:
-						continue
-					# if title matches reasonably
-					if _title_matches(title, parsed.get("title")):
-						chosen = parsed
-						updated_info["matched_by"] = "title_author"
-						break
-
-		# 3) If we found a candidate with price, apply DB updates
-		if chosen is not None:
-			new_price = chosen.get("price")
-			currency = chosen.get("currency") or "UNK"
-			new_isbn = chosen.get("isbn13") or chosen.get("isbn10")
 
-			try:
-				with engine.begin() as conn:
-					# Prepare price and currency; convert BRL -> EUR so function returns EUR values
-					price_raw = float(new_price)
-					currency_label = (currency or "").upper()
-					price_to_store = price_raw
-					# If Google Books reports BRL, convert to EUR
-					if currency_label in {"BRL", "R$"}:
-						rate = get_exchange_rate("BRL", "EUR")
-						if rate is None:
-							# fallback conservative rate if live fetch fails
-							rate = 0.18
-							print(f"[FX] Using fallback BRL->EUR rate {rate}")
-						price_to_store = round(price_raw * float(rate), 2)
-						currency_db = "€"
-					else:
-						currency_db = currency or "UNK"
+def _convert_chosen_prices(chosen_items: List[Optional[Dict[str, Any]]]) -> List[Optional[Tuple[float, str]]]:
+	"""Convert the prices of the chosen Google Books items to EUR in one go.
 
-					with engine.begin() as conn:
-						# update cost_book (store converted price if applicable)
-						conn.execute(
-							text("""
-								UPDATE books SET cost_book = :price WHERE book_id = :book_id
-							"""),
-							{"price": float(price_to_store), "book_id": book_id},
-						)
-
-						# update ISBN if we found a valid one and it's different
-						if new_isbn and (not isbn or str(new_isbn) != str(isbn)):
-							conn.execute(text("UPDATE books SET ISBN = :new_isbn WHERE book_id = :book_id"), {"new_isbn": new_isbn, "book_id": book_id})
-							updated_info["new_isbn"] = new_isbn
-
-						# insert price_history (price in EUR when conversion applied)
-						conn.execute(
-							text("""
-								INSERT INTO price_history (book_id, isbn, price, currency, source)
-								VALUES (:book_id, :isbn, :price, :currency, :source)
-							"""),
-							{"book_id": book_id, "isbn": new_isbn or isbn, "price": float(price_to_store), "currency": currency_db, "source": "google_books"},
-						)
-
-					updated = True
-					updated_info["new_cost"] = float(price_to_store)
-					updated_info["currency"] = currency_db
-					updated_info["updated_at"] = datetime.utcnow()
-					updated_rows.append(updated_info)
-					print(f"✅ Updated book_id={book_id} (ISBN {isbn} -> {new_isbn}) price {price_to_store} {currency_db}")
-			except Exception as e:
-				print(f"⚠️ DB error updating book_id={book_id}: {e}")
+	Returns `(price_to_store, currency_db)` per item (None where no item was
+	chosen), using a single `get_exchange_rates` call. Only
+	`CONVERTED_CURRENCIES` (BRL) are converted; other prices keep their
+	currency.
+	"""
+	present = [c for c in chosen_items if c is not None]
+	if not present:
+		return [None] * len(chosen_items)
+	currencies = {normalize_currency(c.get("currency")) for c in present}
+	rates = get_exchange_rates(currencies & CONVERTED_CURRENCIES, "EUR")
+	converted = convert_prices([c.get("price") for c in present], [c.get("currency") or "UNK" for c in present], rates, "EUR")
+	values = iter(zip(converted["price"].tolist(), converted["currency"].tolist()))
+	return [next(values) if c is not None else None for c in chosen_items]
+
+
+def _web_price_update(row, match: Tuple[Optional[Dict[str, Any]], Optional[str]], price: Optional[Tuple[float, str]]) -> Optional[Dict[str, Any]]:
+	"""Turn one book's match into a pending write for `_write_price_updates` (None if unmatched)."""
+	book_id = row.get("book_id")
+	isbn = row.get("ISBN")
+	title = row.get("title")
+	chosen, matched_by = match
+
+	if chosen is None:
+		print(f"❌ No suitable Google Books match for book_id={book_id}, ISBN={isbn}, title='{title}'")
+		return None
 
-		else:
-			print(f"❌ No suitable Google Books match for book_id={book_id}, ISBN={isbn}, title='{title}'")
+	# BRL prices already converted to EUR (see _convert_chosen_prices)
+	price_to_store, currency_db = price
+	new_isbn = chosen.get("isbn13") or chosen.get("isbn10")
+	# only fill in an ISBN the book lacks (or has invalid); a valid stored
+	# ISBN is never rewritten from a title/author match
+	isbn_changed = normalize_isbn(isbn) is None and normalize_isbn(new_isbn) is not None
+	return {
+		"book_id": book_id,
+		"price": float(price_to_store),
+		"currency": currency_db,
+		"new_isbn": new_isbn if isbn_changed else None,
+		"history_isbn": new_isbn or isbn,
+		"info": {
+			"book_id": book_id,
+			"title": title,
+			"old_isbn": isbn,
+			"old_cost": row.get("cost_book"),
+			"new_isbn": new_isbn if isbn_changed else None,
+			"new_cost": float(price_to_store),
+			"currency": currency_db,
+			"matched_by": matched_by,
+			"updated_at": None,
+		},
+	}
+
+
+def _flush_price_batch(conn, batch: List[Dict[str, Any]]) -> None:
+	"""One UPDATE ... CASE for the whole batch plus one executemany INSERT into price_history."""
+	params: Dict[str, Any] = {}
+	cost_cases: List[str] = []
+	isbn_cases: List[int] = []
+	for i, update in enumerate(batch):
+		params[f"b{i}"] = update["book_id"]
+		params[f"p{i}"] = update["price"]
+		cost_cases.append(f"WHEN :b{i} THEN :p{i}")
+		if update["new_isbn"]:
+			params[f"i{i}"] = update["new_isbn"]
+			params[f"c{i}"] = normalize_isbn(update["new_isbn"])
+			isbn_cases.append(i)
+	assignments = [f"cost_book = CASE book_id {' '.join(cost_cases)} ELSE cost_book END"]
+	if isbn_cases:
+		assignments.append(f"ISBN = CASE book_id {' '.join(f'WHEN :b{i} THEN :i{i}' for i in isbn_cases)} ELSE ISBN END")
+		assignments.append(f"isbn13 = CASE book_id {' '.join(f'WHEN :b{i} THEN :c{i}' for i in isbn_cases)} ELSE isbn13 END")
+	ids = ", ".join(f":b{i}" for i in range(len(batch)))
+	conn.execute(text(f"UPDATE books SET {', '.join(assignments)} WHERE book_id IN ({ids})"), params)
+	conn.execute(
+		text("""
+			INSERT INTO price_history (book_id, isbn, price, currency, source)
+			VALUES (:book_id, :isbn, :price, :currency, :source)
+		"""),
+		[
+			{"book_id": u["book_id"], "isbn": u["history_isbn"], "price": u["price"], "currency": u["currency"], "source": "google_books"}
+			for u in batch
+		],
+	)
 
-	print(f"🎉 Processing finished. {len(updated_rows)} book(s) updated.")
-	return updated_rows
 
+def _write_price_updates(engine, pending: List[Dict[str, Any]], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+	"""Write pending price updates in batches, one transaction per batch.
 
-def reprocess_with_fuzzy(book_ids: List[int], api_key: Optional[str] = None, title_threshold: float = 0.7, author_threshold: float = 0.6) -> List[Dict[str, Any]]:
+	If a batch fails it is rolled back and retried book by book, so one bad row
+	only costs its own update. Returns the updates that were committed, with
+	`info["updated_at"]` set.
+	"""
+	size = max(1, int(batch_size or PRICE_WRITE_BATCH_SIZE))
+	written: List[Dict[str, Any]] = []
+	if pending:
+		ensure_isbn13_column(engine)
+	for start in range(0, len(pending), size):
+		batch = pending[start:start + size]
+		try:
+			with engine.begin() as conn:
+				_flush_price_batch(conn, batch)
+			committed = batch
+		except Exception as e:
+			print(f"⚠️ DB error writing a batch of {len(batch)} price(s), retrying one by one: {e}")
+			committed = []
+			for update in batch:
+				try:
+					with engine.begin() as conn:
+						_flush_price_batch(conn, [update])
+					committed.append(update)
+				except Exception as e:
+					print(f"⚠️ DB error updating book_id={update['book_id']}: {e}")
+		now = datetime.utcnow()
+		for update in committed:
+			update["info"]["updated_at"] = now
+		written.extend(committed)
+	return written
+
+
+def reprocess_with_fuzzy(book_ids: List[int], api_key: Optional[str] = None, title_threshold: float = 0.7, author_threshold: float = 0.6, batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
 	"""Reprocess a specific list of `book_id`s using a more permissive fuzzy matching.
 
-	Uses difflib.SequenceMatcher to compute similarity between DB title/author and API results.
-	If a candidate has a price and meets either the title or author threshold, it will be
+	Titles are compared with `matching.title_similarity` (word order insensitive) and authors
+	with `matching.author_similarity` (token set); all candidates of all books are scored in
+	one pass by `matching.best_matches`. If a candidate has a price and meets either the title
+	or author threshold, the best-scoring one will be
 	applied using the same update/insert logic as `update_missing_prices_from_web` (including
-	BRL->EUR conversion).
+	conversion to EUR, with one FX lookup for the whole batch, and batched writes).
 	"""
-	from difflib import SequenceMatcher
-
 	engine = get_engine()
 	updated_rows: List[Dict[str, Any]] = []
+	books: List[Dict[str, Any]] = []
+	candidate_lists: List[List[Dict[str, Any]]] = []
 
 	for bid in book_ids:
 		# fetch book
@@ -478,7 +1088,6 @@ def reprocess_with_fuzzy(book_ids: List[int], api_key: Optional[str] = None, tit
 		title = book.get("title")
 		author = book.get("author")
 		isbn = book.get("ISBN")
-		old_cost = book.get("cost_book")
 
 		print(f"[Fuzzy] Processing book_id={bid} title='{title}'")
 
@@ -494,84 +1103,42 @@ def reprocess_with_fuzzy(book_ids: List[int], api_key: Optional[str] = None, tit
 			continue
 
 		items = google_books_lookup(q, max_results=10, api_key=api_key)
-		chosen = None
-		chosen_parsed = None
-
-		for it in items:
-			parsed = parse_google_item(it)
-			if parsed.get("price") is None:
-				continue
-
-			# compute normalized similarity scores
-			title_score = 0.0
-			author_score = 0.0
-			if title and parsed.get("title"):
-				a = _normalize_text(title)
-				b = _normalize_text(parsed.get("title"))
-				title_score = SequenceMatcher(None, a, b).ratio()
-			if author and parsed.get("authors"):
-				a = _normalize_text(author)
-				# compare against each api author
-				for pa in parsed.get("authors", []):
-					if not pa:
-						continue
-					s = SequenceMatcher(None, a, _normalize_text(pa)).ratio()
-					if s > author_score:
-						author_score = s
-
-			# accept if thresholds met
-			if title_score >= float(title_threshold) or author_score >= float(author_threshold):
-				chosen = parsed
-				chosen_parsed = {"title_score": title_score, "author_score": author_score}
-				print(f"[Fuzzy] Candidate accepted for book_id={bid} (title_score={title_score:.2f} author_score={author_score:.2f})")
-				break
-
-		if chosen is None:
+		parsed_items = [parse_google_item(it) for it in items]
+		books.append(book)
+		candidate_lists.append([p for p in parsed_items if p.get("price") is not None])
+
+	# Score every candidate of every book in one pass
+	matches = best_matches(
+		[(book.get("title"), book.get("author")) for book in books],
+		[[(p.get("title"), p.get("authors") or []) for p in candidates] for candidates in candidate_lists],
+		float(title_threshold),
+		float(author_threshold),
+	)
+	accepted: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, float]]] = []
+	for book, candidates, match in zip(books, candidate_lists, matches):
+		bid = book.get("book_id")
+		if match is None:
 			print(f"[Fuzzy] No fuzzy match for book_id={bid}")
 			continue
-
-		# Apply same DB update logic (with conversion)
-		new_price = chosen.get("price")
-		currency = chosen.get("currency") or "UNK"
-		new_isbn = chosen.get("isbn13") or chosen.get("isbn10")
-
-		try:
-			price_raw = float(new_price)
-			currency_label = (currency or "").upper()
-			price_to_store = price_raw
-			if currency_label in {"BRL", "R$"}:
-				rate = get_exchange_rate("BRL", "EUR")
-				if rate is None:
-					rate = 0.18
-					print(f"[FX] Using fallback BRL->EUR rate {rate}")
-				price_to_store = round(price_raw * float(rate), 2)
-				currency_db = "€"
-			else:
-				currency_db = currency or "UNK"
-
-			with engine.begin() as conn:
-				conn.execute(text("UPDATE books SET cost_book = :price WHERE book_id = :book_id"), {"price": float(price_to_store), "book_id": bid})
-				if new_isbn and (not isbn or str(new_isbn) != str(isbn)):
-					conn.execute(text("UPDATE books SET ISBN = :new_isbn WHERE book_id = :book_id"), {"new_isbn": new_isbn, "book_id": bid})
-				conn.execute(text("INSERT INTO price_history (book_id, isbn, price, currency, source) VALUES (:book_id, :isbn, :price, :currency, :source)"), {"book_id": bid, "isbn": new_isbn or isbn, "price": float(price_to_store), "currency": currency_db, "source": "google_books"})
-
-			updated_info = {
-				"book_id": bid,
-				"title": title,
-				"old_isbn": isbn,
-				"old_cost": old_cost,
-				"new_isbn": new_isbn,
-				"new_cost": float(price_to_store),
-				"currency": currency_db,
-				"matched_by": "fuzzy_title_author",
-				"title_score": chosen_parsed.get("title_score") if chosen_parsed else None,
-				"author_score": chosen_parsed.get("author_score") if chosen_parsed else None,
-				"updated_at": datetime.utcnow(),
-			}
-			updated_rows.append(updated_info)
-			print(f"[Fuzzy] ✅ Updated book_id={bid} price {price_to_store} {currency_db}")
-		except Exception as e:
-			print(f"[Fuzzy] ⚠️ DB error updating book_id={bid}: {e}")
+		index, title_score, author_score = match
+		print(f"[Fuzzy] Candidate accepted for book_id={bid} (title_score={title_score:.2f} author_score={author_score:.2f})")
+		accepted.append((book, candidates[index], {"title_score": title_score, "author_score": author_score}))
+
+	# Apply same DB update logic, converting all prices with one FX lookup
+	converted = _convert_chosen_prices([chosen for _, chosen, _ in accepted])
+	pending = []
+	for (book, chosen, chosen_parsed), price in zip(accepted, converted):
+		update = _web_price_update(book, (chosen, "fuzzy_title_author"), price)
+		# report the matched ISBN even when it equals the stored one
+		update["info"]["new_isbn"] = chosen.get("isbn13") or chosen.get("isbn10")
+		update["info"]["title_score"] = chosen_parsed.get("title_score") if chosen_parsed else None
+		update["info"]["author_score"] = chosen_parsed.get("author_score") if chosen_parsed else None
+		pending.append(update)
+
+	for update in _write_price_updates(engine, pending, batch_size):
+		info = update["info"]
+		updated_rows.append(info)
+		print(f"[Fuzzy] ✅ Updated book_id={info['book_id']} price {info['new_cost']} {info['currency']}")
 
 	return updated_rows
 
@@ -607,6 +1174,7 @@ def create_borrower(first_name, last_name, email=None, phone_number=None, relati
 	if not first_name and not last_name:
 		raise ValueError("Name is required for a borrower.")
 	engine = get_engine()
+	_ensure_dashboard_counters(engine)
 	insert_sql = text(
 		"""
 		INSERT INTO borrowers (first_name, last_name, email, phone_number, relationship_type, address)
@@ -627,6 +1195,7 @@ def create_borrower(first_name, last_name, email=None, phone_number=None, relati
 			person_id = result.inserted_primary_key[0]
 		except Exception:
 			person_id = getattr(result, "lastrowid", None)
+		_bump_counters(conn, {"total_borrowers": 1})
 		row = conn.execute(text('SELECT * FROM borrowers WHERE person_id = :person_id'), {"person_id": person_id}).mappings().one()
 	return dict(row)
 
@@ -639,8 +1208,7 @@ def get_borrower_by_id(person_id):
 	return dict(row) if row is not None else None
 
 
-def get_borrowers(first_name=None, last_name=None, limit=100):
-	engine = get_engine()
+def _borrowers_filter_sql(first_name=None, last_name=None) -> Tuple[str, Dict[str, Any]]:
 	query = "SELECT * FROM borrowers WHERE 1 = 1"
 	params: Dict[str, Any] = {}
 	if first_name:
@@ -649,6 +1217,12 @@ def get_borrowers(first_name=None, last_name=None, limit=100):
 	if last_name:
 		query += " AND last_name = :last_name"
 		params["last_name"] = last_name
+	return query, params
+
+
+def get_borrowers(first_name=None, last_name=None, limit=100):
+	engine = get_engine()
+	query, params = _borrowers_filter_sql(first_name, last_name)
 	query += " ORDER BY first_name DESC LIMIT :limit"
 	params["limit"] = int(limit)
 	sql = text(query)
@@ -657,6 +1231,22 @@ def get_borrowers(first_name=None, last_name=None, limit=100):
 	return [dict(r) for r in rows]
 
 
+def get_borrowers_page(first_name=None, last_name=None, page_size: int = 50, cursor: Optional[str] = None) -> Page:
+	"""Keyset-paginated `get_borrowers` (first name descending, then person_id).
+
+	Borrowers without a first name come last. The sort walks
+	`ix_borrowers_first_name` backwards (person_id is the implicit tail of
+	that index), so a page costs O(page_size) instead of a sort of the table.
+	"""
+	engine = get_engine()
+	query, params = _borrowers_filter_sql(first_name, last_name)
+	keys = [("first_name", "first_name"), ("person_id", "person_id")]
+	df, next_cursor = _keyset_page(engine, "borrowers", query, params, keys, page_size, cursor, descending=True, nullable_first=True)
+	df = df.astype(object)
+	rows = df.where(df.notna(), None).to_dict("records")
+	return Page(rows, next_cursor)
+
+
 def update_borrower_contact(person_id, first_name=None, last_name=None, email=None, phone=None, address=None):
 	fields: List[str] = []
 	params: Dict[str, Any] = {"person_id": person_id}
@@ -705,6 +1295,7 @@ def set_borrower_status(person_id, new_status):
 
 def delete_borrower(person_id=None, first_name=None, last_name=None):
 	engine = get_engine()
+	_ensure_dashboard_counters(engine)
 	query = "DELETE FROM borrowers WHERE 1 = 1"
 	params: Dict[str, Any] = {}
 	if person_id:
@@ -721,6 +1312,7 @@ def delete_borrower(person_id=None, first_name=None, last_name=None):
 	sql = text(query)
 	with engine.begin() as conn:
 		result = conn.execute(sql, params)
+		_bump_counters(conn, {"total_borrowers": -result.rowcount})
 	return result.rowcount
 
 
@@ -728,18 +1320,31 @@ def delete_borrower(person_id=None, first_name=None, last_name=None):
 # LOANS / TRANSACTIONS
 # ----------------
 def create_loan(book_id: int, person_id: int, loan_date: Optional[date] = None, due_date: Optional[date] = None, loan_period_days: int = 14) -> Dict[str, Any]:
+	"""Lend one book.
+
+	The checkout is a single conditional UPDATE that only flips a book that is
+	still available; its rowcount gates the INSERT, so two concurrent callers
+	can never both lend the same copy (the loser gets "not available").
+	"""
 	engine = get_engine()
+	_ensure_dashboard_counters(engine)
 	if loan_date is None:
 		loan_date = date.today()
 	if due_date is None:
 		due_date = loan_date + timedelta(days=loan_period_days)
+	checkout_sql = text("""
+		UPDATE books 
+		SET book_status = 'borrowed' 
+		WHERE book_id = :book_id AND LOWER(book_status) = 'available'
+	""")
 	check_book_sql = text("""
 		SELECT book_id, title, book_status 
 		FROM books 
 		WHERE book_id = :book_id
 	""")
 	check_borrower_sql = text("""
-		SELECT person_id, first_name, last_name 
+		SELECT person_id, first_name, last_name,
+			   (SELECT title FROM books WHERE book_id = :book_id) as book_title
 		FROM borrowers 
 		WHERE person_id = :person_id
 	""")
@@ -747,30 +1352,26 @@ def create_loan(book_id: int, person_id: int, loan_date: Optional[date] = None,
 		INSERT INTO transactions (book_id, person_id, loan_date, due_date)
 		VALUES (:book_id, :person_id, :loan_date, :due_date)
 	""")
-	update_book_status_sql = text("""
-		UPDATE books 
-		SET book_status = 'borrowed' 
-		WHERE book_id = :book_id
-	""")
 	with engine.begin() as conn:
-		book = conn.execute(check_book_sql, {"book_id": book_id}).mappings().one_or_none()
-		if book is None:
-			raise ValueError(f"Book with ID {book_id} does not exist.")
-		if str(book["book_status"]).lower() != "available":
+		if conn.execute(checkout_sql, {"book_id": book_id}).rowcount != 1:
+			# lost the race or never available: only now look at why
+			book = conn.execute(check_book_sql, {"book_id": book_id}).mappings().one_or_none()
+			if book is None:
+				raise ValueError(f"Book with ID {book_id} does not exist.")
 			raise ValueError(f"Book '{book['title']}' is not available (status: {book['book_status']}).")
-		borrower = conn.execute(check_borrower_sql, {"person_id": person_id}).mappings().one_or_none()
+		borrower = conn.execute(check_borrower_sql, {"book_id": book_id, "person_id": person_id}).mappings().one_or_none()
 		if borrower is None:
 			raise ValueError(f"Borrower with ID {person_id} does not exist.")
 		result = conn.execute(insert_transaction_sql, {"book_id": book_id, "person_id": person_id, "loan_date": loan_date, "due_date": due_date})
-		try:
-			transaction_id = result.lastrowid
-		except Exception:
-			transaction_id = getattr(result, "lastrowid", None)
-		conn.execute(update_book_status_sql, {"book_id": book_id})
+		transaction_id = result.lastrowid
+		deltas = _status_deltas("available", "borrowed")
+		deltas["active_loans"] = 1
+		_bump_counters(conn, deltas)
+		_bump_due_count(conn, due_date, 1)
 	return {
 		"transaction_id": transaction_id,
 		"book_id": book_id,
-		"book_title": book["title"],
+		"book_title": borrower["book_title"],
 		"person_id": person_id,
 		"borrower_name": f"{borrower['first_name']} {borrower['last_name']}",
 		"loan_date": loan_date,
@@ -781,12 +1382,13 @@ def create_loan(book_id: int, person_id: int, loan_date: Optional[date] = None,
 
 def process_return(transaction_id: int, return_date: Optional[date] = None) -> Dict[str, Any]:
 	engine = get_engine()
+	_ensure_dashboard_counters(engine)
 	if return_date is None:
 		return_date = date.today()
-	get_transaction_sql = text("""
+	get_transaction_sql = _dated("""
 		SELECT t.transaction_id, t.book_id, t.person_id, 
 			   t.loan_date, t.due_date, t.actual_return_date,
-			   b.title as book_title,
+			   b.title as book_title, b.book_status,
 			   br.first_name, br.last_name
 		FROM transactions t
 		JOIN books b ON t.book_id = b.book_id
@@ -796,12 +1398,7 @@ def process_return(transaction_id: int, return_date: Optional[date] = None) -> D
 	update_transaction_sql = text("""
 		UPDATE transactions 
 		SET actual_return_date = :return_date 
-		WHERE transaction_id = :transaction_id
-	""")
-	update_book_status_sql = text("""
-		UPDATE books 
-		SET book_status = 'available' 
-		WHERE book_id = :book_id
+		WHERE transaction_id = :transaction_id AND actual_return_date IS NULL
 	""")
 	with engine.begin() as conn:
 		trans = conn.execute(get_transaction_sql, {"transaction_id": transaction_id}).mappings().one_or_none()
@@ -809,8 +1406,13 @@ def process_return(transaction_id: int, return_date: Optional[date] = None) -> D
 			raise ValueError(f"Transaction {transaction_id} does not exist.")
 		if trans["actual_return_date"] is not None:
 			raise ValueError(f"Transaction {transaction_id} already closed on {trans['actual_return_date']}.")
-		conn.execute(update_transaction_sql, {"transaction_id": transaction_id, "return_date": return_date})
-		conn.execute(update_book_status_sql, {"book_id": trans["book_id"]})
+		# the read above takes no lock: only the caller that closes the loan goes on
+		if conn.execute(update_transaction_sql, {"transaction_id": transaction_id, "return_date": return_date}).rowcount != 1:
+			raise ValueError(f"Transaction {transaction_id} was already closed.")
+		# guarded like update_book_status: counts from the status it replaces
+		_change_book_status(conn, trans["book_id"], "available")
+		_bump_counters(conn, {"active_loans": -1})
+		_bump_due_count(conn, trans["due_date"], -1)
 	is_late = return_date > trans["due_date"]
 	days_late = (return_date - trans["due_date"]).days if is_late else 0
 	return {
@@ -849,6 +1451,7 @@ def process_return_by_book(
 		ValueError: If no active loan found for this book or no identifier provided
 	"""
 	engine = get_engine()
+	_ensure_dashboard_counters(engine)
 
 	if book_id is None and book_title is None:
 		raise ValueError("Must provide either book_id or book_title.")
@@ -858,10 +1461,10 @@ def process_return_by_book(
 
 	# Build query based on provided identifier
 	if book_id is not None:
-		get_active_loan_sql = text("""
+		get_active_loan_sql = _dated("""
 			SELECT t.transaction_id, t.book_id, t.person_id, 
 				   t.loan_date, t.due_date, t.actual_return_date,
-				   b.title as book_title,
+				   b.title as book_title, b.book_status,
 				   br.first_name, br.last_name
 			FROM transactions t
 			JOIN books b ON t.book_id = b.book_id
@@ -874,10 +1477,10 @@ def process_return_by_book(
 		params = {"book_id": book_id}
 	else:
 		# Search by title (partial match)
-		get_active_loan_sql = text("""
+		get_active_loan_sql = _dated("""
 			SELECT t.transaction_id, t.book_id, t.person_id, 
 				   t.loan_date, t.due_date, t.actual_return_date,
-				   b.title as book_title,
+				   b.title as book_title, b.book_status,
 				   br.first_name, br.last_name
 			FROM transactions t
 			JOIN books b ON t.book_id = b.book_id
@@ -892,14 +1495,9 @@ def process_return_by_book(
 	update_transaction_sql = text("""
 		UPDATE transactions 
 		SET actual_return_date = :return_date 
-		WHERE transaction_id = :transaction_id
+		WHERE transaction_id = :transaction_id AND actual_return_date IS NULL
 	""")
 
-	update_book_status_sql = text("""
-		UPDATE books 
-		SET book_status = 'available' 
-		WHERE book_id = :book_id
-	""")
 
 	# Execute in transaction
 	with engine.begin() as conn:
@@ -910,14 +1508,23 @@ def process_return_by_book(
 			identifier = f"book ID {book_id}" if book_id else f"title '{book_title}'"
 			raise ValueError(f"No active loan found for {identifier}.")
 
-		# Step 2: Update transaction with return date
-		conn.execute(update_transaction_sql, {
+		# Step 2: Update transaction with return date; a concurrent return
+		# of the same loan closes it first and leaves nothing for us to update
+		closed = conn.execute(update_transaction_sql, {
 			"transaction_id": trans["transaction_id"],
 			"return_date": return_date,
-		})
+		}).rowcount
+		if closed != 1:
+			identifier = f"book ID {book_id}" if book_id else f"title '{book_title}'"
+			raise ValueError(f"No active loan found for {identifier}.")
 
-		# Step 3: Update book status to available
-		conn.execute(update_book_status_sql, {"book_id": trans["book_id"]})
+		# Step 3: Update book status to available (guarded like
+		# update_book_status, so the counters move from the status it replaces)
+		_change_book_status(conn, trans["book_id"], "available")
+
+		# Step 4: Keep dashboard counters in sync
+		_bump_counters(conn, {"active_loans": -1})
+		_bump_due_count(conn, trans["due_date"], -1)
 
 	# Calculate if return was late
 	is_late = return_date > trans["due_date"]
@@ -937,115 +1544,403 @@ def process_return_by_book(
 	}
 
 
-def get_active_loans() -> pd.DataFrame:
+def _update_changed_ids(conn, sql: str, ids: Sequence[int], column: str, params: Optional[Dict[str, Any]] = None) -> Set[int]:
+	"""Run the UPDATE `sql` (filtering on `IN :ids`) and return the `column` ids it changed.
+
+	Uses `RETURNING` where the dialect has it (SQLite), since the rows were
+	checked outside the write lock. MySQL has no UPDATE ... RETURNING; there
+	the caller has read the rows FOR UPDATE, so every id still qualifies.
+	"""
+	params = {**(params or {}), "ids": list(ids)}
+	if conn.dialect.update_returning:
+		stmt = text(f"{sql} RETURNING {column}").bindparams(bindparam("ids", expanding=True))
+		return {row[0] for row in conn.execute(stmt, params)}
+	conn.execute(text(sql).bindparams(bindparam("ids", expanding=True)), params)
+	return set(ids)
+
+
+def _mark_failed(item: Dict[str, Any], key: str, error: str) -> None:
+	"""Turn a pending batch result into a failure for its `key` id, in place."""
+	ident = item[key]
+	item.clear()
+	item.update({key: ident, "status": "failed", "error": error})
+
+
+def create_loans(person_id: int, book_ids: Sequence[int], loan_date: Optional[date] = None, due_date: Optional[date] = None, loan_period_days: int = 14) -> List[Dict[str, Any]]:
+	"""Lend several books to one borrower in a single transaction.
+
+	Availability is checked with one query, all transactions go in with one
+	multi-row INSERT and the books are flipped with one UPDATE. Returns one
+	dict per requested book, in input order: the `create_loan` result for
+	books that were lent, or `{"book_id", "status": "failed", "error"}` for
+	books that do not exist, are not available (including books lent by a
+	concurrent call after the check) or repeat in `book_ids`. An unknown
+	borrower fails the whole call with ValueError.
+	"""
 	engine = get_engine()
-	query = text("""
-		SELECT 
-			t.transaction_id,
-			t.book_id,
-			b.title as book_title,
-			b.author,
-			t.person_id,
-			CONCAT(br.first_name, ' ', br.last_name) as borrower_name,
-			t.loan_date,
-			t.due_date,
-			DATEDIFF(CURRENT_DATE, t.due_date) as days_overdue,
-			CASE 
-				WHEN CURRENT_DATE > t.due_date THEN 'overdue'
-				ELSE 'active'
-			END as status
+	_ensure_dashboard_counters(engine)
+	if loan_date is None:
+		loan_date = date.today()
+	if due_date is None:
+		due_date = loan_date + timedelta(days=loan_period_days)
+	book_ids = [int(b) for b in book_ids]
+	if not book_ids:
+		return []
+	lock = " FOR UPDATE" if engine.dialect.name == "mysql" else ""
+	check_books_sql = text(f"""
+		SELECT book_id, title, book_status
+		FROM books
+		WHERE book_id IN :book_ids{lock}
+	""").bindparams(bindparam("book_ids", expanding=True))
+	check_borrower_sql = text("""
+		SELECT person_id, first_name, last_name 
+		FROM borrowers 
+		WHERE person_id = :person_id
+	""")
+	update_books_sql = """
+		UPDATE books
+		SET book_status = 'borrowed'
+		WHERE book_id IN :ids AND LOWER(book_status) = 'available'
+	"""
+	find_loans_sql = text("""
+		SELECT transaction_id, book_id
+		FROM transactions
+		WHERE person_id = :person_id AND loan_date = :loan_date
+		  AND actual_return_date IS NULL AND book_id IN :book_ids
+	""").bindparams(bindparam("book_ids", expanding=True))
+
+	results: List[Dict[str, Any]] = []
+	with engine.begin() as conn:
+		borrower = conn.execute(check_borrower_sql, {"person_id": person_id}).mappings().one_or_none()
+		if borrower is None:
+			raise ValueError(f"Borrower with ID {person_id} does not exist.")
+		books = {row["book_id"]: row for row in conn.execute(check_books_sql, {"book_ids": sorted(set(book_ids))}).mappings()}
+
+		lend: List[Dict[str, Any]] = []
+		seen = set()
+		for book_id in book_ids:
+			book = books.get(book_id)
+			if book_id in seen:
+				error = f"Book with ID {book_id} is listed more than once."
+			elif book is None:
+				error = f"Book with ID {book_id} does not exist."
+			elif str(book["book_status"]).lower() != "available":
+				error = f"Book '{book['title']}' is not available (status: {book['book_status']})."
+			else:
+				error = None
+			seen.add(book_id)
+			if error:
+				results.append({"book_id": book_id, "status": "failed", "error": error})
+				continue
+			item = {
+				"transaction_id": None,
+				"book_id": book_id,
+				"book_title": book["title"],
+				"person_id": person_id,
+				"borrower_name": f"{borrower['first_name']} {borrower['last_name']}",
+				"loan_date": loan_date,
+				"due_date": due_date,
+				"status": "active",
+			}
+			results.append(item)
+			lend.append(item)
+
+		if lend:
+			# a book lent concurrently since the check fails alone
+			flipped = _update_changed_ids(conn, update_books_sql, [item["book_id"] for item in lend], "book_id")
+			for item in lend:
+				if item["book_id"] not in flipped:
+					_mark_failed(item, "book_id", f"Book '{item['book_title']}' was lent concurrently.")
+			lend = [item for item in lend if item["book_id"] in flipped]
+
+		if lend:
+			lend_ids = [item["book_id"] for item in lend]
+			params: Dict[str, Any] = {"person_id": person_id, "loan_date": loan_date, "due_date": due_date}
+			values = []
+			for i, book_id in enumerate(lend_ids):
+				params[f"b{i}"] = book_id
+				values.append(f"(:b{i}, :person_id, :loan_date, :due_date)")
+			insert_sql = f"INSERT INTO transactions (book_id, person_id, loan_date, due_date) VALUES {', '.join(values)}"
+			returned = _insert_returning(conn, insert_sql, params, "transaction_id, book_id")
+			if returned is None:
+				conn.execute(text(insert_sql), params)
+				# the books are locked and each has this one open loan
+				returned = conn.execute(find_loans_sql, {"person_id": person_id, "loan_date": loan_date, "book_ids": lend_ids}).fetchall()
+			transaction_ids = {int(book_id): int(transaction_id) for transaction_id, book_id in returned}
+			for item in lend:
+				item["transaction_id"] = transaction_ids[item["book_id"]]
+			deltas: Dict[str, int] = {"active_loans": len(lend)}
+			for book_id in lend_ids:
+				_add_deltas(deltas, _status_deltas(books[book_id]["book_status"], "borrowed"))
+			_bump_counters(conn, deltas)
+			_bump_due_count(conn, due_date, len(lend))
+	return results
+
+
+def process_returns(transaction_ids: Optional[Sequence[int]] = None, book_ids: Optional[Sequence[int]] = None, return_date: Optional[date] = None) -> List[Dict[str, Any]]:
+	"""Close several loans in a single transaction, by transaction id or by book id.
+
+	Loans are fetched with one query and closed with one UPDATE on
+	`transactions` and one on `books`. Returns one dict per requested id, in
+	input order: the `process_return` result, or `{"transaction_id" |
+	"book_id", "status": "failed", "error"}` for unknown, already returned
+	(including loans closed by a concurrent call after the check) or
+	repeated ids.
+	"""
+	if (transaction_ids is None) == (book_ids is None):
+		raise ValueError("Provide either transaction_ids or book_ids.")
+	engine = get_engine()
+	_ensure_dashboard_counters(engine)
+	if return_date is None:
+		return_date = date.today()
+	by_book = book_ids is not None
+	key = "book_id" if by_book else "transaction_id"
+	requested = [int(i) for i in (book_ids if by_book else transaction_ids)]
+	if not requested:
+		return []
+	where = "t.book_id IN :ids AND t.actual_return_date IS NULL" if by_book else "t.transaction_id IN :ids"
+	lock = " FOR UPDATE" if engine.dialect.name == "mysql" else ""
+	get_loans_sql = _dated(f"""
+		SELECT t.transaction_id, t.book_id, t.person_id, 
+			   t.loan_date, t.due_date, t.actual_return_date,
+			   b.title as book_title, b.book_status,
+			   br.first_name, br.last_name
 		FROM transactions t
 		JOIN books b ON t.book_id = b.book_id
 		JOIN borrowers br ON t.person_id = br.person_id
-		WHERE t.actual_return_date IS NULL
-		ORDER BY t.due_date ASC
-	""")
+		WHERE {where}
+		ORDER BY t.loan_date, t.transaction_id{lock}
+	""").bindparams(bindparam("ids", expanding=True))
+	close_loans_sql = """
+		UPDATE transactions
+		SET actual_return_date = :return_date
+		WHERE transaction_id IN :ids AND actual_return_date IS NULL
+	"""
+	update_books_sql = text("""
+		UPDATE books
+		SET book_status = 'available'
+		WHERE book_id IN :ids
+	""").bindparams(bindparam("ids", expanding=True))
+	read_books_sql = text(f"SELECT book_id, book_status FROM books WHERE book_id IN :ids{lock}").bindparams(bindparam("ids", expanding=True))
+
+	results: List[Dict[str, Any]] = []
+	with engine.begin() as conn:
+		# by book the most recent open loan wins, like process_return_by_book
+		loans = {row[key]: row for row in conn.execute(get_loans_sql, {"ids": sorted(set(requested))}).mappings()}
+
+		closing: List[Dict[str, Any]] = []
+		seen = set()
+		for ident in requested:
+			trans = loans.get(ident)
+			if ident in seen:
+				error = f"{'Book' if by_book else 'Transaction'} {ident} is listed more than once."
+			elif trans is None:
+				error = f"No active loan found for book ID {ident}." if by_book else f"Transaction {ident} does not exist."
+			elif trans["actual_return_date"] is not None:
+				error = f"Transaction {ident} already closed on {trans['actual_return_date']}."
+			else:
+				error = None
+			seen.add(ident)
+			if error:
+				results.append({key: ident, "status": "failed", "error": error})
+				continue
+			due = trans["due_date"]
+			is_late = return_date > due
+			item = {
+				"transaction_id": trans["transaction_id"],
+				"book_id": trans["book_id"],
+				"book_title": trans["book_title"],
+				"borrower_name": f"{trans['first_name']} {trans['last_name']}",
+				"loan_date": trans["loan_date"],
+				"due_date": due,
+				"return_date": return_date,
+				"is_late": is_late,
+				"days_late": (return_date - due).days if is_late else 0,
+				"status": "returned",
+			}
+			results.append(item)
+			closing.append(item)
+
+		if closing:
+			# a loan returned concurrently since the check fails alone
+			closed = _update_changed_ids(conn, close_loans_sql, [item["transaction_id"] for item in closing], "transaction_id", {"return_date": return_date})
+			for item in closing:
+				if item["transaction_id"] not in closed:
+					_mark_failed(item, key, f"Transaction {item['transaction_id']} was already closed.")
+			closing = [item for item in closing if item.get("transaction_id") in closed]
+
+		if closing:
+			book_ids = sorted({item["book_id"] for item in closing})
+			# re-read now that the loans UPDATE holds the write lock (MySQL: the
+			# rows are locked since the first read), so the counters move from
+			# the statuses actually replaced
+			old_statuses = dict(conn.execute(read_books_sql, {"ids": book_ids}).fetchall())
+			conn.execute(update_books_sql, {"ids": book_ids})
+			deltas: Dict[str, int] = {"active_loans": -len(closing)}
+			for book_id in book_ids:
+				_add_deltas(deltas, _status_deltas(old_statuses.get(book_id), "available"))
+			due_counts: Dict[date, int] = {}
+			for item in closing:
+				due_counts[item["due_date"]] = due_counts.get(item["due_date"], 0) - 1
+			_bump_counters(conn, deltas)
+			for due, delta in due_counts.items():
+				_bump_due_count(conn, due, delta)
+	return results
+
+
+_ACTIVE_LOANS_SQL = """
+	SELECT 
+		t.transaction_id,
+		t.book_id,
+		b.title as book_title,
+		b.author,
+		t.person_id,
+		{borrower_name} as borrower_name,
+		t.loan_date,
+		t.due_date,
+		{days_overdue} as days_overdue,
+		CASE 
+			WHEN {today} > t.due_date THEN 'overdue'
+			ELSE 'active'
+		END as status
+	FROM transactions t
+	JOIN books b ON t.book_id = b.book_id
+	JOIN borrowers br ON t.person_id = br.person_id
+	WHERE t.actual_return_date IS NULL
+"""
+
+_OVERDUE_LOANS_SQL = """
+	SELECT 
+		t.transaction_id,
+		t.book_id,
+		b.title as book_title,
+		t.person_id,
+		{borrower_name} as borrower_name,
+		br.email,
+		br.phone_number,
+		t.loan_date,
+		t.due_date,
+		{days_overdue} as days_overdue
+	FROM transactions t
+	JOIN books b ON t.book_id = b.book_id
+	JOIN borrowers br ON t.person_id = br.person_id
+	WHERE t.actual_return_date IS NULL
+	  AND t.due_date < {today}
+"""
+
+_LOAN_HISTORY_BY_BOOK_SQL = """
+	SELECT 
+		t.transaction_id,
+		t.person_id,
+		{borrower_name} as borrower_name,
+		t.loan_date,
+		t.due_date,
+		t.actual_return_date,
+		CASE 
+			WHEN t.actual_return_date IS NULL THEN 'active'
+			WHEN t.actual_return_date > t.due_date THEN 'returned_late'
+			ELSE 'returned_on_time'
+		END as status
+	FROM transactions t
+	JOIN borrowers br ON t.person_id = br.person_id
+	WHERE t.book_id = :book_id
+"""
+
+_LOAN_HISTORY_BY_BORROWER_SQL = """
+	SELECT 
+		t.transaction_id,
+		t.book_id,
+		b.title as book_title,
+		b.author,
+		t.loan_date,
+		t.due_date,
+		t.actual_return_date,
+		CASE 
+			WHEN t.actual_return_date IS NULL THEN 'active'
+			WHEN t.actual_return_date > t.due_date THEN 'returned_late'
+			ELSE 'returned_on_time'
+		END as status
+	FROM transactions t
+	JOIN books b ON t.book_id = b.book_id
+	WHERE t.person_id = :person_id
+"""
+
+# Sort keys shared by the full listings and their keyset pages
+_DUE_DATE_KEYS = [("t.due_date", "due_date"), ("t.transaction_id", "transaction_id")]
+_LOAN_DATE_KEYS = [("t.loan_date", "loan_date"), ("t.transaction_id", "transaction_id")]
+
+
+def get_active_loans() -> pd.DataFrame:
+	engine = get_engine()
+	query = _dated(_sql(engine, _ACTIVE_LOANS_SQL) + " ORDER BY t.due_date ASC")
 	with engine.connect() as conn:
 		result = conn.execute(query)
 		df = pd.DataFrame(result.fetchall(), columns=result.keys())
 	return df
 
 
+def get_active_loans_page(page_size: int = 50, cursor: Optional[str] = None) -> Page:
+	"""Keyset-paginated `get_active_loans`, keyed on `(due_date, transaction_id)`."""
+	engine = get_engine()
+	df, next_cursor = _keyset_page(engine, "active_loans", _sql(engine, _ACTIVE_LOANS_SQL), {}, _DUE_DATE_KEYS, page_size, cursor)
+	return Page(df, next_cursor)
+
+
 def get_overdue_loans() -> pd.DataFrame:
 	engine = get_engine()
-	query = text("""
-		SELECT 
-			t.transaction_id,
-			t.book_id,
-			b.title as book_title,
-			t.person_id,
-			CONCAT(br.first_name, ' ', br.last_name) as borrower_name,
-			br.email,
-			br.phone_number,
-			t.loan_date,
-			t.due_date,
-			DATEDIFF(CURRENT_DATE, t.due_date) as days_overdue
-		FROM transactions t
-		JOIN books b ON t.book_id = b.book_id
-		JOIN borrowers br ON t.person_id = br.person_id
-		WHERE t.actual_return_date IS NULL
-		  AND t.due_date < CURRENT_DATE
-		ORDER BY days_overdue DESC
-	""")
+	# oldest due date first == most days overdue, but served by the index
+	query = _dated(_sql(engine, _OVERDUE_LOANS_SQL) + " ORDER BY t.due_date ASC, t.transaction_id ASC")
 	with engine.connect() as conn:
 		result = conn.execute(query)
 		df = pd.DataFrame(result.fetchall(), columns=result.keys())
 	return df
 
 
+def get_overdue_loans_page(page_size: int = 50, cursor: Optional[str] = None) -> Page:
+	"""Keyset-paginated `get_overdue_loans` (most overdue first, i.e. oldest due date)."""
+	engine = get_engine()
+	df, next_cursor = _keyset_page(engine, "overdue_loans", _sql(engine, _OVERDUE_LOANS_SQL), {}, _DUE_DATE_KEYS, page_size, cursor)
+	return Page(df, next_cursor)
+
+
 def get_loan_history_by_book(book_id: int) -> pd.DataFrame:
 	engine = get_engine()
-	query = text("""
-		SELECT 
-			t.transaction_id,
-			t.person_id,
-			CONCAT(br.first_name, ' ', br.last_name) as borrower_name,
-			t.loan_date,
-			t.due_date,
-			t.actual_return_date,
-			CASE 
-				WHEN t.actual_return_date IS NULL THEN 'active'
-				WHEN t.actual_return_date > t.due_date THEN 'returned_late'
-				ELSE 'returned_on_time'
-			END as status
-		FROM transactions t
-		JOIN borrowers br ON t.person_id = br.person_id
-		WHERE t.book_id = :book_id
-		ORDER BY t.loan_date DESC
-	""")
+	query = _dated(_sql(engine, _LOAN_HISTORY_BY_BOOK_SQL) + " ORDER BY t.loan_date DESC")
 	with engine.connect() as conn:
 		result = conn.execute(query, {"book_id": book_id})
 		df = pd.DataFrame(result.fetchall(), columns=result.keys())
 	return df
 
 
+def get_loan_history_by_book_page(book_id: int, page_size: int = 50, cursor: Optional[str] = None) -> Page:
+	"""Keyset-paginated `get_loan_history_by_book`, newest loans first."""
+	engine = get_engine()
+	df, next_cursor = _keyset_page(
+		engine, f"history_book:{int(book_id)}", _sql(engine, _LOAN_HISTORY_BY_BOOK_SQL), {"book_id": book_id},
+		_LOAN_DATE_KEYS, page_size, cursor, descending=True,
+	)
+	return Page(df, next_cursor)
+
+
 def get_loan_history_by_borrower(person_id: int) -> pd.DataFrame:
 	engine = get_engine()
-	query = text("""
-		SELECT 
-			t.transaction_id,
-			t.book_id,
-			b.title as book_title,
-			b.author,
-			t.loan_date,
-			t.due_date,
-			t.actual_return_date,
-			CASE 
-				WHEN t.actual_return_date IS NULL THEN 'active'
-				WHEN t.actual_return_date > t.due_date THEN 'returned_late'
-				ELSE 'returned_on_time'
-			END as status
-		FROM transactions t
-		JOIN books b ON t.book_id = b.book_id
-		WHERE t.person_id = :person_id
-		ORDER BY t.loan_date DESC
-	""")
+	query = _dated(_sql(engine, _LOAN_HISTORY_BY_BORROWER_SQL) + " ORDER BY t.loan_date DESC")
 	with engine.connect() as conn:
 		result = conn.execute(query, {"person_id": person_id})
 		df = pd.DataFrame(result.fetchall(), columns=result.keys())
 	return df
 
 
+def get_loan_history_by_borrower_page(person_id: int, page_size: int = 50, cursor: Optional[str] = None) -> Page:
+	"""Keyset-paginated `get_loan_history_by_borrower`, newest loans first."""
+	engine = get_engine()
+	df, next_cursor = _keyset_page(
+		engine, f"history_borrower:{int(person_id)}", _sql(engine, _LOAN_HISTORY_BY_BORROWER_SQL), {"person_id": person_id},
+		_LOAN_DATE_KEYS, page_size, cursor, descending=True,
+	)
+	return Page(df, next_cursor)
+
+
 # Aliases to keep compatibility with older callers
 get_loan_history_for_book = get_loan_history_by_book
 get_loan_history_for_borrower = get_loan_history_by_borrower
@@ -1054,23 +1949,66 @@ get_loan_history_for_borrower = get_loan_history_by_borrower
 # ----------------
 # REPORTS / DASHBOARD
 # ----------------
+def _rebuild_dashboard_counters(engine) -> Dict[str, int]:
+	counts_sql = text("""
+		SELECT
+			(SELECT COUNT(*) FROM transactions WHERE actual_return_date IS NULL) as active_loans,
+			(SELECT COUNT(*) FROM borrowers) as total_borrowers
+	""")
+	# one pass over ix_books_status instead of a LOWER() scan per status
+	status_sql = text("SELECT book_status, COUNT(*) FROM books GROUP BY book_status")
+	with engine.begin() as conn:
+		counts = dict(conn.execute(counts_sql).mappings().one())
+		by_status = conn.execute(status_sql).fetchall()
+		counts["total_books"] = sum(int(n) for _, n in by_status)
+		for status, n in by_status:
+			counter = _STATUS_COUNTERS.get(str(status).lower())
+			if counter:
+				counts[counter] = counts.get(counter, 0) + int(n)
+		conn.execute(text("DELETE FROM dashboard_counters"))
+		conn.execute(
+			text("INSERT INTO dashboard_counters (counter_name, counter_value) VALUES (:name, :value)"),
+			[{"name": name, "value": int(counts.get(name) or 0)} for name in DASHBOARD_COUNTERS],
+		)
+		conn.execute(text("DELETE FROM loan_due_counts"))
+		conn.execute(text("""
+			INSERT INTO loan_due_counts (due_date, open_loans)
+			SELECT due_date, COUNT(*)
+			FROM transactions
+			WHERE actual_return_date IS NULL AND due_date IS NOT NULL
+			GROUP BY due_date
+		"""))
+	return {name: int(counts.get(name) or 0) for name in DASHBOARD_COUNTERS}
+
+
+def rebuild_dashboard_counters() -> Dict[str, int]:
+	"""Reconcile job: recompute every dashboard counter from the base tables.
+
+	Returns the rebuilt counters.
+	"""
+	engine = get_engine()
+	_ensure_dashboard_counters(engine)
+	return _rebuild_dashboard_counters(engine)
+
+
 def get_dashboard_stats() -> Dict[str, Any]:
+	"""Read the dashboard numbers from the maintained counters (no table scans)."""
 	engine = get_engine()
-	query = text("""
-		SELECT 
-			COUNT(DISTINCT CASE WHEN t.actual_return_date IS NULL THEN t.transaction_id END) as active_loans,
-			COUNT(DISTINCT CASE WHEN t.actual_return_date IS NULL AND t.due_date < CURRENT_DATE THEN t.transaction_id END) as overdue_loans,
-			COUNT(DISTINCT CASE WHEN b.book_status = 'available' THEN b.book_id END) as available_books,
-			COUNT(DISTINCT CASE WHEN b.book_status = 'borrowed' THEN b.book_id END) as borrowed_books,
-			COUNT(DISTINCT b.book_id) as total_books,
-			COUNT(DISTINCT br.person_id) as total_borrowers
-		FROM books b
-		CROSS JOIN borrowers br
-		LEFT JOIN transactions t ON b.book_id = t.book_id AND t.actual_return_date IS NULL
-	""")
+	_ensure_dashboard_counters(engine)
+	query = text(_sql(engine, """
+		SELECT counter_name, counter_value FROM dashboard_counters
+		UNION ALL
+		SELECT 'overdue_loans', COALESCE(SUM(open_loans), 0)
+		FROM loan_due_counts
+		WHERE due_date < {today}
+	"""))
 	with engine.connect() as conn:
-		result = conn.execute(query).mappings().one()
-	return dict(result)
+		rows = conn.execute(query).fetchall()
+	stats = {name: 0 for name in DASHBOARD_COUNTERS}
+	stats["overdue_loans"] = 0
+	for name, value in rows:
+		stats[name] = int(value or 0)
+	return stats
 
 
 def get_most_borrowed_books(limit: int = 10) -> pd.DataFrame:
@@ -1096,10 +2034,10 @@ def get_most_borrowed_books(limit: int = 10) -> pd.DataFrame:
 
 def get_most_active_borrowers(limit: int = 10) -> pd.DataFrame:
 	engine = get_engine()
-	query = text("""
+	query = text(_sql(engine, """
 		SELECT 
 			br.person_id,
-			CONCAT(br.first_name, ' ', br.last_name) as borrower_name,
+			{borrower_name} as borrower_name,
 			br.relationship_type,
 			COUNT(t.transaction_id) as total_loans,
 			COUNT(CASE WHEN t.actual_return_date IS NULL THEN 1 END) as currently_borrowed,
@@ -1109,13 +2047,25 @@ def get_most_active_borrowers(limit: int = 10) -> pd.DataFrame:
 		GROUP BY br.person_id, borrower_name, br.relationship_type
 		ORDER BY total_loans DESC
 		LIMIT :limit
-	""")
+	"""))
 	with engine.connect() as conn:
 		result = conn.execute(query, {"limit": int(limit)})
 		df = pd.DataFrame(result.fetchall(), columns=result.keys())
 	return df
 
 
+# ----------------
+# INSTRUMENTATION
+# ----------------
+# With LIANES_SQL_INSTRUMENTATION=1 every public function (aliases included)
+# tags its SQL with its name; see `instrumentation`. Otherwise a no-op.
+instrument_functions(globals(), [
+	name for name, obj in list(globals().items())
+	if callable(obj) and getattr(obj, "__module__", None) == __name__ and not name.startswith("_")
+	and name not in {"get_engine", "parse_google_item", "main", "Page"}
+])
+
+
 def main():
 	"""Placeholder test runner as suggested in the notebook."""
 	# TODO: implement small integration tests that exercise CRUD flows
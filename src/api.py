@@ -0,0 +1,651 @@
+"""Headless HTTP/JSON API over CRUD_Blueprint (WSGI, standard library only).
+
+    python -m src.api [--host 127.0.0.1] [--port 8000] [--workers 4] [--access-log]
+
+`app` is a plain WSGI application, so any WSGI server can host it as well
+(`gunicorn -w 4 src.api:app`). The built-in server is threaded and, with
+`--workers N`, pre-forks N processes that accept on the same socket; each
+process has its own pooled engine (`db_connection.get_engine`).
+
+Routes (JSON in and out; dates as ISO strings):
+
+    GET    /health
+    GET    /books?title=&author=&status=&page_size=&cursor=
+    GET    /books/search?q=&k=
+    GET    /books/{id}
+    GET    /books/{id}/loans?page_size=&cursor=
+    POST   /books                   {"title", "author", "isbn", "cost"}
+    POST   /books/batch             {"books": [...]}
+    PATCH  /books/{id}              {"title", "author", "isbn", "cost"}
+    PUT    /books/{id}/status       {"status"}
+    DELETE /books/{id}              (logical delete)
+    GET    /borrowers?first_name=&last_name=&page_size=&cursor=
+    GET    /borrowers/{id}
+    GET    /borrowers/{id}/loans?page_size=&cursor=
+    POST   /borrowers               {"first_name", "last_name", "email", ...}
+    PATCH  /borrowers/{id}          {"first_name", "last_name", "email", "address"}
+    GET    /loans/active?page_size=&cursor=
+    GET    /loans/overdue?page_size=&cursor=
+    POST   /loans                   {"book_id", "person_id", "loan_date", "due_date", "loan_period_days"}
+    POST   /loans/batch             {"person_id", "book_ids", ...}
+    POST   /returns                 {"transaction_id"} or {"book_id"}, optional "return_date"
+    POST   /returns/batch           {"transaction_ids"} or {"book_ids"}, optional "return_date"
+    GET    /reports/dashboard
+    GET    /reports/most-borrowed?limit=
+    GET    /reports/most-active?limit=
+    POST   /batch                   {"requests": [{"method", "path", "body"}, ...]}
+
+Lists are keyset-paginated: `{"items": [...], "next_cursor": ...}`; pass
+`next_cursor` back as `cursor` for the next page (`LIANES_API_MAX_PAGE_SIZE`,
+default 500, caps `page_size`).
+
+Every GET answer carries an `ETag` (hash of the body) and honours
+`If-None-Match` with 304. Catalog reads (`/books...`) are also kept in a
+small in-process cache for `LIANES_API_CACHE_TTL` seconds (default 5, 0
+disables it); writes through this process clear it, other workers serve at
+most TTL-old data.
+
+`ValueError`s from the CRUD layer become 404 ("does not exist" / "not
+found"), 409 (the book or loan is not in the needed state) or 400; anything
+unexpected is a 500 with the error logged.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from http import HTTPStatus
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import numpy as np
+import pandas as pd
+
+from . import CRUD_Blueprint as crud
+from .db_connection import get_engine, reset_engine
+from .migrations import ensure_schema
+from .trigram_index import get_trigram_index
+
+
+CACHE_TTL = float(os.environ.get("LIANES_API_CACHE_TTL") or 5)
+CACHE_MAX_ENTRIES = int(os.environ.get("LIANES_API_CACHE_MAX_ENTRIES") or 2048)
+MAX_PAGE_SIZE = int(os.environ.get("LIANES_API_MAX_PAGE_SIZE") or 500)
+MAX_BATCH = int(os.environ.get("LIANES_API_MAX_BATCH") or 100)
+MAX_BODY_BYTES = int(os.environ.get("LIANES_API_MAX_BODY_BYTES") or 10 * 1024 * 1024)
+
+# ValueError message fragments -> HTTP status (first match wins)
+_ERROR_STATUSES = (
+    ("does not exist", 404),
+    ("not found", 404),
+    ("no active loan", 409),
+    ("not available", 409),
+    ("already closed", 409),
+    ("currently borrowed", 409),
+)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, str]
+    body: Any
+    headers: Dict[str, str]
+
+    def arg(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.query.get(name)
+        return value if value not in (None, "") else default
+
+    def int_arg(self, name: str, default: int, maximum: Optional[int] = None) -> int:
+        raw = self.arg(name)
+        if raw is None:
+            return default
+        try:
+            value = int(raw)
+        except ValueError:
+            raise HTTPError(400, f"Query parameter '{name}' must be an integer.")
+        if value < 1:
+            raise HTTPError(400, f"Query parameter '{name}' must be positive.")
+        return min(value, maximum) if maximum else value
+
+    def field(self, name: str, required: bool = False) -> Any:
+        body = self.body if isinstance(self.body, dict) else {}
+        if required and body.get(name) is None:
+            raise HTTPError(400, f"Field '{name}' is required.")
+        return body.get(name)
+
+    def int_field(self, name: str, required: bool = False) -> Optional[int]:
+        value = self.field(name, required)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise HTTPError(400, f"Field '{name}' must be an integer.")
+
+    def int_list_field(self, name: str, maximum: int, required: bool = False) -> Optional[List[int]]:
+        values = self.field(name, required)
+        if values is None:
+            return None
+        if not isinstance(values, list) or len(values) > maximum:
+            raise HTTPError(400, f"Field '{name}' must be a list of at most {maximum} ids.")
+        try:
+            return [int(v) for v in values]
+        except (TypeError, ValueError):
+            raise HTTPError(400, f"Field '{name}' must contain integer ids only.")
+
+    def date_field(self, name: str) -> Optional[date]:
+        value = self.field(name)
+        if value is None:
+            return None
+        try:
+            return date.fromisoformat(str(value))
+        except ValueError:
+            raise HTTPError(400, f"Field '{name}' must be an ISO date (YYYY-MM-DD).")
+
+
+# ----------------
+# JSON
+# ----------------
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, pd.DataFrame):
+        return _records(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _records(rows: Any) -> List[Dict[str, Any]]:
+    """DataFrame (NaN/NaT as null) or list of row dicts -> list of dicts."""
+    if isinstance(rows, pd.DataFrame):
+        return rows.astype(object).where(rows.notna(), None).to_dict("records")
+    return [dict(row) for row in rows]
+
+
+def _page(page: crud.Page) -> Dict[str, Any]:
+    return {"items": _records(page.rows), "next_cursor": page.next_cursor}
+
+
+def _dump(payload: Any) -> bytes:
+    return json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+# ----------------
+# CATALOG CACHE
+# ----------------
+class _ResponseCache:
+    """TTL + LRU cache of serialized GET answers, keyed by path and query string."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, key: str, body: bytes, etag: str) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_CATALOG_CACHE = _ResponseCache(CACHE_TTL, CACHE_MAX_ENTRIES)
+
+
+# ----------------
+# HANDLERS
+# ----------------
+def _health(req: Request) -> Dict[str, Any]:
+    return {"status": "ok", "dialect": get_engine().dialect.name}
+
+
+def _list_books(req: Request) -> Dict[str, Any]:
+    return _page(crud.get_books_page(
+        title=req.arg("title"),
+        author=req.arg("author"),
+        status=req.arg("status"),
+        page_size=req.int_arg("page_size", 50, MAX_PAGE_SIZE),
+        cursor=req.arg("cursor"),
+    ))
+
+
+def _search_books(req: Request) -> List[Dict[str, Any]]:
+    q = req.arg("q")
+    if not q:
+        raise HTTPError(400, "Query parameter 'q' is required.")
+    return _records(crud.search_books_fuzzy(q, k=req.int_arg("k", 10, MAX_PAGE_SIZE)))
+
+
+def _get_book(req: Request, book_id: str) -> Dict[str, Any]:
+    book = crud.get_book_by_id(int(book_id))
+    if book is None:
+        raise HTTPError(404, f"Book with ID {book_id} does not exist.")
+    return book
+
+
+def _book_loans(req: Request, book_id: str) -> Dict[str, Any]:
+    return _page(crud.get_loan_history_by_book_page(
+        int(book_id), page_size=req.int_arg("page_size", 50, MAX_PAGE_SIZE), cursor=req.arg("cursor"),
+    ))
+
+
+def _create_book(req: Request) -> Tuple[int, Dict[str, Any]]:
+    message = crud.create_book(req.field("title", required=True), req.field("author"), req.field("isbn"), req.field("cost"))
+    return 201, {"message": message}
+
+
+def _create_books(req: Request) -> Tuple[int, Dict[str, Any]]:
+    books = req.field("books", required=True)
+    if not isinstance(books, list):
+        raise HTTPError(400, "Field 'books' must be a list.")
+    return 201, {"book_ids": crud.create_books(books)}
+
+
+def _update_book(req: Request, book_id: str) -> Dict[str, Any]:
+    message = crud.update_book_details(
+        int(book_id), title=req.field("title"), author=req.field("author"), isbn=req.field("isbn"), cost=req.field("cost"),
+    )
+    return {"message": message}
+
+
+def _update_book_status(req: Request, book_id: str) -> Dict[str, Any]:
+    status = str(req.field("status", required=True)).upper()
+    return {"message": crud.update_book_status(int(book_id), status)}
+
+
+def _delete_book(req: Request, book_id: str) -> Dict[str, Any]:
+    return {"message": crud.delete_book(int(book_id))}
+
+
+def _list_borrowers(req: Request) -> Dict[str, Any]:
+    return _page(crud.get_borrowers_page(
+        first_name=req.arg("first_name"),
+        last_name=req.arg("last_name"),
+        page_size=req.int_arg("page_size", 50, MAX_PAGE_SIZE),
+        cursor=req.arg("cursor"),
+    ))
+
+
+def _get_borrower(req: Request, person_id: str) -> Dict[str, Any]:
+    borrower = crud.get_borrower_by_id(int(person_id))
+    if borrower is None:
+        raise HTTPError(404, f"Borrower with ID {person_id} does not exist.")
+    return borrower
+
+
+def _borrower_loans(req: Request, person_id: str) -> Dict[str, Any]:
+    return _page(crud.get_loan_history_by_borrower_page(
+        int(person_id), page_size=req.int_arg("page_size", 50, MAX_PAGE_SIZE), cursor=req.arg("cursor"),
+    ))
+
+
+def _create_borrower(req: Request) -> Tuple[int, Dict[str, Any]]:
+    return 201, crud.create_borrower(
+        req.field("first_name"),
+        req.field("last_name"),
+        email=req.field("email"),
+        phone_number=req.field("phone_number"),
+        relationship_type=req.field("relationship_type"),
+        address=req.field("address"),
+    )
+
+
+def _update_borrower(req: Request, person_id: str) -> Dict[str, Any]:
+    message = crud.update_borrower_contact(
+        int(person_id),
+        first_name=req.field("first_name"),
+        last_name=req.field("last_name"),
+        email=req.field("email"),
+        address=req.field("address"),
+    )
+    return {"message": message}
+
+
+def _active_loans(req: Request) -> Dict[str, Any]:
+    return _page(crud.get_active_loans_page(page_size=req.int_arg("page_size", 50, MAX_PAGE_SIZE), cursor=req.arg("cursor")))
+
+
+def _overdue_loans(req: Request) -> Dict[str, Any]:
+    return _page(crud.get_overdue_loans_page(page_size=req.int_arg("page_size", 50, MAX_PAGE_SIZE), cursor=req.arg("cursor")))
+
+
+def _loan_options(req: Request) -> Dict[str, Any]:
+    options = {"loan_date": req.date_field("loan_date"), "due_date": req.date_field("due_date")}
+    if req.field("loan_period_days") is not None:
+        options["loan_period_days"] = req.int_field("loan_period_days")
+    return options
+
+
+def _create_loan(req: Request) -> Tuple[int, Dict[str, Any]]:
+    loan = crud.create_loan(req.int_field("book_id", required=True), req.int_field("person_id", required=True), **_loan_options(req))
+    return 201, loan
+
+
+def _create_loans(req: Request) -> Dict[str, Any]:
+    book_ids = req.int_list_field("book_ids", MAX_BATCH, required=True)
+    return {"results": crud.create_loans(req.int_field("person_id", required=True), book_ids, **_loan_options(req))}
+
+
+def _process_return(req: Request) -> Dict[str, Any]:
+    return_date = req.date_field("return_date")
+    if req.field("transaction_id") is not None:
+        return crud.process_return(req.int_field("transaction_id"), return_date)
+    if req.field("book_id") is not None:
+        return crud.process_return_by_book(book_id=req.int_field("book_id"), return_date=return_date)
+    raise HTTPError(400, "Provide either 'transaction_id' or 'book_id'.")
+
+
+def _process_returns(req: Request) -> Dict[str, Any]:
+    transaction_ids = req.int_list_field("transaction_ids", MAX_BATCH)
+    book_ids = req.int_list_field("book_ids", MAX_BATCH)
+    if transaction_ids is None and book_ids is None:
+        raise HTTPError(400, f"Provide 'transaction_ids' or 'book_ids' as a list of at most {MAX_BATCH} ids.")
+    results = crud.process_returns(transaction_ids=transaction_ids, book_ids=book_ids, return_date=req.date_field("return_date"))
+    return {"results": results}
+
+
+def _dashboard(req: Request) -> Dict[str, Any]:
+    return crud.get_dashboard_stats()
+
+
+def _most_borrowed(req: Request) -> List[Dict[str, Any]]:
+    return _records(crud.get_most_borrowed_books(limit=req.int_arg("limit", 10, MAX_PAGE_SIZE)))
+
+
+def _most_active(req: Request) -> List[Dict[str, Any]]:
+    return _records(crud.get_most_active_borrowers(limit=req.int_arg("limit", 10, MAX_PAGE_SIZE)))
+
+
+def _batch(req: Request) -> Dict[str, Any]:
+    """Run several sub-requests in one round trip; each is answered independently."""
+    requests = req.field("requests", required=True)
+    if not isinstance(requests, list) or len(requests) > MAX_BATCH:
+        raise HTTPError(400, f"Field 'requests' must be a list of at most {MAX_BATCH} requests.")
+    responses = []
+    for item in requests:
+        if not isinstance(item, dict) or not item.get("path"):
+            responses.append({"status": 400, "body": {"error": "Each request needs a 'path'."}})
+            continue
+        path, _, query = str(item["path"]).partition("?")
+        method = str(item.get("method") or "GET").upper()
+        if path == "/batch":
+            responses.append({"status": 400, "body": {"error": "Batches cannot be nested."}})
+            continue
+        sub = Request(method, path, _parse_query(query), item.get("body"), req.headers)
+        status, payload = dispatch(sub)
+        responses.append({"status": status, "body": payload})
+    return {"responses": responses}
+
+
+class Route(NamedTuple):
+    method: str
+    pattern: "re.Pattern"
+    handler: Callable
+    # served from / stored in the catalog cache
+    catalog: bool = False
+
+
+def _route(method: str, path: str, handler: Callable, catalog: bool = False) -> Route:
+    return Route(method, re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>\\d+)", path) + "$"), handler, catalog)
+
+
+ROUTES: Tuple[Route, ...] = (
+    _route("GET", "/health", _health),
+    _route("GET", "/books", _list_books, catalog=True),
+    _route("GET", "/books/search", _search_books, catalog=True),
+    _route("POST", "/books/batch", _create_books),
+    _route("GET", "/books/{book_id}", _get_book, catalog=True),
+    _route("GET", "/books/{book_id}/loans", _book_loans),
+    _route("POST", "/books", _create_book),
+    _route("PATCH", "/books/{book_id}", _update_book),
+    _route("PUT", "/books/{book_id}/status", _update_book_status),
+    _route("DELETE", "/books/{book_id}", _delete_book),
+    _route("GET", "/borrowers", _list_borrowers),
+    _route("GET", "/borrowers/{person_id}", _get_borrower),
+    _route("GET", "/borrowers/{person_id}/loans", _borrower_loans),
+    _route("POST", "/borrowers", _create_borrower),
+    _route("PATCH", "/borrowers/{person_id}", _update_borrower),
+    _route("GET", "/loans/active", _active_loans),
+    _route("GET", "/loans/overdue", _overdue_loans),
+    _route("POST", "/loans", _create_loan),
+    _route("POST", "/loans/batch", _create_loans),
+    _route("POST", "/returns", _process_return),
+    _route("POST", "/returns/batch", _process_returns),
+    _route("GET", "/reports/dashboard", _dashboard),
+    _route("GET", "/reports/most-borrowed", _most_borrowed),
+    _route("GET", "/reports/most-active", _most_active),
+    _route("POST", "/batch", _batch),
+)
+
+
+def _match(method: str, path: str) -> Tuple[Route, Dict[str, str]]:
+    allowed = []
+    for route in ROUTES:
+        m = route.pattern.match(path)
+        if m is None:
+            continue
+        if route.method == method:
+            return route, m.groupdict()
+        allowed.append(route.method)
+    if allowed:
+        raise HTTPError(405, f"Method {method} not allowed; use {', '.join(sorted(set(allowed)))}.")
+    raise HTTPError(404, f"No route for {path}.")
+
+
+def _error_status(message: str) -> int:
+    lowered = message.lower()
+    for fragment, status in _ERROR_STATUSES:
+        if fragment in lowered:
+            return status
+    return 400
+
+
+def dispatch(req: Request) -> Tuple[int, Any]:
+    """Route `req` and run its handler; returns `(status, JSON-able payload)`."""
+    try:
+        route, params = _match(req.method, req.path.rstrip("/") or "/")
+        result = route.handler(req, **params)
+    except HTTPError as e:
+        return e.status, {"error": str(e)}
+    except ValueError as e:
+        return _error_status(str(e)), {"error": str(e)}
+    except Exception as e:
+        print(f"[API] {req.method} {req.path} failed: {type(e).__name__}: {e}")
+        return 500, {"error": "Internal server error."}
+    if req.method != "GET":
+        # any write may change what the catalog reads return
+        _CATALOG_CACHE.clear()
+    if isinstance(result, tuple):
+        return result
+    return 200, result
+
+
+def _parse_query(query_string: str) -> Dict[str, str]:
+    return {k: v[-1] for k, v in parse_qs(query_string, keep_blank_values=True).items()}
+
+
+def _read_body(environ: Dict[str, Any]) -> Any:
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length <= 0:
+        return None
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Request body larger than {MAX_BODY_BYTES} bytes.")
+    raw = environ["wsgi.input"].read(length)
+    try:
+        return json.loads(raw)
+    except ValueError:
+        raise HTTPError(400, "Request body is not valid JSON.")
+
+
+def _respond(start_response, status: int, body: bytes, extra: Optional[List[Tuple[str, str]]] = None) -> List[bytes]:
+    headers = [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(body)))]
+    headers.extend(extra or [])
+    start_response(f"{status} {HTTPStatus(status).phrase}", headers)
+    return [body]
+
+
+def app(environ: Dict[str, Any], start_response) -> List[bytes]:
+    """The WSGI application (HEAD is answered like GET, without the body)."""
+    if environ.get("REQUEST_METHOD", "GET").upper() == "HEAD":
+        _app(dict(environ, REQUEST_METHOD="GET"), start_response)
+        return [b""]
+    return _app(environ, start_response)
+
+
+def _app(environ: Dict[str, Any], start_response) -> List[bytes]:
+    method = environ.get("REQUEST_METHOD", "GET").upper()
+    path = environ.get("PATH_INFO") or "/"
+    query_string = environ.get("QUERY_STRING", "")
+    if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+
+    cache_key = f"{path}?{query_string}"
+    if method == "GET":
+        cached = _CATALOG_CACHE.get(cache_key)
+        if cached is not None:
+            body, etag = cached
+            if if_none_match == etag:
+                return _respond(start_response, 304, b"", [("ETag", etag)])
+            return _respond(start_response, 200, body, [("ETag", etag), ("Cache-Control", "no-cache")])
+
+    try:
+        payload_in = _read_body(environ) if method in {"POST", "PUT", "PATCH"} else None
+    except HTTPError as e:
+        return _respond(start_response, e.status, _dump({"error": str(e)}))
+    headers = {k[5:].replace("_", "-").lower(): v for k, v in environ.items() if k.startswith("HTTP_")}
+    req = Request(method, path, _parse_query(query_string), payload_in, headers)
+    status, payload = dispatch(req)
+    body = _dump(payload)
+    if method != "GET" or status != 200:
+        return _respond(start_response, status, body)
+
+    etag = _etag(body)
+    route = next((r for r in ROUTES if r.method == "GET" and r.pattern.match(path.rstrip("/") or "/")), None)
+    if route is not None and route.catalog:
+        _CATALOG_CACHE.put(cache_key, body, etag)
+    if if_none_match == etag:
+        return _respond(start_response, 304, b"", [("ETag", etag)])
+    return _respond(start_response, 200, body, [("ETag", etag), ("Cache-Control", "no-cache")])
+
+
+# ----------------
+# SERVER
+# ----------------
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _fork_workers(server, workers: int) -> None:
+    """Pre-fork `workers` processes serving `server`'s socket; returns when they exit."""
+    children: List[int] = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, workers: int = 1, access_log: bool = False) -> None:
+    """Run the built-in threaded server (pre-forking `workers` processes on POSIX)."""
+    ensure_schema(get_engine())
+    # built once here, the workers inherit it with the fork
+    get_trigram_index()
+    # each worker builds its own pool after the fork
+    reset_engine()
+    handler = WSGIRequestHandler if access_log else _QuietHandler
+    server = make_server(host, port, app, server_class=ThreadingWSGIServer, handler_class=handler)
+    print(f"[API] Serving on http://{host}:{server.server_port} with {workers} worker(s)")
+    try:
+        if workers > 1 and hasattr(os, "fork"):
+            _fork_workers(server, workers)
+        else:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the CRUD API over HTTP/JSON.")
+    parser.add_argument("--host", default=os.environ.get("LIANES_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("LIANES_API_PORT") or 8000))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("LIANES_API_WORKERS") or 1))
+    parser.add_argument("--access-log", action="store_true", help="log every request to stderr")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, max(1, args.workers), args.access_log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
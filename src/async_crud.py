@@ -0,0 +1,169 @@
+"""Async variants of the CRUD_Blueprint API (SQLAlchemy asyncio).
+
+Every public function of `CRUD_Blueprint` has a coroutine of the same name
+and signature here:
+
+    from src import async_crud
+
+    books, stats = await asyncio.gather(
+        async_crud.get_books(title="dune"),
+        async_crud.get_dashboard_stats(),
+    )
+
+There is no second copy of the SQL: each coroutine runs the sync function
+itself in a SQLAlchemy greenlet, with `get_engine()` pointed at the
+`AsyncEngine` of `db_connection.get_async_engine()` (aiosqlite / asyncmy).
+Whenever that code waits on the database the greenlet yields to the event
+loop, so one process can keep many calls in flight on a single thread. The
+pool size (`DB_POOL_SIZE` / `DB_MAX_OVERFLOW`) bounds how many of them hold a
+connection at once; the rest wait for one without blocking the loop.
+
+Exceptions:
+- functions that call external APIs with blocking HTTP
+  (`update_missing_prices_from_web`, `reprocess_with_fuzzy`,
+  `get_exchange_rate`) run on a worker thread with the sync engine;
+- `search_books_fuzzy` does too: its first call builds the trigram index
+  under a thread lock, which concurrent greenlets on the loop thread would
+  deadlock on;
+- `google_books_lookup` is native async (`http_client.http_get_async`), and
+  `google_books_lookup_many` runs a batch of lookups concurrently.
+
+Needs `pip install "sqlalchemy[asyncio]" aiosqlite asyncmy`; `httpx` is
+optional (without it lookups run on threads).
+"""
+
+import asyncio
+import functools
+import os
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.util import greenlet_spawn
+
+from . import CRUD_Blueprint as _crud
+from .book_search import ensure_book_search_index
+from .CRUD_Blueprint import GOOGLE_BOOKS_API_URL, Page, _google_books_params, parse_google_item
+from .db_connection import dispose_async_engines, get_async_engine, release_engine, use_engine
+from .google_books_cache import ResponseCache, get_response_cache
+from .http_client import close_async_client, http_get_async
+
+
+# Lookups in flight at once in google_books_lookup_many
+GOOGLE_BOOKS_ASYNC_CONCURRENCY = int(os.environ.get("GOOGLE_BOOKS_ASYNC_CONCURRENCY", "100"))
+
+# Blocking HTTP (or a thread lock held across queries) inside: run on a
+# thread rather than on the event loop
+_THREADED = {"update_missing_prices_from_web", "reprocess_with_fuzzy", "get_exchange_rate", "search_books_fuzzy"}
+_NOT_MIRRORED = {"get_engine", "parse_google_item", "google_books_lookup", "main", "Page"}
+
+# Engines already prepared; keyed by engine, so engines built after a
+# `reset_engine()` are prepared again
+_READY: "weakref.WeakSet" = weakref.WeakSet()
+_READY_LOCK: Optional[asyncio.Lock] = None
+
+
+async def _prepare(engine) -> None:
+    """Run the one-time schema setup before any concurrent call.
+
+    `ensure_schema` and `ensure_book_search_index` hold a thread lock while
+    they query; two greenlets on the loop thread racing for it would
+    deadlock. Once done, both return from their memo without locking.
+    """
+    global _READY_LOCK
+
+    if engine in _READY:
+        return
+    if _READY_LOCK is None:
+        _READY_LOCK = asyncio.Lock()
+    async with _READY_LOCK:
+        if engine in _READY:
+            return
+        await greenlet_spawn(_crud._ensure_dashboard_counters, engine.sync_engine)
+        await greenlet_spawn(ensure_book_search_index, engine.sync_engine)
+        _READY.add(engine)
+
+
+async def run_sync(fn: Callable, *args, **kwargs) -> Any:
+    """Await the sync CRUD-style `fn(*args, **kwargs)` on the async engine."""
+    engine = get_async_engine()
+    await _prepare(engine)
+    token = use_engine(engine.sync_engine)
+    try:
+        return await greenlet_spawn(fn, *args, **kwargs)
+    finally:
+        release_engine(token)
+
+
+def _mirror(name: str) -> Callable:
+    fn = getattr(_crud, name)
+    if name in _THREADED:
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+    else:
+        async def call(*args, **kwargs):
+            return await run_sync(fn, *args, **kwargs)
+    functools.update_wrapper(call, fn)
+    call.__module__ = __name__
+    return call
+
+
+async def google_books_lookup(query: str, max_results: int = 5, api_key: Optional[str] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+    """Async `CRUD_Blueprint.google_books_lookup`: same parameters, cache and error handling."""
+    params = _google_books_params(query, max_results, api_key)
+    # the cache is a local SQLite file: sub-millisecond, fine on the loop
+    cache = get_response_cache() if use_cache else None
+    cache_key = ResponseCache.make_key(query, params) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        resp = await http_get_async(GOOGLE_BOOKS_API_URL, params=params, timeout=10)
+        items = resp.json().get("items", [])
+    except Exception as e:
+        print(f"[GoogleBooks] API error for query '{query}': {e}")
+        return []
+    if cache is not None:
+        cache.put(cache_key, query, items)
+    return items
+
+
+async def google_books_lookup_many(
+    queries: Sequence[str],
+    max_results: int = 5,
+    api_key: Optional[str] = None,
+    use_cache: bool = True,
+    concurrency: Optional[int] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Look up `queries` concurrently (at most `concurrency` in flight); results in input order."""
+    limit = asyncio.Semaphore(max(1, int(concurrency or GOOGLE_BOOKS_ASYNC_CONCURRENCY)))
+
+    async def one(query: str) -> List[Dict[str, Any]]:
+        async with limit:
+            return await google_books_lookup(query, max_results, api_key, use_cache)
+
+    return list(await asyncio.gather(*(one(q) for q in queries)))
+
+
+async def aclose() -> None:
+    """Dispose of the async engines and the loop's HTTP client (call on shutdown)."""
+    await dispose_async_engines()
+    await close_async_client()
+    _READY.clear()
+
+
+# Same selection as the instrumentation wrapper at the end of CRUD_Blueprint
+MIRRORED_FUNCTIONS = sorted(
+    name for name, obj in vars(_crud).items()
+    if callable(obj) and getattr(obj, "__module__", None) == _crud.__name__ and not name.startswith("_")
+    and name not in _NOT_MIRRORED
+)
+for _name in MIRRORED_FUNCTIONS:
+    globals()[_name] = _mirror(_name)
+del _name
+
+__all__ = [
+    "Page", "parse_google_item", "run_sync", "google_books_lookup", "google_books_lookup_many", "aclose",
+    *MIRRORED_FUNCTIONS,
+]
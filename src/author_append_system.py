@@ -1,18 +1,15 @@
+import os
+import sys
 
-import pandas as pd
+# Ensure project root is on sys.path so `from src import ...` works
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
 
-csv_path = "/Users/jeorgecassiodesousasilva/Documents/lianes library/lianes-library/data/books_clean_debug2.csv"
+from src.catalog_snapshot import load_catalog
 
-    
-# leitura tolerante: usa parser Python e pula linhas malformadas
-books_df = pd.read_csv(
-        csv_path,
-        engine='python',
-        on_bad_lines='skip',
-        encoding='utf-8',
-        sep=','
-    )
+# leitura via snapshot Parquet (reconstruído do CSV só quando ele muda)
+books_df = load_catalog()
 print('DataFrame shape:', books_df.shape)
 print('Preview:')
 print(books_df.head(5).to_string(index=False))
-
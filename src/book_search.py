@@ -0,0 +1,239 @@
+"""Full-text search backend for `CRUD_Blueprint.get_books`.
+
+Two engines are supported:
+  - MySQL: FULLTEXT indexes on `books.title` and `books.author`, queried with
+    `MATCH ... AGAINST` in boolean mode (every word required, prefix match) or
+    natural language mode (any word, relevance ordered).
+  - SQLite: an external-content FTS5 table `books_fts` kept in sync with
+    `books` by triggers, queried with `MATCH` and ranked with `bm25()`.
+
+The index is created by migration 005 (`src.migrations`), never by a
+search request. The backend is selected with `LIANES_BOOK_SEARCH` (`auto`,
+`fulltext` or `like`; default `auto`, which uses full-text whenever the
+index exists) and the MySQL mode with `LIANES_FULLTEXT_MODE` (`boolean` or
+`natural`; default `boolean`).
+
+Full-text matching is by word prefix ("hobb" finds "The Hobbit"), while
+LIKE matches any substring ("obbit" does too). `LIANES_SEARCH_SUBSTRING`
+decides how `get_books` / `get_books_page` reconcile the two:
+  - `fallback` (default): LIKE runs only when the full-text query finds
+    nothing. Fast, but narrower than a LIKE search: as soon as one book
+    matches by word, books matching only inside a word are not returned.
+  - `merge`: every search returns the full-text matches plus the LIKE
+    matches, i.e. the same books as the LIKE backend, ranked with the
+    full-text score. Every search pays for the LIKE table scan.
+
+A database found without the index is checked again once
+`LIANES_SEARCH_RETRY_SECONDS` (default 60) have passed, LIKE being used
+meanwhile.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+
+FULLTEXT_INDEXES = {"ft_books_title": "title", "ft_books_author": "author"}
+# InnoDB ignores tokens shorter than innodb_ft_min_token_size (default 3)
+MYSQL_MIN_TOKEN_LEN = 3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_READY_LOCK = threading.Lock()
+# database URLs known to have the index
+_READY: set = set()
+# database URL -> monotonic time of the last check that found no index
+_CHECKED_AT: Dict[str, float] = {}
+RETRY_SECONDS = float(os.environ.get("LIANES_SEARCH_RETRY_SECONDS") or 60)
+
+
+def search_backend() -> str:
+    backend = (os.environ.get("LIANES_BOOK_SEARCH") or "auto").strip().lower()
+    return backend if backend in {"auto", "fulltext", "like"} else "auto"
+
+
+def substring_mode() -> str:
+    mode = (os.environ.get("LIANES_SEARCH_SUBSTRING") or "fallback").strip().lower()
+    return "merge" if mode == "merge" else "fallback"
+
+
+def mysql_fulltext_mode() -> str:
+    mode = (os.environ.get("LIANES_FULLTEXT_MODE") or "boolean").strip().lower()
+    return "natural" if mode == "natural" else "boolean"
+
+
+def _tokens(value: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall((value or "").lower())
+
+
+def _mysql_index_names(conn) -> set:
+    rows = conn.execute(
+        text("""
+            SELECT DISTINCT index_name
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'books' AND index_type = 'FULLTEXT'
+        """)
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+def _has_index(conn) -> bool:
+    if conn.dialect.name == "mysql":
+        return set(FULLTEXT_INDEXES) <= _mysql_index_names(conn)
+    if conn.dialect.name == "sqlite":
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+        ).first() is not None
+    return False
+
+
+def create_book_search_index(conn) -> None:
+    """Create the full-text index on `conn`'s database if missing (migration 005).
+
+    On SQLite builds without FTS5 nothing is created and searches use LIKE.
+    """
+    if _has_index(conn):
+        return
+    if conn.dialect.name == "mysql":
+        existing = _mysql_index_names(conn)
+        for index_name, column in FULLTEXT_INDEXES.items():
+            if index_name not in existing:
+                conn.execute(text(f"ALTER TABLE books ADD FULLTEXT INDEX {index_name} ({column})"))
+        return
+    if conn.dialect.name != "sqlite":
+        return
+    if not conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        print("[Search] This SQLite build has no FTS5; book searches will use LIKE")
+        return
+    conn.execute(text("""
+        CREATE VIRTUAL TABLE books_fts USING fts5(
+            title, author, content='books', content_rowid='book_id'
+        )
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, title, author) VALUES (new.book_id, new.title, new.author);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.book_id, old.title, old.author);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER books_fts_au AFTER UPDATE OF title, author ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.book_id, old.title, old.author);
+            INSERT INTO books_fts (rowid, title, author) VALUES (new.book_id, new.title, new.author);
+        END
+    """))
+    conn.execute(text("INSERT INTO books_fts (books_fts) VALUES ('rebuild')"))
+
+
+def ensure_book_search_index(engine) -> bool:
+    """Return True when `engine`'s database has the full-text index.
+
+    The index itself is created by migration 005 (`python -m
+    src.migrations`); this only applies pending migrations through
+    `ensure_schema` and checks for it. A positive answer is remembered per
+    database URL; a negative one is re-checked after `RETRY_SECONDS`.
+    """
+    key = str(engine.url)
+    if key in _READY:
+        return True
+    checked_at = _CHECKED_AT.get(key)
+    if checked_at is not None and time.monotonic() - checked_at < RETRY_SECONDS:
+        return False
+    with _READY_LOCK:
+        if key in _READY:
+            return True
+        from .migrations import ensure_schema
+
+        try:
+            ensure_schema(engine)
+            with engine.connect() as conn:
+                found = _has_index(conn)
+        except Exception as e:
+            print(f"[Search] Could not check the full-text index, using LIKE: {e}")
+            found = False
+        if not found:
+            _CHECKED_AT[key] = time.monotonic()
+            return False
+        _CHECKED_AT.pop(key, None)
+        _READY.add(key)
+        return True
+
+
+def fulltext_clause(engine, title: Optional[str] = None, author: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Build the full-text pieces of a books query.
+
+    Returns None when LIKE should be used instead (backend disabled, index
+    unavailable, or search words too short for the index). Otherwise returns
+    a dict with:
+      - `from_sql`: replacement for `FROM books b`
+      - `where_sql`: predicate to AND into the WHERE clause
+      - `score_sql`: relevance expression (higher is better)
+      - `filter_sql` / `row_score_sql`: the same predicate and score written
+        against plain `FROM books b` (0 for non-matching rows), for
+        combining with other predicates such as LIKE
+      - `params`: bind parameters
+    """
+    if not (title or author):
+        return None
+    backend = search_backend()
+    if backend == "like":
+        return None
+    if not ensure_book_search_index(engine):
+        if backend == "fulltext":
+            raise RuntimeError("Full-text search requested but no full-text index is available.")
+        return None
+
+    title_tokens = _tokens(title)
+    author_tokens = _tokens(author)
+    if (title and not title_tokens) or (author and not author_tokens):
+        return None
+
+    if engine.dialect.name == "mysql":
+        if any(len(tok) < MYSQL_MIN_TOKEN_LEN for tok in title_tokens + author_tokens):
+            return None
+        natural = mysql_fulltext_mode() == "natural"
+        modifier = "IN NATURAL LANGUAGE MODE" if natural else "IN BOOLEAN MODE"
+        where_parts: List[str] = []
+        score_parts: List[str] = []
+        params: Dict[str, Any] = {}
+        for column, tokens in (("title", title_tokens), ("author", author_tokens)):
+            if not tokens:
+                continue
+            param = f"ft_{column}"
+            params[param] = " ".join(tokens) if natural else " ".join(f"+{tok}*" for tok in tokens)
+            match = f"MATCH(b.{column}) AGAINST (:{param} {modifier})"
+            where_parts.append(match)
+            score_parts.append(match)
+        return {
+            "from_sql": "FROM books b",
+            "where_sql": " AND ".join(where_parts),
+            "score_sql": " + ".join(score_parts),
+            "filter_sql": " AND ".join(where_parts),
+            "row_score_sql": " + ".join(score_parts),
+            "params": params,
+        }
+
+    # SQLite FTS5: quote every token and prefix-match it within its column
+    groups: List[str] = []
+    for column, tokens in (("title", title_tokens), ("author", author_tokens)):
+        if tokens:
+            terms = " ".join(f'"{tok}"*' for tok in tokens)
+            groups.append(f"{column} : ({terms})")
+    return {
+        "from_sql": "FROM books_fts JOIN books b ON b.book_id = books_fts.rowid",
+        "where_sql": "books_fts MATCH :fts_query",
+        "score_sql": "-bm25(books_fts)",
+        "filter_sql": "b.book_id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH :fts_query)",
+        "row_score_sql": (
+            "COALESCE((SELECT -bm25(books_fts) FROM books_fts"
+            " WHERE books_fts MATCH :fts_query AND books_fts.rowid = b.book_id), 0)"
+        ),
+        "params": {"fts_query": " AND ".join(groups)},
+    }
@@ -0,0 +1,277 @@
+"""Streaming bulk loader for the books catalog CSV.
+
+Reads the CSV in chunks with pandas' C parser (string dtypes, only the
+columns we keep), cleans each chunk (rows need a title and a valid ISBN,
+canonicalized to `isbn13`, see `src.isbn`) and writes it in one transaction:
+  - MySQL: `LOAD DATA LOCAL INFILE ... IGNORE` from a temporary file when the
+    server and client allow it, otherwise executemany (PyMySQL turns it into
+    multi-row INSERTs);
+  - other databases: executemany.
+Writes are upserts on `isbn13`, so loading the same catalog twice leaves the
+table as it was.
+
+Progress is recorded in the `bulk_load_progress` table inside the same
+transaction as each chunk, so an interrupted load resumes after the last
+committed chunk without duplicating rows. The key is the file's absolute path,
+size and mtime plus the chunk size; a changed file starts from the top.
+
+Usage:
+    python -m src.bulk_load data/books_clean_debug2.csv [--chunk-size 50000]
+        [--method auto|executemany|infile] [--restart] [--database-url URL]
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from .isbn import isbn13_from_columns, upsert_books_sql
+from .migrations import ensure_schema
+
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "books_clean_debug2.csv")
+DEFAULT_CHUNK_SIZE = 50000
+
+# CSV column -> books column; CSV columns not listed here are not even parsed
+COLUMN_MAPPING = {
+    "title": "title",
+    "authors": "author",
+    "isbn": "ISBN",
+    "isbn13": "isbn13",
+}
+OPTIONAL_COLUMNS = {"isbn13"}
+BOOK_COLUMNS = ("title", "author", "ISBN", "isbn13", "cost_book", "book_status")
+DEFAULT_COST = 0.0
+DEFAULT_STATUS = "AVAILABLE"
+
+
+def source_key(path: str, chunk_size: int) -> str:
+    """Identity of a load: same file contents (size + mtime) and chunking."""
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{int(chunk_size)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _load_progress(engine, key: str) -> Dict[str, int]:
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT chunks_done, rows_loaded FROM bulk_load_progress WHERE source_key = :key"), {"key": key}
+        ).first()
+    return {"chunks_done": int(row[0]), "rows_loaded": int(row[1])} if row else {"chunks_done": 0, "rows_loaded": 0}
+
+
+def _save_progress(conn, key: str, path: str, chunk_size: int, chunks_done: int, rows_loaded: int) -> None:
+    params = {
+        "key": key,
+        "path": os.path.abspath(path),
+        "chunk_size": int(chunk_size),
+        "chunks_done": int(chunks_done),
+        "rows_loaded": int(rows_loaded),
+    }
+    updated = conn.execute(
+        text("""
+            UPDATE bulk_load_progress
+            SET chunks_done = :chunks_done, rows_loaded = :rows_loaded, updated_at = CURRENT_TIMESTAMP
+            WHERE source_key = :key
+        """),
+        params,
+    )
+    if updated.rowcount == 0:
+        conn.execute(
+            text("""
+                INSERT INTO bulk_load_progress (source_key, source_path, chunk_size, chunks_done, rows_loaded)
+                VALUES (:key, :path, :chunk_size, :chunks_done, :rows_loaded)
+            """),
+            params,
+        )
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield raw chunks of the mapped columns, parsed by the C engine as strings."""
+    header = pd.read_csv(path, nrows=0, engine="c")
+    # Header names in the catalog export carry stray spaces ("  num_pages")
+    usecols = [col for col in header.columns if col.strip() in COLUMN_MAPPING]
+    missing = set(COLUMN_MAPPING) - OPTIONAL_COLUMNS - {col.strip() for col in usecols}
+    if missing:
+        raise ValueError(f"CSV {path} is missing column(s): {', '.join(sorted(missing))}")
+    return pd.read_csv(
+        path,
+        engine="c",
+        usecols=usecols,
+        dtype={col: "string" for col in usecols},
+        chunksize=int(chunk_size),
+        on_bad_lines="skip",
+    )
+
+
+def clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Rename to `books` columns, drop unusable rows and fill DB defaults."""
+    df = chunk.rename(columns=lambda col: COLUMN_MAPPING.get(col.strip(), col))
+    for col in ("title", "author", "ISBN"):
+        df[col] = df[col].str.strip()
+    # the isbn13 column wins over isbn when both are valid
+    df["isbn13"] = isbn13_from_columns(df, ("isbn13", "ISBN"))
+    # title is NOT NULL; without a valid ISBN a row could not be deduplicated
+    df = df[df["title"].fillna("").ne("") & df["isbn13"].notna()]
+    df = df.assign(cost_book=DEFAULT_COST, book_status=DEFAULT_STATUS)
+    return df[list(BOOK_COLUMNS)]
+
+
+def _count_books(engine) -> int:
+    with engine.connect() as conn:
+        return int(conn.execute(text("SELECT COUNT(*) FROM books")).scalar() or 0)
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _write_executemany(conn, df: pd.DataFrame) -> None:
+    conn.execute(text(upsert_books_sql(conn.engine)), _records(df))
+
+
+def _write_infile(conn, df: pd.DataFrame) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix="lianes_books_", suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as fh:
+            # \N is MySQL's NULL marker in LOAD DATA files
+            df.to_csv(fh, index=False, header=False, na_rep="\\N", quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+        conn.execute(
+            text(f"""
+                LOAD DATA LOCAL INFILE :path IGNORE INTO TABLE books
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+                LINES TERMINATED BY '\\n'
+                ({", ".join(BOOK_COLUMNS)})
+            """),
+            {"path": tmp_path},
+        )
+    finally:
+        os.remove(tmp_path)
+
+
+def _make_engine(database_url: Optional[str], method: str):
+    from .db_connection import get_engine, get_pool_options, resolve_database_url
+
+    url = database_url or resolve_database_url()
+    if method in {"auto", "infile"} and url.startswith("mysql"):
+        # LOAD DATA LOCAL has to be enabled on the client side as well
+        return create_engine(url, connect_args={"local_infile": True}, **get_pool_options(url))
+    if database_url:
+        return create_engine(url, **get_pool_options(url))
+    return get_engine()
+
+
+def load_books_csv(
+    path: str = DEFAULT_CSV,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    method: str = "auto",
+    restart: bool = False,
+    engine=None,
+    database_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Load `path` into `books` chunk by chunk; returns a summary dict.
+
+    `method` is `auto` (LOAD DATA on MySQL, falling back to executemany),
+    `executemany` or `infile` (MySQL only; errors are not retried).
+    `restart=True` discards recorded progress for this file and loads it
+    from the first chunk again.
+    """
+    if method not in {"auto", "executemany", "infile"}:
+        raise ValueError("method must be 'auto', 'executemany' or 'infile'")
+    if not os.path.exists(path):
+        raise ValueError(f"CSV file not found: {path}")
+    if engine is None:
+        engine = _make_engine(database_url, method)
+    if method == "infile" and engine.dialect.name != "mysql":
+        raise ValueError("LOAD DATA LOCAL INFILE is only available on MySQL")
+    use_infile = method != "executemany" and engine.dialect.name == "mysql"
+
+    ensure_schema(engine)
+    key = source_key(path, chunk_size)
+    if restart:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM bulk_load_progress WHERE source_key = :key"), {"key": key})
+    progress = _load_progress(engine, key)
+    chunks_done = progress["chunks_done"]
+    rows_loaded = progress["rows_loaded"]
+    if chunks_done:
+        print(f"[BulkLoad] Resuming {path} after chunk {chunks_done} ({rows_loaded:,} rows already loaded)")
+
+    started = time.perf_counter()
+    books_before = _count_books(engine)
+    rows_this_run = 0
+    for index, chunk in enumerate(read_chunks(path, chunk_size)):
+        if index < chunks_done:
+            continue
+        chunk_started = time.perf_counter()
+        df = clean_chunk(chunk)
+        with engine.begin() as conn:
+            if not df.empty:
+                if use_infile:
+                    try:
+                        with conn.begin_nested():
+                            _write_infile(conn, df)
+                    except Exception as e:
+                        if method == "infile":
+                            raise
+                        print(f"[BulkLoad] LOAD DATA LOCAL INFILE unavailable, using executemany: {e}")
+                        use_infile = False
+                        _write_executemany(conn, df)
+                else:
+                    _write_executemany(conn, df)
+            _save_progress(conn, key, path, chunk_size, index + 1, rows_loaded + len(df))
+        chunks_done = index + 1
+        rows_loaded += len(df)
+        rows_this_run += len(df)
+        elapsed = time.perf_counter() - chunk_started
+        rate = len(df) / elapsed if elapsed > 0 else float("inf")
+        print(f"[BulkLoad] chunk {chunks_done}: {len(df):,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s), {rows_loaded:,} total")
+
+    elapsed = time.perf_counter() - started
+    rows_inserted = _count_books(engine) - books_before
+    summary = {
+        "path": path,
+        "method": "infile" if use_infile else "executemany",
+        "chunks": chunks_done,
+        "rows_loaded": rows_loaded,
+        "rows_this_run": rows_this_run,
+        "rows_inserted": rows_inserted,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_this_run / elapsed, 1) if elapsed > 0 else None,
+    }
+    if rows_inserted:
+        # books were inserted behind the CRUD layer's back
+        from .CRUD_Blueprint import _ensure_dashboard_counters, _rebuild_dashboard_counters
+
+        _ensure_dashboard_counters(engine)
+        _rebuild_dashboard_counters(engine)
+    print(f"[BulkLoad] Done: {rows_this_run:,} rows ({rows_inserted:,} new) in {elapsed:.2f}s ({summary['rows_per_second'] or 0:,.0f} rows/s)")
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load the books catalog CSV into the `books` table.")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV, help="CSV file (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk / transaction")
+    parser.add_argument("--method", choices=["auto", "executemany", "infile"], default="auto")
+    parser.add_argument("--restart", action="store_true", help="ignore recorded progress and load from the start")
+    parser.add_argument("--database-url", default=None, help="overrides DATABASE_URL / DB_* settings")
+    args = parser.parse_args(argv)
+    try:
+        load_books_csv(args.csv, args.chunk_size, args.method, args.restart, database_url=args.database_url)
+    except ValueError as e:
+        print(f"[BulkLoad] {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
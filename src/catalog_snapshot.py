@@ -0,0 +1,227 @@
+"""Columnar Parquet snapshots of the catalog.
+
+`build_catalog_snapshot` converts the source books CSV into a typed Parquet
+file: low-cardinality text columns (authors, language, publisher) are
+dictionary-encoded, counts are nullable integers and `publication_date` is a
+real date. The source file's SHA-256 (plus size and mtime) is stored in the
+Parquet footer metadata.
+
+`load_catalog` memory-maps the snapshot and reads only the requested columns,
+pushing `filters` down to the row-group statistics. It rebuilds the snapshot
+from the CSV only when the CSV has changed: if size and mtime match the
+footer the hash is not even recomputed, so a cold load is a footer read plus
+the projected columns.
+
+`export_db_snapshot` does the same for tables exported from the database
+(books, transactions) and `load_table_snapshot` reads them back.
+
+    python -m src.catalog_snapshot [--csv PATH] [--db books transactions]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(_PROJECT_ROOT, "data", "books_clean_debug2.csv")
+SNAPSHOT_DIR = os.environ.get("LIANES_SNAPSHOT_DIR") or os.path.join(_PROJECT_ROOT, "data", "snapshots")
+ROW_GROUP_SIZE = 65536
+SNAPSHOT_TABLES = ("books", "transactions")
+
+# Column types of the catalog CSV (header names stripped)
+CATALOG_SCHEMA = pa.schema([
+    ("bookID", pa.int64()),
+    ("title", pa.string()),
+    ("authors", pa.dictionary(pa.int32(), pa.string())),
+    ("average_rating", pa.float64()),
+    ("isbn", pa.string()),
+    ("isbn13", pa.string()),
+    ("language_code", pa.dictionary(pa.int32(), pa.string())),
+    ("num_pages", pa.int64()),
+    ("ratings_count", pa.int64()),
+    ("text_reviews_count", pa.int64()),
+    ("publication_date", pa.date32()),
+    ("publisher", pa.dictionary(pa.int32(), pa.string())),
+])
+_META_PREFIX = b"lianes."
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_path(name: str, snapshot_dir: Optional[str] = None) -> str:
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"{name}.parquet")
+
+
+def snapshot_metadata(path: str) -> Dict[str, str]:
+    """`lianes.*` footer metadata of a snapshot ({} if missing or unreadable)."""
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return {}
+    return {
+        key[len(_META_PREFIX):].decode(): value.decode()
+        for key, value in metadata.items()
+        if key.startswith(_META_PREFIX)
+    }
+
+
+def _write(table: pa.Table, path: str, metadata: Dict[str, Any]) -> None:
+    existing = table.schema.metadata or {}
+    extra = {_META_PREFIX + key.encode(): str(value).encode() for key, value in metadata.items()}
+    table = table.replace_schema_metadata({**existing, **extra})
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, use_dictionary=True, compression="zstd")
+    # readers never see a half-written snapshot
+    os.replace(tmp_path, path)
+
+
+def _read_catalog_csv(csv_path: str) -> pa.Table:
+    df = pd.read_csv(csv_path, engine="c", dtype=str, on_bad_lines="skip", keep_default_na=False, na_values=[""])
+    df.columns = [col.strip() for col in df.columns]
+    columns: Dict[str, Any] = {}
+    for field in CATALOG_SCHEMA:
+        raw = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype=object)
+        if pa.types.is_integer(field.type):
+            columns[field.name] = pd.to_numeric(raw, errors="coerce").astype("Int64")
+        elif pa.types.is_floating(field.type):
+            columns[field.name] = pd.to_numeric(raw, errors="coerce")
+        elif pa.types.is_date(field.type):
+            columns[field.name] = pd.to_datetime(raw, format="%m/%d/%Y", errors="coerce").dt.date
+        else:
+            columns[field.name] = raw.str.strip()
+    return pa.Table.from_pandas(pd.DataFrame(columns), schema=CATALOG_SCHEMA, preserve_index=False)
+
+
+def build_catalog_snapshot(csv_path: str = DEFAULT_CSV, path: Optional[str] = None, source_hash: Optional[str] = None) -> str:
+    """Convert the catalog CSV into a Parquet snapshot; returns its path."""
+    path = path or snapshot_path("catalog")
+    st = os.stat(csv_path)
+    table = _read_catalog_csv(csv_path)
+    _write(table, path, {
+        "source": os.path.abspath(csv_path),
+        "source_sha256": source_hash or file_sha256(csv_path),
+        "source_size": st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+        "rows": table.num_rows,
+        "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+    })
+    print(f"[Snapshot] Built {path} from {csv_path} ({table.num_rows:,} rows)")
+    return path
+
+
+def ensure_catalog_snapshot(csv_path: str = DEFAULT_CSV, path: Optional[str] = None) -> str:
+    """Return an up-to-date snapshot path, rebuilding only if the CSV content changed."""
+    path = path or snapshot_path("catalog")
+    meta = snapshot_metadata(path)
+    if not meta:
+        return build_catalog_snapshot(csv_path, path)
+    st = os.stat(csv_path)
+    if meta.get("source_size") == str(st.st_size) and meta.get("source_mtime_ns") == str(st.st_mtime_ns):
+        return path
+    current = file_sha256(csv_path)
+    if meta.get("source_sha256") == current:
+        # touched but not changed: keep the data, refresh size/mtime so the
+        # next check is cheap again
+        table = pq.read_table(path, memory_map=True)
+        _write(table, path, {**meta, "source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns})
+        return path
+    return build_catalog_snapshot(csv_path, path, source_hash=current)
+
+
+def _read(path: str, columns: Optional[Sequence[str]], filters, as_arrow: bool):
+    table = pq.read_table(path, columns=list(columns) if columns else None, filters=filters, memory_map=True)
+    return table if as_arrow else table.to_pandas()
+
+
+def load_catalog(
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[List[Any]] = None,
+    csv_path: str = DEFAULT_CSV,
+    as_arrow: bool = False,
+):
+    """Load the catalog from its Parquet snapshot (built from `csv_path` on demand).
+
+    `columns` projects the read; `filters` uses pyarrow's DNF syntax, e.g.
+    `[("language_code", "=", "eng"), ("num_pages", "<", 300)]`. Returns a
+    DataFrame, or a `pyarrow.Table` with `as_arrow=True`.
+    """
+    return _read(ensure_catalog_snapshot(csv_path), columns, filters, as_arrow)
+
+
+def _table_content_hash(df: pd.DataFrame) -> str:
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def export_db_snapshot(tables: Sequence[str] = SNAPSHOT_TABLES, engine=None, snapshot_dir: Optional[str] = None) -> Dict[str, str]:
+    """Export DB tables to Parquet; returns `{table: path}`.
+
+    Files whose content hash is unchanged are left untouched.
+    """
+    unknown = set(tables) - set(SNAPSHOT_TABLES)
+    if unknown:
+        raise ValueError(f"Unsupported snapshot table(s): {', '.join(sorted(unknown))}")
+    if engine is None:
+        from .db_connection import get_engine
+
+        engine = get_engine()
+    paths: Dict[str, str] = {}
+    for table_name in tables:
+        with engine.connect() as conn:
+            df = pd.read_sql_query(text(f"SELECT * FROM {table_name}"), conn)
+        path = snapshot_path(table_name, snapshot_dir)
+        content_hash = _table_content_hash(df)
+        if snapshot_metadata(path).get("content_sha256") != content_hash:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            _write(table, path, {
+                "source": f"{engine.url.render_as_string(hide_password=True)}#{table_name}",
+                "content_sha256": content_hash,
+                "rows": table.num_rows,
+                "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+            })
+            print(f"[Snapshot] Exported {table_name} to {path} ({table.num_rows:,} rows)")
+        paths[table_name] = path
+    return paths
+
+
+def load_table_snapshot(table_name: str, columns: Optional[Sequence[str]] = None, filters: Optional[List[Any]] = None, snapshot_dir: Optional[str] = None, as_arrow: bool = False):
+    """Read a table exported by `export_db_snapshot` (memory-mapped, projected, filtered)."""
+    path = snapshot_path(table_name, snapshot_dir)
+    if not os.path.exists(path):
+        raise ValueError(f"No snapshot for table '{table_name}'; run export_db_snapshot first.")
+    return _read(path, columns, filters, as_arrow)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build Parquet snapshots of the catalog.")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="catalog CSV (default: %(default)s)")
+    parser.add_argument("--db", nargs="*", choices=SNAPSHOT_TABLES, help="also export these DB tables")
+    parser.add_argument("--force", action="store_true", help="rebuild the catalog snapshot even if the CSV is unchanged")
+    args = parser.parse_args(argv)
+    if args.force:
+        build_catalog_snapshot(args.csv)
+    else:
+        ensure_catalog_snapshot(args.csv)
+    if args.db is not None:
+        export_db_snapshot(args.db or SNAPSHOT_TABLES)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,12 @@ import os
 import sys
 import urllib.parse
 import getpass
-from sqlalchemy import create_engine
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 
 
 def _load_dotenv_manual(dotenv_path: str):
@@ -46,8 +51,105 @@ def _ensure_env_loaded():
         _load_dotenv_manual(dotenv_path)
 
 
-def get_engine():
-    """Return a SQLAlchemy Engine.
+_ENGINE_LOCK = threading.Lock()
+_ENGINES: Dict[str, Engine] = {}
+_ASYNC_ENGINES: Dict[str, Any] = {}
+# forgotten by reset_engine(), still to be closed by dispose_async_engines()
+_RETIRED_ASYNC_ENGINES: List[Any] = []
+_RESOLVED_URL: Optional[str] = None
+# Set by `async_crud` around each call so the sync CRUD code runs on the
+# async engine's pool (see `use_engine`)
+_ENGINE_OVERRIDE: ContextVar = ContextVar("lianes_engine_override", default=None)
+
+# Sync driver -> asyncio driver for `get_async_engine`
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+asyncmy",
+    "mysql+pymysql": "mysql+asyncmy",
+    "mysql+mysqldb": "mysql+asyncmy",
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def get_pool_options(url: str) -> Dict[str, Any]:
+    """Return the connection-pool keyword arguments for `create_engine`.
+
+    Tunable through the environment:
+      - `DB_POOL_SIZE` (default 5)
+      - `DB_MAX_OVERFLOW` (default 10)
+      - `DB_POOL_RECYCLE` seconds (default 1800; MySQL drops idle connections
+        after `wait_timeout`)
+      - `DB_POOL_PRE_PING` (default true)
+
+    SQLite only receives `pool_pre_ping`; its pool sizing is managed by the
+    dialect itself.
+    """
+    options: Dict[str, Any] = {"pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True)}
+    if url.startswith("sqlite"):
+        return options
+    options.update(
+        {
+            "pool_size": _env_int("DB_POOL_SIZE", 5),
+            "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+            "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        }
+    )
+    return options
+
+
+def get_sqlite_pragmas() -> Dict[str, Any]:
+    """Return the PRAGMAs applied to every new SQLite connection.
+
+    Tunable through the environment:
+      - `DB_SQLITE_JOURNAL_MODE` (default WAL: readers never block the writer)
+      - `DB_SQLITE_SYNCHRONOUS` (default NORMAL: durable with WAL, one fsync
+        per checkpoint instead of per commit)
+      - `DB_SQLITE_CACHE_SIZE` (default -65536, i.e. 64 MiB of page cache)
+      - `DB_SQLITE_MMAP_SIZE` bytes (default 268435456)
+      - `DB_SQLITE_BUSY_TIMEOUT` ms (default 5000)
+    """
+    return {
+        "journal_mode": os.environ.get("DB_SQLITE_JOURNAL_MODE") or "WAL",
+        "synchronous": os.environ.get("DB_SQLITE_SYNCHRONOUS") or "NORMAL",
+        "cache_size": _env_int("DB_SQLITE_CACHE_SIZE", -65536),
+        "mmap_size": _env_int("DB_SQLITE_MMAP_SIZE", 268435456),
+        "busy_timeout": _env_int("DB_SQLITE_BUSY_TIMEOUT", 5000),
+        "temp_store": "MEMORY",
+    }
+
+
+def _install_sqlite_pragmas(engine: Engine) -> None:
+    pragmas = get_sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def resolve_database_url() -> str:
+    """Resolve the database URL.
 
     Resolution order:
       1. `DATABASE_URL` environment variable (recommended for production)
@@ -60,7 +162,7 @@ def get_engine():
 
     database_url = os.environ.get("DATABASE_URL")
     if database_url:
-        return create_engine(database_url)
+        return database_url
 
     # Check explicit DB env vars
     user = os.environ.get("DB_USER")
@@ -72,8 +174,7 @@ def get_engine():
     if user and dbname and host:
         pwd = urllib.parse.quote_plus(password) if password else ""
         port_part = f":{port}" if port else ""
-        conn = f"mysql+pymysql://{user}:{pwd}@{host}{port_part}/{dbname}"
-        return create_engine(conn)
+        return f"mysql+pymysql://{user}:{pwd}@{host}{port_part}/{dbname}"
 
     # If running interactively, prompt for password to construct MySQL URL
     if sys.stdin.isatty():
@@ -84,15 +185,13 @@ def get_engine():
             user = os.environ.get("DB_USER") or os.environ.get("MYSQL_USER") or "root"
             port = os.environ.get("DB_PORT") or "3306"
             password_quoted = urllib.parse.quote_plus(raw_password)
-            connection_string = f"mysql+pymysql://{user}:{password_quoted}@{host}:{port}/{schema}"
-            return create_engine(connection_string)
+            return f"mysql+pymysql://{user}:{password_quoted}@{host}:{port}/{schema}"
 
     # Non-interactive fallback: sqlite file
     project_root = os.path.dirname(os.path.dirname(__file__))
     db_dir = os.path.join(project_root, "data")
     os.makedirs(db_dir, exist_ok=True)
     db_path = os.path.join(db_dir, "lianes.db")
-    sqlite_url = f"sqlite:///{db_path}"
     try:
         import warnings
 
@@ -102,4 +201,125 @@ def get_engine():
     except Exception:
         pass
 
-    return create_engine(sqlite_url)
+    return f"sqlite:///{db_path}"
+
+
+def get_engine() -> Engine:
+    """Return the process-wide SQLAlchemy Engine.
+
+    The URL is resolved once (see `resolve_database_url`) and the engine is
+    cached per URL, so every caller shares one connection pool instead of
+    building a new engine and TCP/TLS session per call. SQLite connections
+    get the `get_sqlite_pragmas()` tuning. Use `reset_engine()` to dispose of
+    cached engines (tests, credential rotation). Inside `use_engine(...)` the
+    engine given there is returned instead.
+    """
+    global _RESOLVED_URL
+
+    override = _ENGINE_OVERRIDE.get()
+    if override is not None:
+        return override
+    url = _RESOLVED_URL
+    engine = _ENGINES.get(url) if url else None
+    if engine is not None:
+        return engine
+
+    with _ENGINE_LOCK:
+        if _RESOLVED_URL is None:
+            _RESOLVED_URL = resolve_database_url()
+        url = _RESOLVED_URL
+        engine = _ENGINES.get(url)
+        if engine is None:
+            engine = create_engine(url, **get_pool_options(url))
+            if url.startswith("sqlite"):
+                _install_sqlite_pragmas(engine)
+            from .instrumentation import install as _install_instrumentation
+
+            _install_instrumentation(engine)
+            _ENGINES[url] = engine
+        return engine
+
+
+def reset_engine() -> None:
+    """Dispose every cached engine and forget the resolved URL.
+
+    The next `get_engine()` / `get_async_engine()` call re-reads the
+    environment and builds a fresh pool. Async engines are only forgotten
+    here, since closing their pools needs the event loop: the caller must
+    still `await dispose_async_engines()` to close them.
+    """
+    global _RESOLVED_URL
+
+    with _ENGINE_LOCK:
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+        _RETIRED_ASYNC_ENGINES.extend(_ASYNC_ENGINES.values())
+        _ASYNC_ENGINES.clear()
+        _RESOLVED_URL = None
+    for engine in engines:
+        engine.dispose()
+
+
+def use_engine(engine: Optional[Engine]):
+    """Make `get_engine()` return `engine` in the current context.
+
+    Returns the token for `release_engine`. Context variables are per thread
+    and per asyncio task, so concurrent callers never see each other's engine.
+    """
+    return _ENGINE_OVERRIDE.set(engine)
+
+
+def release_engine(token) -> None:
+    _ENGINE_OVERRIDE.reset(token)
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL to its asyncio driver (aiosqlite / asyncmy).
+
+    URLs that already name another driver are returned unchanged.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_engine():
+    """Return the process-wide `AsyncEngine` for the resolved database URL.
+
+    `ASYNC_DATABASE_URL` overrides the URL; otherwise the sync URL is mapped
+    with `to_async_url`. The pool options, SQLite PRAGMAs and instrumentation
+    hooks are the same as `get_engine()`. Needs `greenlet` plus `aiosqlite` or
+    `asyncmy` (`pip install "sqlalchemy[asyncio]" aiosqlite asyncmy`).
+    Dispose of it with `await dispose_async_engines()`.
+    """
+    global _RESOLVED_URL
+
+    with _ENGINE_LOCK:
+        if _RESOLVED_URL is None:
+            _RESOLVED_URL = resolve_database_url()
+        sync_url = _RESOLVED_URL
+        url = os.environ.get("ASYNC_DATABASE_URL") or to_async_url(sync_url)
+        engine = _ASYNC_ENGINES.get(url)
+        if engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            engine = create_async_engine(url, **get_pool_options(url))
+            if url.startswith("sqlite"):
+                _install_sqlite_pragmas(engine.sync_engine)
+            from .instrumentation import install as _install_instrumentation
+
+            _install_instrumentation(engine.sync_engine)
+            _ASYNC_ENGINES[url] = engine
+        return engine
+
+
+async def dispose_async_engines() -> None:
+    """Close the pools of every cached (or reset) async engine and forget them."""
+    with _ENGINE_LOCK:
+        engines = list(_ASYNC_ENGINES.values()) + _RETIRED_ASYNC_ENGINES
+        _ASYNC_ENGINES.clear()
+        _RETIRED_ASYNC_ENGINES.clear()
+    for engine in engines:
+        await engine.dispose()
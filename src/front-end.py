@@ -1,3 +1,4 @@
+import functools
 import os
 import sys
 import streamlit as st
@@ -16,7 +17,10 @@ from src.CRUD_Blueprint import (
     get_engine,
     # BOOKS
     create_book,
+    create_books,
     get_books,
+    get_books_page,
+    search_books_fuzzy,
     get_book_by_id,
     update_book_details,
     update_book_status,
@@ -26,6 +30,7 @@ from src.CRUD_Blueprint import (
     create_borrower,
     get_borrower_by_id,
     get_borrowers,
+    get_borrowers_page,
     update_borrower_contact,
     set_borrower_status,
     delete_borrower,
@@ -34,15 +39,115 @@ from src.CRUD_Blueprint import (
     process_return,
     process_return_by_book,
     get_active_loans,
+    get_active_loans_page,
     get_overdue_loans,
+    get_overdue_loans_page,
     get_loan_history_by_book,
+    get_loan_history_by_book_page,
     get_loan_history_by_borrower,
+    get_loan_history_by_borrower_page,
     # DASHBOARD / REPORTS
     get_dashboard_stats,
     get_most_borrowed_books,
     get_most_active_borrowers,
 )
 
+from src.google_books_cache import get_response_cache
+from src.migrations import ensure_schema
+from src.trigram_index import warm_trigram_index
+
+# =========================================
+# CACHE DE LEITURA (compartilhado entre sessões)
+# =========================================
+# Streamlit re-executes this script on every widget interaction. The read
+# functions below are wrapped with `st.cache_data` (shared by all sessions,
+# with a TTL as a safety net) and every write function clears exactly the
+# readers whose results it can change, so a rerun that changes nothing never
+# touches the database and a write is never followed by stale data.
+READ_CACHE_TTL = int(os.environ.get("LIANES_READ_CACHE_TTL", "300"))
+DASHBOARD_CACHE_TTL = int(os.environ.get("LIANES_DASHBOARD_CACHE_TTL", "60"))
+
+
+def _cached(fn, ttl=READ_CACHE_TTL):
+    return st.cache_data(ttl=ttl, show_spinner=False)(fn)
+
+
+get_dashboard_stats = _cached(get_dashboard_stats, ttl=DASHBOARD_CACHE_TTL)
+get_most_borrowed_books = _cached(get_most_borrowed_books)
+get_most_active_borrowers = _cached(get_most_active_borrowers)
+get_books = _cached(get_books)
+get_books_page = _cached(get_books_page)
+get_book_by_id = _cached(get_book_by_id)
+get_borrowers = _cached(get_borrowers)
+get_borrowers_page = _cached(get_borrowers_page)
+get_borrower_by_id = _cached(get_borrower_by_id)
+get_active_loans = _cached(get_active_loans, ttl=DASHBOARD_CACHE_TTL)
+get_active_loans_page = _cached(get_active_loans_page, ttl=DASHBOARD_CACHE_TTL)
+get_overdue_loans = _cached(get_overdue_loans, ttl=DASHBOARD_CACHE_TTL)
+get_overdue_loans_page = _cached(get_overdue_loans_page, ttl=DASHBOARD_CACHE_TTL)
+get_loan_history_by_book = _cached(get_loan_history_by_book)
+get_loan_history_by_book_page = _cached(get_loan_history_by_book_page)
+get_loan_history_by_borrower = _cached(get_loan_history_by_borrower)
+get_loan_history_by_borrower_page = _cached(get_loan_history_by_borrower_page)
+
+# Which cached readers depend on which tables
+_READERS_BY_TABLE = {
+    "books": [get_dashboard_stats, get_most_borrowed_books, get_books, get_books_page, get_book_by_id],
+    "borrowers": [get_dashboard_stats, get_most_active_borrowers, get_borrowers, get_borrowers_page, get_borrower_by_id],
+    "transactions": [
+        get_dashboard_stats,
+        get_most_borrowed_books,
+        get_most_active_borrowers,
+        get_active_loans,
+        get_active_loans_page,
+        get_overdue_loans,
+        get_overdue_loans_page,
+        get_loan_history_by_book,
+        get_loan_history_by_book_page,
+        get_loan_history_by_borrower,
+        get_loan_history_by_borrower_page,
+    ],
+}
+
+
+def _invalidates(fn, *tables):
+    """Wrap a write function so it clears the readers of `tables` afterwards.
+
+    The caches are cleared even when the write raises, since a failed call
+    may still have committed part of its work (e.g. bulk price updates).
+    """
+    readers = []
+    for table in tables:
+        for reader in _READERS_BY_TABLE[table]:
+            if reader not in readers:
+                readers.append(reader)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            for reader in readers:
+                reader.clear()
+
+    return wrapper
+
+
+# Book titles/authors are also shown in loan listings, and loans flip book status
+create_book = _invalidates(create_book, "books")
+create_books = _invalidates(create_books, "books")
+update_book_details = _invalidates(update_book_details, "books", "transactions")
+update_book_status = _invalidates(update_book_status, "books")
+update_missing_prices_from_web = _invalidates(update_missing_prices_from_web, "books")
+reprocess_with_fuzzy = _invalidates(reprocess_with_fuzzy, "books")
+create_borrower = _invalidates(create_borrower, "borrowers")
+update_borrower_contact = _invalidates(update_borrower_contact, "borrowers", "transactions")
+set_borrower_status = _invalidates(set_borrower_status, "borrowers")
+delete_borrower = _invalidates(delete_borrower, "borrowers", "transactions")
+create_loan = _invalidates(create_loan, "transactions", "books")
+process_return = _invalidates(process_return, "transactions", "books")
+process_return_by_book = _invalidates(process_return_by_book, "transactions", "books")
+
 # =========================================
 # CONFIG STREAMLIT
 # =========================================
@@ -52,6 +157,18 @@ st.set_page_config(
     layout="wide",
 )
 
+# Pending schema migrations (tables, indexes) run once per server process
+ensure_schema(get_engine())
+
+
+@st.cache_resource
+def _warm_search_index():
+    # typo-tolerant search index, built once per server process off the page thread
+    return warm_trigram_index()
+
+
+_warm_search_index()
+
 # -----------------------------------------
 # SESSION STATE
 # -----------------------------------------
@@ -62,6 +179,44 @@ if "books_filter_df" not in st.session_state:
     st.session_state.books_filter_df = None  # DataFrame com resultado de busca de livros
 
 
+# =========================================
+# GRADE PAGINADA
+# =========================================
+PAGE_SIZE = int(os.environ.get("LIANES_PAGE_SIZE", "50"))
+
+
+def render_paged(key: str, fetch_page, empty_message: str, page_size: int = PAGE_SIZE) -> pd.DataFrame:
+    """
+    Mostra uma grade paginada: só a página visível é buscada no banco.
+
+    `fetch_page(page_size=..., cursor=...)` deve devolver um `Page` do
+    CRUD_Blueprint. A pilha de cursores das páginas já visitadas fica em
+    session_state (por `key`), então "Previous" só desempilha.
+    """
+    state_key = f"pager_{key}"
+    cursors = st.session_state.setdefault(state_key, [None])
+    page = fetch_page(page_size=int(page_size), cursor=cursors[-1])
+    df = page.rows if isinstance(page.rows, pd.DataFrame) else pd.DataFrame(page.rows)
+
+    if df.empty and len(cursors) == 1:
+        st.info(empty_message)
+        return df
+
+    st.dataframe(df)
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("← Previous", key=f"{state_key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_info:
+        st.caption(f"Page {len(cursors)} · {len(df)} row(s)")
+    with col_next:
+        if st.button("Next →", key=f"{state_key}_next", disabled=page.next_cursor is None):
+            cursors.append(page.next_cursor)
+            st.rerun()
+    return df
+
+
 # =========================================
 # FUNÇÕES DE ESTATÍSTICA
 # =========================================
@@ -357,7 +512,7 @@ if section == "books":
 
     books_action = st.radio(
         "Choose an action:",
-        ["Search books", "Create book", "Update book", "Change status", "View book by ID", "Update prices from web"],
+        ["Search books", "Create book", "Bulk import", "Update book", "Change status", "View book by ID", "Update prices from web"],
         horizontal=True,
     )
 
@@ -371,22 +526,50 @@ if section == "books":
                 ["(any)", "available", "borrowed", "overdue", "removed"],
                 index=0,
             )
-            limit = st.number_input("Limit", min_value=1, max_value=500, value=50)
+            limit = st.number_input("Limit (results per page)", min_value=1, max_value=500, value=50)
+            ranked = st.checkbox("Rank by relevance", value=False)
+            typo_tolerant = st.checkbox("Typo tolerant (fuzzy title/author match)", value=False)
             submitted = st.form_submit_button("Search")
 
         if submitted:
-            status_param = None if status == "(any)" else status
+            # guarda a busca: os botões de página re-executam o script sem o form
+            st.session_state.books_search = {
+                "title": title or None,
+                "author": author or None,
+                "limit": int(limit),
+                "ranked": ranked,
+                "typo_tolerant": typo_tolerant,
+            }
+            st.session_state.pop("pager_books_search", None)
+
+        search = st.session_state.get("books_search")
+        if search:
             # Atenção: sua função get_books ainda usa 'genre' e 'status' antigos.
             # Use apenas title/author/limit por enquanto, ou ajuste a função.
-            df = get_books(title=title or None, author=author or None, limit=int(limit))
-            if df.empty:
-                st.warning("No books found.")
-                st.session_state.books_filter_df = None
+            fuzzy_query = " ".join(part for part in (search["title"], search["author"]) if part)
+            if search["typo_tolerant"] and fuzzy_query:
+                df = search_books_fuzzy(fuzzy_query, k=search["limit"])
+            elif search["ranked"]:
+                df = get_books(title=search["title"], author=search["author"], limit=search["limit"], ranked=True)
             else:
+                df = None
+
+            if df is None:
+                df = render_paged(
+                    "books_search",
+                    lambda page_size, cursor: get_books_page(
+                        title=search["title"], author=search["author"], page_size=page_size, cursor=cursor
+                    ),
+                    "No books found.",
+                    page_size=search["limit"],
+                )
+            elif not df.empty:
                 st.success(f"Found {len(df)} book(s).")
                 st.dataframe(df)
-                # salva para atualizar métricas do topo
-                st.session_state.books_filter_df = df
+            else:
+                st.warning("No books found.")
+            # salva para atualizar métricas do topo
+            st.session_state.books_filter_df = None if df.empty else df
 
     # --- Create book ---
     elif books_action == "Create book":
@@ -404,6 +587,26 @@ if section == "books":
             except Exception as e:
                 st.error(f"Error creating book: {e}")
 
+    # --- Bulk import (CSV) ---
+    elif books_action == "Bulk import":
+        st.caption("CSV with a `title` column and optionally `author`, `isbn` and `cost`. Books whose ISBN already exists are updated.")
+        uploaded = st.file_uploader("Books CSV", type=["csv"])
+        if uploaded is not None:
+            try:
+                upload_df = pd.read_csv(uploaded, dtype=str, keep_default_na=False, on_bad_lines="skip")
+            except Exception as e:
+                st.error(f"Could not read CSV: {e}")
+                upload_df = None
+            if upload_df is not None:
+                st.write(f"{len(upload_df)} row(s) found. Preview:")
+                st.dataframe(upload_df.head(20))
+                if st.button("Import books"):
+                    try:
+                        new_ids = create_books(upload_df)
+                        st.success(f"Imported {len(new_ids)} book(s).")
+                    except Exception as e:
+                        st.error(f"Error importing books: {e}")
+
     # --- Update book details ---
     elif books_action == "Update book":
         with st.form("update_book_form"):
@@ -469,6 +672,7 @@ if section == "books":
     elif books_action == "Update prices from web":
         api_key = st.text_input("Google Books API Key (optional)", type="password")
         limit = st.number_input("How many books to update now?", min_value=1, max_value=200, value=20)
+        workers = st.number_input("Concurrent Google Books lookups", min_value=1, max_value=32, value=8)
         auto_fuzzy = st.checkbox("Automatically reprocess unmatched with fuzzy matching", value=False)
         title_thresh = st.slider("Title similarity threshold", min_value=0.0, max_value=1.0, value=0.7)
         author_thresh = st.slider("Author similarity threshold", min_value=0.0, max_value=1.0, value=0.6)
@@ -488,7 +692,7 @@ if section == "books":
                         """), {"limit": int(limit)}).mappings().all()
                         pre_ids = [r.get("book_id") for r in pre_rows]
 
-                    results = update_missing_prices_from_web(limit=int(limit), api_key=api_key or None)
+                    results = update_missing_prices_from_web(limit=int(limit), api_key=api_key or None, max_workers=int(workers))
 
                 if results:
                     try:
@@ -523,6 +727,14 @@ if section == "books":
                     else:
                         st.info("Fuzzy reprocessing didn't update any records.")
 
+                cache = get_response_cache()
+                if cache is not None:
+                    cache_stats = cache.stats()
+                    st.caption(
+                        f"Google Books cache: {cache_stats['hits'] + cache_stats['negative_hits']} hit(s), "
+                        f"{cache_stats['misses']} miss(es), {cache_stats['entries']} entries."
+                    )
+
                 st.success("Price update process finished. Check logs / DB.")
             except Exception as e:
                 st.error(f"Error updating prices: {e}")
@@ -545,21 +757,31 @@ elif section == "borrowers":
         with st.form("search_borrowers_form"):
             first_name = st.text_input("First name (partial)")
             last_name = st.text_input("Last name (exact)")
-            limit = st.number_input("Limit", min_value=1, max_value=500, value=50)
+            limit = st.number_input("Results per page", min_value=1, max_value=500, value=50)
             submitted = st.form_submit_button("Search")
 
         if submitted:
+            st.session_state.borrowers_search = {
+                "first_name": first_name or None,
+                "last_name": last_name or None,
+                "limit": int(limit),
+            }
+            st.session_state.pop("pager_borrowers_search", None)
+
+        search = st.session_state.get("borrowers_search")
+        if search:
             try:
-                rows = get_borrowers(
-                    first_name=first_name or None,
-                    last_name=last_name or None,
-                    limit=int(limit),
+                render_paged(
+                    "borrowers_search",
+                    lambda page_size, cursor: get_borrowers_page(
+                        first_name=search["first_name"],
+                        last_name=search["last_name"],
+                        page_size=page_size,
+                        cursor=cursor,
+                    ),
+                    "No borrowers found.",
+                    page_size=search["limit"],
                 )
-                if not rows:
-                    st.warning("No borrowers found.")
-                else:
-                    st.success(f"Found {len(rows)} borrower(s).")
-                    st.dataframe(pd.DataFrame(rows))
             except Exception as e:
                 st.error(f"Error searching borrowers: {e}")
 
@@ -746,22 +968,14 @@ elif section == "transactions":
     # Active loans
     elif trans_action == "Active loans":
         try:
-            df = get_active_loans()
-            if df.empty:
-                st.info("No active loans.")
-            else:
-                st.dataframe(df)
+            render_paged("active_loans", get_active_loans_page, "No active loans.")
         except Exception as e:
             st.error(f"Error fetching active loans: {e}")
 
     # Overdue loans
     elif trans_action == "Overdue loans":
         try:
-            df = get_overdue_loans()
-            if df.empty:
-                st.info("No overdue loans.")
-            else:
-                st.dataframe(df)
+            render_paged("overdue_loans", get_overdue_loans_page, "No overdue loans.")
         except Exception as e:
             st.error(f"Error fetching overdue loans: {e}")
 
@@ -769,12 +983,15 @@ elif section == "transactions":
     elif trans_action == "Loan history by book":
         book_id = st.number_input("Book ID (history)", min_value=1, step=1)
         if st.button("Load history (book)"):
+            st.session_state.history_book_id = int(book_id)
+        if st.session_state.get("history_book_id"):
+            bid = st.session_state.history_book_id
             try:
-                df = get_loan_history_by_book(int(book_id))
-                if df.empty:
-                    st.info("No loan history for this book.")
-                else:
-                    st.dataframe(df)
+                render_paged(
+                    f"history_book_{bid}",
+                    lambda page_size, cursor: get_loan_history_by_book_page(bid, page_size=page_size, cursor=cursor),
+                    "No loan history for this book.",
+                )
             except Exception as e:
                 st.error(f"Error fetching loan history for book: {e}")
 
@@ -782,11 +999,14 @@ elif section == "transactions":
     elif trans_action == "Loan history by borrower":
         person_id = st.number_input("person_id (history)", min_value=1, step=1)
         if st.button("Load history (borrower)"):
+            st.session_state.history_person_id = int(person_id)
+        if st.session_state.get("history_person_id"):
+            pid = st.session_state.history_person_id
             try:
-                df = get_loan_history_by_borrower(int(person_id))
-                if df.empty:
-                    st.info("No loan history for this borrower.")
-                else:
-                    st.dataframe(df)
+                render_paged(
+                    f"history_borrower_{pid}",
+                    lambda page_size, cursor: get_loan_history_by_borrower_page(pid, page_size=page_size, cursor=cursor),
+                    "No loan history for this borrower.",
+                )
             except Exception as e:
                 st.error(f"Error fetching loan history for borrower: {e}")
@@ -0,0 +1,145 @@
+"""Daily exchange rates for the price pipelines.
+
+Rates are stored per day in the `exchange_rates` table and memoized in
+process, so a job run needs at most one HTTP request (`get_exchange_rates`
+fetches every missing currency in a single call) and a price converted on a
+given day can be reproduced later from the table.
+"""
+
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from .http_client import http_get
+from .migrations import ensure_schema
+
+
+FX_API_URL = "https://api.exchangerate.host/latest"
+# Used only when neither the table nor the API has a rate for the day
+FALLBACK_RATES_TO_EUR = {"BRL": 0.18}
+CURRENCY_ALIASES = {"R$": "BRL", "€": "EUR", "US$": "USD", "$": "USD"}
+CURRENCY_LABELS = {"EUR": "€"}
+# Currencies the price pipelines convert to EUR; other prices are stored as
+# reported, with their own currency code
+CONVERTED_CURRENCIES = frozenset({"BRL"})
+
+_MEMO: Dict[Tuple[date, str, str], float] = {}
+_MEMO_LOCK = threading.Lock()
+
+
+def normalize_currency(code: Optional[str]) -> Optional[str]:
+    if not code:
+        return None
+    code = str(code).strip()
+    return CURRENCY_ALIASES.get(code, code.upper())
+
+
+def _fetch_from_api(currencies: Iterable[str], to_currency: str) -> Dict[str, float]:
+    """One request for all `currencies`: quote `to_currency` in each and invert."""
+    symbols = sorted(set(currencies))
+    if not symbols:
+        return {}
+    try:
+        r = http_get(FX_API_URL, params={"base": to_currency, "symbols": ",".join(symbols)}, timeout=6)
+        rates = (r.json() or {}).get("rates", {}) or {}
+    except Exception as e:
+        print(f"[FX] Could not fetch FX rates {symbols}->{to_currency}: {e}")
+        return {}
+    result: Dict[str, float] = {}
+    for code in symbols:
+        quoted = rates.get(code)
+        if quoted:
+            result[code] = 1.0 / float(quoted)
+    return result
+
+
+def get_exchange_rates(currencies: Iterable[Optional[str]], to_currency: str = "EUR", on: Optional[date] = None, engine=None) -> Dict[str, float]:
+    """Return `{currency: rate}` converting each currency into `to_currency` on day `on`.
+
+    Lookup order per currency: in-process memo, `exchange_rates` table, one
+    bulk API request for whatever is still missing (stored back into the
+    table), then `FALLBACK_RATES_TO_EUR`. Currencies without any rate are
+    left out of the result.
+    """
+    to_currency = normalize_currency(to_currency) or "EUR"
+    on = on or datetime.utcnow().date()
+    wanted = {normalize_currency(c) for c in currencies}
+    wanted.discard(None)
+
+    rates: Dict[str, float] = {}
+    if to_currency in wanted:
+        rates[to_currency] = 1.0
+        wanted.discard(to_currency)
+    with _MEMO_LOCK:
+        for code in list(wanted):
+            memo = _MEMO.get((on, code, to_currency))
+            if memo is not None:
+                rates[code] = memo
+                wanted.discard(code)
+    if not wanted:
+        return rates
+
+    if engine is None:
+        from .db_connection import get_engine
+
+        engine = get_engine()
+    stored: Dict[str, float] = {}
+    try:
+        ensure_schema(engine)
+        query = text("""
+            SELECT base_currency, rate FROM exchange_rates
+            WHERE rate_date = :rate_date AND quote_currency = :quote AND base_currency IN :bases
+        """).bindparams(bindparam("bases", expanding=True))
+        with engine.connect() as conn:
+            for base, rate in conn.execute(query, {"rate_date": on, "quote": to_currency, "bases": sorted(wanted)}):
+                stored[base] = float(rate)
+    except Exception as e:
+        print(f"[FX] Could not read stored FX rates: {e}")
+        engine = None
+
+    fetched = _fetch_from_api(wanted - set(stored), to_currency)
+    if fetched and engine is not None:
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("""
+                        INSERT INTO exchange_rates (rate_date, base_currency, quote_currency, rate, source)
+                        VALUES (:rate_date, :base, :quote, :rate, :source)
+                    """),
+                    [{"rate_date": on, "base": code, "quote": to_currency, "rate": rate, "source": "exchangerate.host"} for code, rate in fetched.items()],
+                )
+        except Exception as e:
+            print(f"[FX] Could not store FX rates: {e}")
+
+    found = {**stored, **fetched}
+    with _MEMO_LOCK:
+        for code, rate in found.items():
+            _MEMO[(on, code, to_currency)] = rate
+    rates.update(found)
+    if to_currency == "EUR":
+        for code in wanted - set(found):
+            if code in FALLBACK_RATES_TO_EUR:
+                rates[code] = FALLBACK_RATES_TO_EUR[code]
+                print(f"[FX] Using fallback {code}->EUR rate {rates[code]}")
+    return rates
+
+
+def convert_prices(prices, currencies, rates: Dict[str, float], to_currency: str = "EUR") -> pd.DataFrame:
+    """Vectorized conversion of parallel `prices` / `currencies` sequences.
+
+    Returns a DataFrame with `price` (rounded to cents) and `currency` (the
+    label stored in `price_history`, e.g. "€"). Rows whose currency has no
+    rate keep their original price and currency code ("UNK" when missing).
+    """
+    to_currency = normalize_currency(to_currency) or "EUR"
+    df = pd.DataFrame({"price": pd.to_numeric(pd.Series(list(prices)), errors="coerce"), "currency": list(currencies)})
+    codes = df["currency"].map(normalize_currency)
+    factor = codes.map(rates)
+    converted = factor.notna()
+    df["price"] = df["price"].where(~converted, (df["price"] * factor).round(2))
+    df["currency"] = df["currency"].where(~converted, CURRENCY_LABELS.get(to_currency, to_currency))
+    df["currency"] = df["currency"].fillna("UNK")
+    return df
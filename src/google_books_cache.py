@@ -0,0 +1,180 @@
+"""Persistent on-disk cache for Google Books API responses.
+
+`google_books_lookup` keys each request by its normalized query and request
+parameters (the API key is excluded) and stores the raw `items` JSON in a
+small SQLite file, so re-running a price refresh or a fuzzy reprocess only
+hits the network for expired entries.
+
+Entries expire according to what they contain:
+  - responses with at least one list price: `GOOGLE_BOOKS_CACHE_PRICE_TTL`
+    seconds (default 1 day), since prices change often;
+  - metadata-only responses: `GOOGLE_BOOKS_CACHE_METADATA_TTL` (default 30 days);
+  - empty responses (negative caching): `GOOGLE_BOOKS_CACHE_NEGATIVE_TTL`
+    (default 1 day).
+
+The file is bounded to `GOOGLE_BOOKS_CACHE_MAX_ENTRIES` rows (default 50000)
+with least-recently-used eviction. `GOOGLE_BOOKS_CACHE_PATH` overrides the
+location (default `data/google_books_cache.sqlite`); set it to `off` to
+disable the cache.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "google_books_cache.sqlite")
+DAY = 24 * 3600
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return float(default)
+
+
+def _has_price(items: List[Dict[str, Any]]) -> bool:
+    for item in items:
+        sale = item.get("saleInfo") or {}
+        if (sale.get("listPrice") or {}).get("amount") is not None:
+            return True
+    return False
+
+
+class ResponseCache:
+    """SQLite-backed, size-bounded LRU cache of Google Books `items` lists."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        max_entries: int = 50000,
+        metadata_ttl: float = 30 * DAY,
+        price_ttl: float = DAY,
+        negative_ttl: float = DAY,
+    ):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.ttls = {"price": float(price_ttl), "metadata": float(metadata_ttl), "empty": float(negative_ttl)}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(query: str, params: Dict[str, Any]) -> str:
+        """Stable key from the normalized query and the non-secret request params."""
+        normalized = " ".join((query or "").lower().split())
+        relevant = {k: v for k, v in params.items() if k not in {"key", "q"}}
+        raw = json.dumps([normalized, relevant], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached items for `key`, or None on miss / expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, payload, fetched_at FROM responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            kind, payload, fetched_at = row
+            if now - fetched_at > self.ttls.get(kind, 0.0):
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE cache_key = ?", (now, key))
+            self._stats["negative_hits" if kind == "empty" else "hits"] += 1
+        return json.loads(payload)
+
+    def put(self, key: str, query: str, items: List[Dict[str, Any]]) -> None:
+        if not items:
+            kind = "empty"
+        elif _has_price(items):
+            kind = "price"
+        else:
+            kind = "metadata"
+        now = time.time()
+        payload = json.dumps(items, separators=(",", ":"))
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE responses SET query = ?, kind = ?, payload = ?, fetched_at = ?, accessed_at = ? WHERE cache_key = ?",
+                (query, kind, payload, now, now, key),
+            )
+            if cur.rowcount == 0:
+                self._conn.execute(
+                    "INSERT INTO responses (cache_key, query, kind, payload, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, query, kind, payload, now, now),
+                )
+                self._count += 1
+            self._stats["writes"] += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Drop the least recently used tenth in one statement rather than one row per insert
+        target = max(0, int(self.max_entries * 0.9))
+        excess = self._count - target
+        self._conn.execute(
+            "DELETE FROM responses WHERE cache_key IN (SELECT cache_key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+            (excess,),
+        )
+        self._stats["evictions"] += excess
+        self._count = target
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._count
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["negative_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._count = 0
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache configured from the environment (None when disabled)."""
+    global _CACHE
+
+    path = os.environ.get("GOOGLE_BOOKS_CACHE_PATH") or DEFAULT_PATH
+    if path.strip().lower() in {"off", "none", "0", "false"}:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResponseCache(
+                    path=path,
+                    max_entries=int(_env_float("GOOGLE_BOOKS_CACHE_MAX_ENTRIES", 50000)),
+                    metadata_ttl=_env_float("GOOGLE_BOOKS_CACHE_METADATA_TTL", 30 * DAY),
+                    price_ttl=_env_float("GOOGLE_BOOKS_CACHE_PRICE_TTL", DAY),
+                    negative_ttl=_env_float("GOOGLE_BOOKS_CACHE_NEGATIVE_TTL", DAY),
+                )
+    return _CACHE
@@ -0,0 +1,299 @@
+"""Shared HTTP client for the external lookups (Google Books, FX rates).
+
+All calls go through one process-wide `requests.Session`, so connections are
+kept alive and reused instead of paying DNS + TCP + TLS for every request.
+`http_get` adds on top of it:
+  - retries on connection errors, timeouts, 429 and 5xx, with exponential
+    backoff and full jitter, honoring `Retry-After` when the server sends it
+    (a `Retry-After` longer than `LIANES_HTTP_MAX_BACKOFF` ends the call as
+    a failure instead of retrying early);
+  - a per-host circuit breaker: after `LIANES_HTTP_BREAKER_THRESHOLD`
+    consecutive failed calls (default 5) the host is skipped for
+    `LIANES_HTTP_BREAKER_RESET` seconds (default 30), then one trial call is
+    let through.
+
+Other knobs: `LIANES_HTTP_POOL_SIZE` (connections kept per host, default 16),
+`LIANES_HTTP_RETRIES` (default 3), `LIANES_HTTP_BACKOFF` (base delay in
+seconds, default 0.5) and `LIANES_HTTP_MAX_BACKOFF` (default 30).
+
+`http_get_async` is the asyncio counterpart with the same retry and breaker
+policy (breakers are shared with `http_get`). It uses one `httpx.AsyncClient`
+per event loop (`LIANES_HTTP_ASYNC_POOL_SIZE` connections, default 100) when
+httpx is installed, and otherwise runs `http_get` in a worker thread.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # optional: http_get_async falls back to threads
+    httpx = None
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return float(default)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised by `http_get` while the breaker for a host is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a half-open trial after `reset_timeout`."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """End a half-open trial that gave no verdict on the host.
+
+        For a request that died of something else (an invalid URL, a
+        redirect loop, cancellation): the next request may probe again.
+        """
+        with self._lock:
+            self._trial_running = False
+
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+# httpx clients are bound to the loop they were created on
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session (thread-safe to share for plain GETs)."""
+    global _SESSION
+
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                pool_size = int(_env_float("LIANES_HTTP_POOL_SIZE", 16))
+                # Retries are handled by http_get so they can feed the breaker
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0, pool_block=True)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _SESSION = session
+    return _SESSION
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _SESSION_LOCK:
+        breaker = _BREAKERS.get(host)
+        if breaker is None:
+            breaker = _BREAKERS[host] = CircuitBreaker(
+                failure_threshold=int(_env_float("LIANES_HTTP_BREAKER_THRESHOLD", 5)),
+                reset_timeout=_env_float("LIANES_HTTP_BREAKER_RESET", 30.0),
+            )
+        return breaker
+
+
+def reset_http_client() -> None:
+    """Close the shared session and forget all breaker state."""
+    global _SESSION
+
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+        _SESSION = None
+        _BREAKERS.clear()
+
+
+def get_async_client():
+    """The running loop's pooled `httpx.AsyncClient` (None without httpx)."""
+    if httpx is None:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        size = int(_env_float("LIANES_HTTP_ASYNC_POOL_SIZE", 100))
+        client = _ASYNC_CLIENTS[loop] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+        )
+    return client
+
+
+async def close_async_client() -> None:
+    """Close the running loop's `httpx.AsyncClient`, if one was created."""
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, base: float, cap: float) -> float:
+    # "full jitter": uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+def http_get(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: float = 10,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+) -> requests.Response:
+    """GET `url` through the shared session with retries and the host's breaker.
+
+    Returns the successful response. Raises `CircuitOpenError` when the host's
+    breaker is open, or the last `requests` exception (`HTTPError` for a bad
+    status) once retries are exhausted or `Retry-After` exceeds
+    `LIANES_HTTP_MAX_BACKOFF`.
+    """
+    retries = int(_env_float("LIANES_HTTP_RETRIES", 3) if retries is None else retries)
+    backoff = _env_float("LIANES_HTTP_BACKOFF", 0.5) if backoff is None else float(backoff)
+    max_backoff = _env_float("LIANES_HTTP_MAX_BACKOFF", 30.0)
+    host = urlsplit(url).netloc
+    breaker = get_breaker(host)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {host}; skipping request")
+
+    try:
+        session = get_session()
+        attempt = 0
+        while True:
+            delay: Optional[float] = None
+            try:
+                resp = session.get(url, params=params, timeout=timeout)
+                if resp.status_code not in RETRY_STATUSES:
+                    # 4xx other than 429 is the caller's problem, not the host's
+                    breaker.record_success()
+                    resp.raise_for_status()
+                    return resp
+                error: Exception = requests.HTTPError(f"{resp.status_code} Server Error for url: {resp.url}", response=resp)
+                delay = _retry_after(resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            # also give up when the server asks for a longer pause than max_backoff
+            if attempt >= retries or (delay is not None and delay > max_backoff):
+                breaker.record_failure()
+                raise error
+            if delay is None:
+                delay = _backoff(attempt, backoff, max_backoff)
+            time.sleep(delay)
+            attempt += 1
+    except BaseException:
+        # a half-open trial must not stay claimed forever
+        breaker.release_trial()
+        raise
+
+
+async def http_get_async(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: float = 10,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+):
+    """Async `http_get`: same retries, backoff and per-host breaker.
+
+    Returns the successful `httpx.Response` (or a `requests.Response` when
+    httpx is not installed). Raises `CircuitOpenError` when the host's breaker
+    is open, or the last error once retries are exhausted.
+    """
+    client = get_async_client()
+    if client is None:
+        return await asyncio.to_thread(http_get, url, params, timeout, retries, backoff)
+    retries = int(_env_float("LIANES_HTTP_RETRIES", 3) if retries is None else retries)
+    backoff = _env_float("LIANES_HTTP_BACKOFF", 0.5) if backoff is None else float(backoff)
+    max_backoff = _env_float("LIANES_HTTP_MAX_BACKOFF", 30.0)
+    host = urlsplit(url).netloc
+    breaker = get_breaker(host)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {host}; skipping request")
+
+    try:
+        attempt = 0
+        while True:
+            delay: Optional[float] = None
+            try:
+                resp = await client.get(url, params=params, timeout=timeout)
+                if resp.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    resp.raise_for_status()
+                    return resp
+                error: Exception = httpx.HTTPStatusError(
+                    f"{resp.status_code} Server Error for url: {resp.url}", request=resp.request, response=resp
+                )
+                delay = _retry_after(resp)
+            except httpx.TransportError as e:
+                error = e
+            # also give up when the server asks for a longer pause than max_backoff
+            if attempt >= retries or (delay is not None and delay > max_backoff):
+                breaker.record_failure()
+                raise error
+            if delay is None:
+                delay = _backoff(attempt, backoff, max_backoff)
+            await asyncio.sleep(delay)
+            attempt += 1
+    except BaseException:
+        # a half-open trial must not stay claimed forever
+        breaker.release_trial()
+        raise
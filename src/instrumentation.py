@@ -0,0 +1,284 @@
+"""SQL instrumentation: per-operation latency, round trips and a slow-query log.
+
+Off by default; enable it with `LIANES_SQL_INSTRUMENTATION=1`. When enabled:
+
+- `install(engine)` hooks `before/after_cursor_execute` on the engine
+  (`db_connection.get_engine` does this for the shared engine);
+- every public function of `CRUD_Blueprint` is wrapped with `instrumented`,
+  which tags the statements it runs with its name through a context
+  variable. Nested CRUD calls count towards the outermost (logical)
+  operation; statements run outside any operation are tagged `-`;
+- per operation we keep calls, errors, round trips, rows and two latency
+  histograms (whole call, single statement);
+- statements slower than `LIANES_SLOW_QUERY_MS` (default 100) are appended
+  as JSON lines to `LIANES_SLOW_QUERY_LOG` (default
+  `reports/slow_queries.jsonl`); parameter values are not logged, only
+  their count;
+- `write_report()` dumps `stats()` to `reports/sql_stats.json`; it also runs
+  at interpreter exit.
+
+When disabled, `instrumented` returns the function unchanged and no engine
+events are registered, so there is no cost at all.
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORTS_DIR = os.path.join(_PROJECT_ROOT, "reports")
+
+ENABLED = (os.environ.get("LIANES_SQL_INSTRUMENTATION") or "").strip().lower() in {"1", "true", "yes", "on"}
+SLOW_QUERY_MS = float(os.environ.get("LIANES_SLOW_QUERY_MS") or 100)
+SLOW_QUERY_LOG = os.environ.get("LIANES_SLOW_QUERY_LOG") or os.path.join(REPORTS_DIR, "slow_queries.jsonl")
+STATS_REPORT = os.path.join(REPORTS_DIR, "sql_stats.json")
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+UNTAGGED = "-"
+
+_WS_RE = re.compile(r"\s+")
+_LOCK = threading.Lock()
+_INSTALLED: set = set()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        """Approximate `q`-th percentile (0-100), interpolated within the bucket."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKETS_MS[i - 1] if i else 0.0
+                high = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+                return min(low + (high - low) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max, 3),
+            "buckets_ms": dict(zip([str(b) for b in BUCKETS_MS] + ["inf"], self.counts)),
+        }
+
+
+class _OperationStats:
+    __slots__ = ("calls", "errors", "round_trips", "rows", "latency", "statement_latency")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.latency = Histogram()
+        self.statement_latency = Histogram()
+
+
+class _Operation:
+    """The logical operation a statement belongs to (one per outermost CRUD call)."""
+
+    __slots__ = ("name", "round_trips", "rows", "statement_ms")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.round_trips = 0
+        self.rows = 0
+        # merged into the shared stats once, when the operation ends
+        self.statement_ms: List[float] = []
+
+
+_CURRENT: contextvars.ContextVar = contextvars.ContextVar("lianes_sql_operation", default=None)
+_STATS: Dict[str, _OperationStats] = {}
+
+
+def _stats_for(name: str) -> _OperationStats:
+    stats = _STATS.get(name)
+    if stats is None:
+        stats = _STATS.setdefault(name, _OperationStats())
+    return stats
+
+
+def current_operation() -> str:
+    op = _CURRENT.get()
+    return op.name if op is not None else UNTAGGED
+
+
+def instrumented(fn=None, *, name: Optional[str] = None):
+    """Decorator tagging the SQL run by `fn` with its name (no-op when disabled)."""
+    if fn is None:
+        return functools.partial(instrumented, name=name)
+    if not ENABLED:
+        return fn
+    op_name = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _CURRENT.get() is not None:
+            return fn(*args, **kwargs)
+        op = _Operation(op_name)
+        token = _CURRENT.set(op)
+        failed = False
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            _CURRENT.reset(token)
+            with _LOCK:
+                stats = _stats_for(op_name)
+                stats.calls += 1
+                stats.errors += failed
+                stats.round_trips += op.round_trips
+                stats.rows += op.rows
+                stats.latency.add(elapsed_ms)
+                for ms in op.statement_ms:
+                    stats.statement_latency.add(ms)
+
+    return wrapper
+
+
+def instrument_functions(namespace: Dict[str, Any], names: List[str]) -> None:
+    """Replace `namespace[name]` with its `instrumented` version for each name."""
+    if not ENABLED:
+        return
+    for attr in names:
+        namespace[attr] = instrumented(namespace[attr])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._lianes_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._lianes_started) * 1000.0
+    rows = cursor.rowcount
+    if rows < 0:
+        rows = 0
+    op = _CURRENT.get()
+    if op is not None:
+        # owned by the current thread/task: no lock needed
+        op.round_trips += 1
+        op.rows += rows
+        op.statement_ms.append(elapsed_ms)
+        name = op.name
+    else:
+        name = UNTAGGED
+        with _LOCK:
+            stats = _stats_for(name)
+            stats.round_trips += 1
+            stats.rows += rows
+            stats.statement_latency.add(elapsed_ms)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        _log_slow_query(name, statement, parameters, executemany, elapsed_ms, rows, conn)
+
+
+def _log_slow_query(name, statement, parameters, executemany, elapsed_ms, rows, conn) -> None:
+    if executemany:
+        param_count = len(parameters)
+    else:
+        param_count = len(parameters) if isinstance(parameters, (list, tuple, dict)) else 0
+    entry = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "operation": name,
+        "elapsed_ms": round(elapsed_ms, 3),
+        "rows": rows,
+        "executemany": bool(executemany),
+        "param_count": param_count,
+        "dialect": conn.dialect.name,
+        "statement": _WS_RE.sub(" ", statement).strip()[:2000],
+    }
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(SLOW_QUERY_LOG)), exist_ok=True)
+        with _LOCK, open(SLOW_QUERY_LOG, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"[SQLStats] Could not write slow-query log: {e}")
+
+
+def install(engine) -> bool:
+    """Attach the statement listeners to `engine` (once); returns False when disabled."""
+    if not ENABLED:
+        return False
+    with _LOCK:
+        if id(engine) in _INSTALLED:
+            return True
+        _INSTALLED.add(id(engine))
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return True
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Per-operation counters and latency summaries collected so far."""
+    with _LOCK:
+        return {
+            name: {
+                "calls": s.calls,
+                "errors": s.errors,
+                "round_trips": s.round_trips,
+                "round_trips_per_call": round(s.round_trips / s.calls, 2) if s.calls else None,
+                "rows": s.rows,
+                "latency": s.latency.summary(),
+                "statement_latency": s.statement_latency.summary(),
+            }
+            for name, s in sorted(_STATS.items())
+        }
+
+
+def reset() -> None:
+    with _LOCK:
+        _STATS.clear()
+
+
+def write_report(path: Optional[str] = None) -> Optional[str]:
+    """Write `stats()` as JSON (default `reports/sql_stats.json`); returns the path."""
+    data = stats()
+    if not data:
+        return None
+    path = path or STATS_REPORT
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"generated_at": datetime.now().isoformat(timespec="seconds"), "operations": data}, fh, indent=2)
+    return path
+
+
+if ENABLED:
+    atexit.register(write_report)
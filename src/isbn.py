@@ -0,0 +1,134 @@
+"""ISBN normalization and the canonical `books.isbn13` column.
+
+Every ISBN is reduced to a checksum-validated ISBN-13: separators are
+dropped, ISBN-10s are validated (mod 11) and converted with the 978 prefix,
+ISBN-13s are validated (mod 10). Anything else normalizes to None.
+`normalize_isbn_series` does the same for a whole pandas Series with numpy,
+without a Python-level loop per row.
+
+`books.isbn13` carries a unique index (added by the `migrations` module),
+so `upsert_books_sql` (ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT
+elsewhere) makes repeated imports and repeated `create_book` calls update the
+existing row instead of adding a duplicate. Books without a valid ISBN have a NULL `isbn13` and are not
+deduplicated.
+"""
+
+import re
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+ISBN13_INDEX = "ux_books_isbn13"
+
+_STRIP_RE = re.compile(r"[^0-9X]")
+_WEIGHTS_10 = np.arange(10, 0, -1)
+_WEIGHTS_13 = np.tile([1, 3], 7)[:13]
+
+
+def _isbn13_check_digit(first12: str) -> str:
+    total = sum(int(d) * w for d, w in zip(first12, _WEIGHTS_13[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def normalize_isbn(value) -> Optional[str]:
+    """Canonical ISBN-13 for `value` (ISBN-10 or ISBN-13, any separators), or None."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    raw = _STRIP_RE.sub("", str(value).upper())
+    if len(raw) == 13 and raw.isdigit():
+        return raw if _isbn13_check_digit(raw[:12]) == raw[12] else None
+    if len(raw) == 10 and raw[:9].isdigit() and (raw[9].isdigit() or raw[9] == "X"):
+        digits = [int(d) for d in raw[:9]] + [10 if raw[9] == "X" else int(raw[9])]
+        if sum(d * w for d, w in zip(digits, _WEIGHTS_10)) % 11:
+            return None
+        first12 = "978" + raw[:9]
+        return first12 + _isbn13_check_digit(first12)
+    return None
+
+
+def _digit_matrix(values: Sequence[str], width: int) -> np.ndarray:
+    buf = np.frombuffer("".join(values).encode("ascii"), dtype=np.uint8).reshape(-1, width)
+    digits = buf.astype(np.int64) - ord("0")
+    digits[buf == ord("X")] = 10
+    return digits
+
+
+def normalize_isbn_series(values: pd.Series) -> pd.Series:
+    """Vectorized `normalize_isbn`: canonical ISBN-13 strings, <NA> where invalid."""
+    cleaned = values.astype("string").str.upper().str.replace(r"[^0-9X]", "", regex=True)
+    # positional arrays: the input index may have duplicates
+    raw = cleaned.to_numpy(dtype=object, na_value="")
+    out = np.full(len(raw), None, dtype=object)
+
+    pos13 = np.flatnonzero(cleaned.str.fullmatch(r"\d{13}").fillna(False).to_numpy(dtype=bool))
+    if len(pos13):
+        ok = (_digit_matrix(raw[pos13].tolist(), 13) @ _WEIGHTS_13) % 10 == 0
+        out[pos13[ok]] = raw[pos13[ok]]
+
+    pos10 = np.flatnonzero(cleaned.str.fullmatch(r"\d{9}[\dX]").fillna(False).to_numpy(dtype=bool))
+    if len(pos10):
+        digits = _digit_matrix(raw[pos10].tolist(), 10)
+        ok = (digits @ _WEIGHTS_10) % 11 == 0
+        first12 = np.hstack([np.tile([9, 7, 8], (int(ok.sum()), 1)), digits[ok, :9]])
+        check = (10 - (first12 @ _WEIGHTS_13[:12]) % 10) % 10
+        out[pos10[ok]] = ["978" + isbn10[:9] + str(c) for isbn10, c in zip(raw[pos10[ok]], check)]
+    return pd.Series(out, index=values.index, dtype="string")
+
+
+def isbn13_from_columns(df: pd.DataFrame, columns: Iterable[str] = ("isbn13", "isbn", "ISBN")) -> pd.Series:
+    """Canonical ISBN-13 per row, taking the first valid value among `columns`."""
+    result = pd.Series(pd.NA, index=df.index, dtype="string")
+    for col in columns:
+        if col in df.columns:
+            result = result.where(result.notna(), normalize_isbn_series(df[col]).to_numpy())
+    return result
+
+
+def ensure_isbn13_column(engine) -> None:
+    """Make sure `books.isbn13` and its unique index exist (see `migrations`)."""
+    from .migrations import ensure_schema
+
+    ensure_schema(engine)
+
+
+def insert_new_book_sql(engine) -> str:
+    """INSERT into `books` that leaves the row alone when its `isbn13` already exists.
+
+    Only the duplicate key is tolerated; any other error (strict-mode
+    truncation, bad values) still raises, unlike `INSERT IGNORE`. On SQLite
+    the rowcount tells the outcome (1 inserted, 0 already catalogued); MySQL
+    reports found rows for ON DUPLICATE KEY UPDATE, so there compare the
+    statement's `lastrowid` with the id stored for the ISBN. Same
+    parameters as `upsert_books_sql`.
+    """
+    columns = "(title, author, ISBN, isbn13, cost_book, book_status)"
+    values = "VALUES (:title, :author, :ISBN, :isbn13, :cost_book, :book_status)"
+    if engine.dialect.name == "mysql":
+        return f"INSERT INTO books {columns} {values} ON DUPLICATE KEY UPDATE book_id = book_id"
+    return f"INSERT INTO books {columns} {values} ON CONFLICT (isbn13) DO NOTHING"
+
+
+def upsert_books_sql(engine, update_columns: Sequence[str] = ("title", "author")) -> str:
+    """INSERT into `books` that updates `update_columns` when `isbn13` already exists.
+
+    Unchanged rows are not rewritten, so re-running an import costs one
+    index probe per row. Parameters: `:title, :author, :ISBN, :isbn13,
+    :cost_book, :book_status`.
+    """
+    insert = """
+        INSERT INTO books (title, author, ISBN, isbn13, cost_book, book_status)
+        VALUES (:title, :author, :ISBN, :isbn13, :cost_book, :book_status)
+    """
+    if engine.dialect.name == "mysql":
+        if not update_columns:
+            return insert + " ON DUPLICATE KEY UPDATE isbn13 = isbn13"
+        # MySQL skips the write itself when every assigned value is unchanged
+        assignments = ", ".join(f"{col} = VALUES({col})" for col in update_columns)
+        return insert + f" ON DUPLICATE KEY UPDATE {assignments}"
+    if not update_columns:
+        return insert + " ON CONFLICT (isbn13) DO NOTHING"
+    assignments = ", ".join(f"{col} = excluded.{col}" for col in update_columns)
+    changed = " OR ".join(f"books.{col} IS NOT excluded.{col}" for col in update_columns)
+    return insert + f" ON CONFLICT (isbn13) DO UPDATE SET {assignments} WHERE {changed}"
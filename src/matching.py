@@ -0,0 +1,153 @@
+"""Text normalization and fuzzy similarity for matching books against API results.
+
+`normalize_text` is the single normalization used across the package
+(lower-case, ASCII letters and digits only, single spaces) and is memoized,
+since the same titles and authors are normalized over and over during a
+price refresh.
+
+Similarities are in [0, 1]:
+  - `ratio`: Indel similarity `2 * LCS / (len(a) + len(b))`, computed with
+    rapidfuzz when it is installed and with a bit-parallel LCS otherwise;
+  - `token_sort_ratio`: `ratio` of the sorted words, so word order does not
+    matter ("tolkien j r r" vs "j r r tolkien");
+  - `token_set_ratio`: also ignores repeated words, and scores 1.0 when the
+    words of one string are a subset of the other's.
+
+`score_candidates` and `best_matches` score whole candidate lists at once
+for `reprocess_with_fuzzy`.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+try:
+    from rapidfuzz.fuzz import ratio as _rapidfuzz_ratio
+except Exception:
+    _rapidfuzz_ratio = None
+
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+_SPACES_RE = re.compile(r"\s+")
+
+# (title, authors) as returned by parse_google_item
+Candidate = Tuple[Optional[str], Sequence[str]]
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(s: Optional[str]) -> str:
+    if not s:
+        return ""
+    s = s.lower().strip()
+    s = _NON_ALNUM_RE.sub(" ", s)
+    s = _SPACES_RE.sub(" ", s)
+    return s
+
+
+@lru_cache(maxsize=65536)
+def _tokens(normalized: str) -> FrozenSet[str]:
+    return frozenset(normalized.split())
+
+
+@lru_cache(maxsize=65536)
+def _sorted_tokens(normalized: str) -> str:
+    return " ".join(sorted(normalized.split()))
+
+
+@lru_cache(maxsize=65536)
+def _char_masks(s: str) -> Dict[str, int]:
+    masks: Dict[str, int] = {}
+    bit = 1
+    for ch in s:
+        masks[ch] = masks.get(ch, 0) | bit
+        bit <<= 1
+    return masks
+
+
+def _lcs_length(a: str, b: str) -> int:
+    # Bit-parallel LCS (Allison-Dix / Hyyro): bit masks over the longer
+    # string, one step per character of the shorter one. Carries only move
+    # upwards, so bits above len(a) are masked off once at the end.
+    if len(a) < len(b):
+        a, b = b, a
+    v = full = (1 << len(a)) - 1
+    for m in filter(None, map(_char_masks(a).get, b)):
+        u = v & m
+        v = (v + u) | (v - u)
+    return len(a) - (v & full).bit_count()
+
+
+def ratio(a: str, b: str) -> float:
+    """Indel similarity of two already normalized strings (0.0 if either is empty)."""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    if _rapidfuzz_ratio is not None:
+        return _rapidfuzz_ratio(a, b) / 100.0
+    return 2.0 * _lcs_length(a, b) / (len(a) + len(b))
+
+
+def token_sort_ratio(a: Optional[str], b: Optional[str]) -> float:
+    return ratio(_sorted_tokens(normalize_text(a)), _sorted_tokens(normalize_text(b)))
+
+
+def token_set_ratio(a: Optional[str], b: Optional[str]) -> float:
+    ta = _tokens(normalize_text(a))
+    tb = _tokens(normalize_text(b))
+    if not ta or not tb:
+        return 0.0
+    shared = ta & tb
+    only_a = ta - tb
+    only_b = tb - ta
+    if shared and (not only_a or not only_b):
+        return 1.0
+    base = " ".join(sorted(shared))
+    full_a = " ".join(filter(None, (base, " ".join(sorted(only_a)))))
+    full_b = " ".join(filter(None, (base, " ".join(sorted(only_b)))))
+    return max(ratio(base, full_a), ratio(base, full_b), ratio(full_a, full_b))
+
+
+def title_similarity(a: Optional[str], b: Optional[str]) -> float:
+    # Word order may differ, but extra words (subtitle, series) still cost
+    return token_sort_ratio(a, b)
+
+
+def author_similarity(a: Optional[str], api_authors: Sequence[Optional[str]]) -> float:
+    """Best `token_set_ratio` of `a` against any of the API's authors."""
+    return max((token_set_ratio(a, other) for other in api_authors if other), default=0.0)
+
+
+def score_candidates(title: Optional[str], author: Optional[str], candidates: Sequence[Candidate]) -> List[Tuple[float, float]]:
+    """`(title_score, author_score)` for every candidate, in input order."""
+    scores: List[Tuple[float, float]] = []
+    for cand_title, cand_authors in candidates:
+        title_score = title_similarity(title, cand_title) if title and cand_title else 0.0
+        author_score = author_similarity(author, cand_authors or []) if author else 0.0
+        scores.append((title_score, author_score))
+    return scores
+
+
+def best_matches(
+    queries: Sequence[Tuple[Optional[str], Optional[str]]],
+    candidate_lists: Sequence[Sequence[Candidate]],
+    title_threshold: float = 0.7,
+    author_threshold: float = 0.6,
+) -> List[Optional[Tuple[int, float, float]]]:
+    """Pick the best acceptable candidate for every `(title, author)` query in one pass.
+
+    A candidate is acceptable when its title score reaches `title_threshold`
+    or its author score reaches `author_threshold`; among those the highest
+    combined score wins (earliest on ties). Returns `(index, title_score,
+    author_score)` per query, or None when nothing is acceptable.
+    """
+    results: List[Optional[Tuple[int, float, float]]] = []
+    for (title, author), candidates in zip(queries, candidate_lists):
+        best: Optional[Tuple[int, float, float]] = None
+        for i, (title_score, author_score) in enumerate(score_candidates(title, author, candidates)):
+            if title_score < title_threshold and author_score < author_threshold:
+                continue
+            if best is None or title_score + author_score > best[1] + best[2]:
+                best = (i, title_score, author_score)
+        results.append(best)
+    return results
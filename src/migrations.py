@@ -0,0 +1,328 @@
+"""Versioned schema migrations for MySQL and SQLite.
+
+`MIGRATIONS` is the ordered history of the schema, from the original tables
+(`create_schema.sql` + `alter_tables.sql`) to the indexes the list queries in
+`CRUD_Blueprint` rely on and the full-text index of `book_search`. Applied versions are recorded in
+`schema_migrations`, so `migrate` only runs what is pending and is safe to
+call on every start. Each step is written to be idempotent as well
+(`IF NOT EXISTS`, index/column existence checks): MySQL commits DDL
+implicitly, so a step interrupted half-way is simply re-run.
+
+Databases created by hand from the old `.sql` files are adopted as-is: the
+base tables already exist and only the missing pieces are added.
+
+    python -m src.migrations            # apply pending migrations
+    python -m src.migrations --status   # list applied / pending versions
+"""
+
+import argparse
+import sys
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from .book_search import create_book_search_index
+from .isbn import ISBN13_INDEX, normalize_isbn_series
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable
+
+
+# (index name, table, columns) for the hot predicates of the CRUD module
+QUERY_INDEXES: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    # active / overdue listings and the active-loan count: open loans by due date
+    ("ix_transactions_open_due", "transactions", ("actual_return_date", "due_date")),
+    # loan history by book / borrower, newest first; also serves the joins of
+    # the most-borrowed / most-active reports
+    ("ix_transactions_book_loan", "transactions", ("book_id", "loan_date")),
+    ("ix_transactions_person_loan", "transactions", ("person_id", "loan_date")),
+    ("ix_books_status", "books", ("book_status",)),
+    # books still missing a price (update_missing_prices_from_web)
+    ("ix_books_cost", "books", ("cost_book",)),
+    ("ix_borrowers_last_name", "borrowers", ("last_name",)),
+    ("ix_borrowers_first_name", "borrowers", ("first_name",)),
+    ("ix_price_history_book", "price_history", ("book_id", "checked_at")),
+)
+
+_READY_LOCK = threading.Lock()
+_READY: set = set()
+
+
+def _pk(conn) -> str:
+    if conn.dialect.name == "mysql":
+        return "INT AUTO_INCREMENT PRIMARY KEY"
+    return "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+
+def _index_names(conn, table: str) -> set:
+    return {ix["name"] for ix in inspect(conn).get_indexes(table)}
+
+
+def _create_index(conn, name: str, table: str, columns: Sequence[str], unique: bool = False) -> None:
+    # MySQL has no CREATE INDEX IF NOT EXISTS
+    if name in _index_names(conn, table):
+        return
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"))
+
+
+def _base_schema(conn) -> None:
+    pk = _pk(conn)
+    if conn.dialect.name == "mysql":
+        status = "ENUM('available', 'borrowed', 'overdue', 'removed') NOT NULL DEFAULT 'available'"
+    else:
+        status = "VARCHAR(20) NOT NULL DEFAULT 'available'"
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS books (
+            book_id {pk},
+            ISBN VARCHAR(20),
+            title VARCHAR(255) NOT NULL,
+            author TEXT,
+            cost_book DECIMAL(10, 2),
+            book_status {status}
+        )
+    """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS borrowers (
+            person_id {pk},
+            first_name VARCHAR(255),
+            last_name VARCHAR(255),
+            relationship_type VARCHAR(255),
+            phone_number VARCHAR(20),
+            email VARCHAR(255),
+            address VARCHAR(255)
+        )
+    """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id {pk},
+            book_id INT NOT NULL,
+            person_id INT NOT NULL,
+            loan_date DATE NOT NULL,
+            due_date DATE,
+            actual_return_date DATE,
+            FOREIGN KEY (book_id) REFERENCES books(book_id),
+            FOREIGN KEY (person_id) REFERENCES borrowers(person_id)
+        )
+    """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS price_history (
+            id {pk},
+            book_id INT NOT NULL,
+            isbn VARCHAR(20),
+            price DECIMAL(10, 2),
+            currency VARCHAR(10),
+            source VARCHAR(50),
+            checked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (book_id) REFERENCES books(book_id)
+        )
+    """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS borrowers_archive (
+            archive_id {pk},
+            person_id INT NOT NULL,
+            first_name VARCHAR(255),
+            last_name VARCHAR(255),
+            relationship_type VARCHAR(255),
+            phone_number VARCHAR(20),
+            email VARCHAR(255),
+            address VARCHAR(255),
+            deleted_at DATETIME NOT NULL
+        )
+    """))
+    archive_body = """
+        INSERT INTO borrowers_archive (
+            person_id, first_name, last_name, relationship_type, phone_number, email, address, deleted_at
+        )
+        VALUES (
+            OLD.person_id, OLD.first_name, OLD.last_name, OLD.relationship_type,
+            OLD.phone_number, OLD.email, OLD.address, CURRENT_TIMESTAMP
+        );
+    """
+    if conn.dialect.name == "mysql":
+        exists = conn.execute(text("""
+            SELECT 1 FROM information_schema.triggers
+            WHERE trigger_schema = DATABASE() AND trigger_name = 'trg_borrowers_before_delete'
+        """)).first()
+        if not exists:
+            conn.execute(text(f"""
+                CREATE TRIGGER trg_borrowers_before_delete
+                BEFORE DELETE ON borrowers
+                FOR EACH ROW
+                BEGIN
+                    {archive_body}
+                END
+            """))
+    else:
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_borrowers_before_delete
+            BEFORE DELETE ON borrowers
+            FOR EACH ROW
+            BEGIN
+                {archive_body}
+            END
+        """))
+
+
+def _app_tables(conn) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dashboard_counters (
+            counter_name VARCHAR(64) PRIMARY KEY,
+            counter_value BIGINT NOT NULL DEFAULT 0
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS loan_due_counts (
+            due_date DATE PRIMARY KEY,
+            open_loans INT NOT NULL DEFAULT 0
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS exchange_rates (
+            rate_date DATE NOT NULL,
+            base_currency VARCHAR(10) NOT NULL,
+            quote_currency VARCHAR(10) NOT NULL,
+            rate DECIMAL(18, 8) NOT NULL,
+            source VARCHAR(50),
+            PRIMARY KEY (rate_date, base_currency, quote_currency)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS bulk_load_progress (
+            source_key VARCHAR(64) PRIMARY KEY,
+            source_path VARCHAR(1024) NOT NULL,
+            chunk_size INT NOT NULL,
+            chunks_done INT NOT NULL DEFAULT 0,
+            rows_loaded BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def _books_isbn13(conn) -> None:
+    """Add and backfill `books.isbn13` and its unique index.
+
+    When existing rows share an ISBN, only the lowest `book_id` gets the
+    canonical value so the unique index can be built; the others keep a NULL
+    `isbn13` and their original `ISBN`.
+    """
+    columns = {c["name"].lower() for c in inspect(conn).get_columns("books")}
+    if "isbn13" not in columns:
+        conn.execute(text("ALTER TABLE books ADD COLUMN isbn13 VARCHAR(13) NULL"))
+    if ISBN13_INDEX in _index_names(conn, "books"):
+        return
+    rows = pd.DataFrame(
+        conn.execute(text("SELECT book_id, ISBN, isbn13 FROM books ORDER BY book_id")).fetchall(),
+        columns=["book_id", "ISBN", "isbn13"],
+    )
+    missing = rows[rows["isbn13"].isna()]
+    canonical = normalize_isbn_series(missing["ISBN"]).dropna()
+    taken = set(rows["isbn13"].dropna())
+    fill = canonical[~canonical.isin(taken) & ~canonical.duplicated()]
+    if not fill.empty:
+        conn.execute(
+            text("UPDATE books SET isbn13 = :isbn13 WHERE book_id = :book_id"),
+            [{"isbn13": v, "book_id": int(b)} for b, v in zip(missing.loc[fill.index, "book_id"], fill)],
+        )
+    _create_index(conn, ISBN13_INDEX, "books", ("isbn13",), unique=True)
+
+
+def _query_indexes(conn) -> None:
+    for name, table, columns in QUERY_INDEXES:
+        _create_index(conn, name, table, columns)
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "base_schema", _base_schema),
+    Migration(2, "app_tables", _app_tables),
+    Migration(3, "books_isbn13", _books_isbn13),
+    Migration(4, "query_indexes", _query_indexes),
+    # FULLTEXT indexes (MySQL) / FTS5 table and triggers (SQLite) for get_books
+    Migration(5, "book_search", create_book_search_index),
+)
+
+
+def _ensure_version_table(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+
+
+def applied_versions(engine) -> Dict[int, str]:
+    """`{version: applied_at}` of the migrations recorded in `schema_migrations`."""
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT version, applied_at FROM schema_migrations")).fetchall()
+    return {int(version): str(applied_at) for version, applied_at in rows}
+
+
+def migrate(engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to `target` (default: latest); returns the versions applied."""
+    done = applied_versions(engine)
+    applied: List[int] = []
+    for migration in MIGRATIONS:
+        if target is not None and migration.version > target:
+            break
+        if migration.version in done:
+            continue
+        with engine.begin() as conn:
+            migration.apply(conn)
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                    {"version": migration.version, "name": migration.name},
+                )
+        except IntegrityError:
+            # another process applied it concurrently; the steps are idempotent
+            continue
+        print(f"[Migrations] Applied {migration.version:03d} {migration.name}")
+        applied.append(migration.version)
+    return applied
+
+
+def ensure_schema(engine) -> None:
+    """Bring `engine`'s database up to date (once per database URL per process)."""
+    key = str(engine.url)
+    if key in _READY:
+        return
+    with _READY_LOCK:
+        if key in _READY:
+            return
+        migrate(engine)
+        _READY.add(key)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply the database schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations and exit")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args(argv)
+    from .db_connection import get_engine
+
+    engine = get_engine()
+    if args.status:
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            state = f"applied {done[migration.version]}" if migration.version in done else "pending"
+            print(f"{migration.version:03d} {migration.name:<16} {state}")
+        return 0
+    applied = migrate(engine, args.target)
+    if not applied:
+        print("[Migrations] Schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,78 +1,24 @@
-import pandas as pd
-from sqlalchemy import create_engine
-import urllib.parse
-import getpass
-# ==============================
-# 1. creating the path to CSV
-# ==============================
-csv_path = "/Users/kubrademirhan/lianes_library/lianes-library/data/books_clean_debug2.csv"
+"""Load the books CSV into the `books` table.
 
-# ==============================
-# 2. read it trating errors
-# ==============================
-# engine="python" + on_bad_lines="skip" avoids the errors:
+Kept for the old `python src/sql_to_python.py` workflow; the work is done by
+`src.bulk_load` (chunked, resumable, credentials from `DATABASE_URL` /
+`DB_*` like the rest of the app). Arguments are passed through, e.g.
 
-books_df = pd.read_csv(
-    csv_path,
-    engine="python",
-    on_bad_lines="skip"   # ou "warn" se quiser ver avisos
-)
+    python src/sql_to_python.py data/books_clean_debug2.csv --chunk-size 20000
+"""
 
-# =====================================
-# 3. send DataFrame to MySQL table
-# =====================================
+import os
+import sys
 
-# Prompt for password securely
-raw_password = getpass.getpass("Enter MySQL password: ")
 
+def main(argv=None) -> int:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from src.bulk_load import main as bulk_load_main
 
-# create the connection engine
-schema = "lianes_library"
-host = "127.0.0.1"
-user = "root"
-password = urllib.parse.quote_plus(raw_password)
-port = 3306
+    return bulk_load_main(argv)
 
-connection_string = f"mysql+pymysql://{user}:{password}@{host}:{port}/{schema}"
-engine = create_engine(connection_string)
 
-# map the columns from CSV to DB table
-column_mapping = {
-    "title": "title",          # make the correspondence CSV -> DB
-    "isbn": "ISBN",            
-    "authors": "author",       #the ones not listed here will be ignored
-}
-
-# filter only the columns that exist in the DataFrame
-existing_cols = {csv_col: db_col for csv_col, db_col in column_mapping.items() if csv_col in books_df.columns}
-
-# create a new DataFrame with only the existing columns and renamed
-books_for_db = books_df[list(existing_cols.keys())].rename(columns=existing_cols)
-
-# =====================================
-# 4. Clean the DataFrame before sending to DB
-# =====================================
-
-# drop rows where all values are NaN
-books_for_db = books_for_db.dropna(how="all")
-# drop rows with NaN in ISBN (assuming it's required)
-books_for_db = books_for_db[books_for_db["ISBN"].notna()]
-# set default values for missing columns in DB  table
-if "cost_book" not in books_for_db.columns:
-    books_for_db["cost_book"] = 0.0  # default cost
-if "book_status" not in books_for_db.columns:
-    books_for_db["book_status"] = "AVAILABLE"  # default status 
-# drop rows with NaN in ISBN or empty strings
-books_for_db = books_for_db[books_for_db["ISBN"].notna()]
-books_for_db["ISBN"] = books_for_db["ISBN"].astype(str)
-books_for_db = books_for_db[books_for_db["ISBN"].str.strip() != ""]
-
-# =====================================
-# 5. Send to SQL table 'books'
-# =====================================
-books_for_db.to_sql(
-    'books',
-    if_exists='append',
-    con=engine,
-    index=False
-)
+if __name__ == "__main__":
+    sys.exit(main())
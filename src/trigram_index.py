@@ -0,0 +1,252 @@
+"""Typo-tolerant, in-process trigram index over book titles and authors.
+
+Titles and authors are normalized with `matching.normalize_text`, split
+into words and turned into padded character trigrams (`"  w"`, `" wo"`,
+`"wor"`, ..., `"rd "`). Each (field, trigram) pair maps to a set of book
+ids, so re-indexing an updated book is O(trigrams) rather than a scan of
+every posting it was in.
+
+A query first collects every book sharing trigrams with it and ranks them
+by the fraction of query trigrams they contain; the best few hundred are
+then rescored word by word (trigram Dice score of each query word against its
+closest word in the title or author). Very common trigrams (e.g. "the") are
+skipped during candidate generation so lookups stay in the low milliseconds
+on large catalogs.
+
+The process-wide index is built from the `books` table at startup (the
+API server before forking its workers, the Streamlit app in a background
+thread via `warm_trigram_index()`), or otherwise on first use
+(`get_trigram_index()`), and kept current by `create_book` and
+`update_book_details` through `index_book()`.
+"""
+
+import heapq
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from .matching import normalize_text as _normalize
+
+FIELDS = ("t", "a")  # title, author
+DEFAULT_MAX_POSTINGS = 20000
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Padded word trigrams of an already normalized string."""
+    grams: Set[str] = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class TrigramIndex:
+    """Inverted trigram index mapping (field, trigram) to book ids."""
+
+    def __init__(self, max_postings: int = DEFAULT_MAX_POSTINGS):
+        self.max_postings = int(max_postings)
+        self._postings: Dict[str, Set[int]] = {}
+        # book_id -> (normalized title, normalized author); needed to retract
+        # the old trigrams when a book is updated
+        self._docs: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, book_id: int) -> bool:
+        return int(book_id) in self._docs
+
+    def _add_postings(self, book_id: int, field: str, grams: Iterable[str]) -> None:
+        for gram in grams:
+            key = field + gram
+            posting = self._postings.get(key)
+            if posting is None:
+                posting = self._postings[key] = set()
+            posting.add(book_id)
+
+    def _remove_postings(self, book_id: int, field: str, grams: Iterable[str]) -> None:
+        for gram in grams:
+            key = field + gram
+            posting = self._postings.get(key)
+            if posting is None:
+                continue
+            posting.discard(book_id)
+            if not posting:
+                del self._postings[key]
+
+    def add(self, book_id: int, title: Optional[str] = None, author: Optional[str] = None) -> None:
+        """Index a book, replacing its previous entry.
+
+        `None` for title or author keeps the currently indexed value, so
+        partial updates (`update_book_details(book_id, title=...)`) work.
+        """
+        book_id = int(book_id)
+        with self._lock:
+            old = self._docs.get(book_id)
+            new_title = _normalize(title) if title is not None else (old[0] if old else "")
+            new_author = _normalize(author) if author is not None else (old[1] if old else "")
+            if old == (new_title, new_author):
+                return
+            if old is not None:
+                self._remove_postings(book_id, "t", trigrams(old[0]))
+                self._remove_postings(book_id, "a", trigrams(old[1]))
+            title_grams = trigrams(new_title)
+            author_grams = trigrams(new_author)
+            self._add_postings(book_id, "t", title_grams)
+            self._add_postings(book_id, "a", author_grams)
+            self._docs[book_id] = (new_title, new_author)
+
+    def remove(self, book_id: int) -> None:
+        book_id = int(book_id)
+        with self._lock:
+            old = self._docs.pop(book_id, None)
+            if old is not None:
+                self._remove_postings(book_id, "t", trigrams(old[0]))
+                self._remove_postings(book_id, "a", trigrams(old[1]))
+
+    def search(self, query: str, k: int = 10, fields: Iterable[str] = FIELDS, min_score: float = 0.3, rerank: int = 200) -> List[Tuple[int, float]]:
+        """Return up to `k` `(book_id, score)` pairs, best first.
+
+        Candidates are generated from shared trigrams; the best `rerank` of
+        them are then rescored word by word (each query word against its most
+        similar word in the field), so a misspelt word is matched to the one
+        word it resembles rather than to trigrams scattered over a long title.
+        `score` is in [0, 1].
+        """
+        normalized = _normalize(query)
+        grams = trigrams(normalized)
+        if not grams:
+            return []
+        query_words = [_word_grams(w) for w in normalized.split()]
+        n_query = len(grams)
+        coarse: Dict[Tuple[int, int], float] = {}
+        with self._lock:
+            for field in fields:
+                keys = [field + gram for gram in grams]
+                postings = [self._postings.get(key) for key in keys]
+                postings = [p for p in postings if p]
+                if not postings:
+                    continue
+                rare = [p for p in postings if len(p) <= self.max_postings]
+                if not rare:
+                    # every trigram is common: fall back to the least common one
+                    rare = [min(postings, key=len)]
+                candidates = Counter()
+                for posting in rare:
+                    candidates.update(posting)
+                # skipped common trigrams are left out of the denominator too
+                n_scored = n_query - (len(postings) - len(rare))
+                slot = FIELDS.index(field)
+                for book_id, shared in candidates.items():
+                    score = shared / n_scored
+                    if score >= min_score:
+                        coarse[(book_id, slot)] = score
+
+            shortlist = heapq.nlargest(max(int(rerank), int(k)), coarse.items(), key=lambda item: item[1])
+            # (score, -words): on equal scores prefer the shorter field
+            best: Dict[int, Tuple[float, int]] = {}
+            for (book_id, slot), _ in shortlist:
+                doc_words = [_word_grams(w) for w in self._docs[book_id][slot].split()]
+                ranked = (_word_similarity(query_words, doc_words), -len(doc_words))
+                if ranked[0] >= min_score and ranked > best.get(book_id, (0.0, 0)):
+                    best[book_id] = ranked
+        top = heapq.nlargest(int(k), best.items(), key=lambda item: item[1])
+        return [(book_id, round(ranked[0], 4)) for book_id, ranked in top]
+
+
+@lru_cache(maxsize=65536)
+def _word_grams(word: str) -> FrozenSet[str]:
+    return frozenset(trigrams(word))
+
+
+def _word_similarity(query_words: List[FrozenSet[str]], doc_words: List[FrozenSet[str]]) -> float:
+    """Mean, over query words, of the best trigram Dice score against a doc word."""
+    if not query_words or not doc_words:
+        return 0.0
+    total = 0.0
+    for q in query_words:
+        best = 0.0
+        for d in doc_words:
+            shared = len(q & d)
+            if shared:
+                sim = 2.0 * shared / (len(q) + len(d))
+                if sim > best:
+                    best = sim
+        total += best
+    return total / len(query_words)
+
+
+_INDEX: Optional[TrigramIndex] = None
+_INDEX_LOCK = threading.Lock()
+# serializes lazy builds, so concurrent first searches wait for one build
+_BUILD_LOCK = threading.Lock()
+
+
+def build_trigram_index(engine=None, batch_size: int = 10000) -> TrigramIndex:
+    """Build (or rebuild) the process-wide index from the `books` table."""
+    global _INDEX
+
+    if engine is None:
+        from .CRUD_Blueprint import get_engine
+
+        engine = get_engine()
+    index = TrigramIndex()
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            text("SELECT book_id, title, author FROM books")
+        )
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            for book_id, title, author in rows:
+                index.add(book_id, title or "", author or "")
+    with _INDEX_LOCK:
+        _INDEX = index
+    return index
+
+
+def get_trigram_index(build: bool = True) -> Optional[TrigramIndex]:
+    """Return the process-wide index, building it on first use if `build`."""
+    if _INDEX is None and build:
+        with _BUILD_LOCK:
+            if _INDEX is None:
+                build_trigram_index()
+    return _INDEX
+
+
+def warm_trigram_index() -> threading.Thread:
+    """Build the process-wide index in a daemon thread.
+
+    Searches issued meanwhile wait for that build instead of starting their
+    own; a failure is printed and the next search retries.
+    """
+    def run():
+        try:
+            get_trigram_index()
+        except Exception as e:
+            print(f"[Search] Could not build the trigram index: {e}")
+
+    thread = threading.Thread(target=run, name="trigram-index", daemon=True)
+    thread.start()
+    return thread
+
+
+def index_book(book_id: Optional[int], title: Optional[str] = None, author: Optional[str] = None) -> None:
+    """Keep the index current after a write; no-op until the index is built."""
+    index = _INDEX
+    if index is None or book_id is None:
+        return
+    index.add(book_id, title, author)
+
+
+def reset_trigram_index() -> None:
+    global _INDEX
+
+    with _INDEX_LOCK:
+        _INDEX = None
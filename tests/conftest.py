@@ -0,0 +1,54 @@
+"""Shared fixtures: every test runs against its own file-backed SQLite database."""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import text
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src import CRUD_Blueprint as crud  # noqa: E402
+from src import db_connection  # noqa: E402
+from src.migrations import ensure_schema  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """`get_engine()` pointed at a fresh SQLite file, with the usual PRAGMAs (WAL)."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'lianes.db'}")
+    db_connection.reset_engine()
+    engine = db_connection.get_engine()
+    ensure_schema(engine)
+    yield engine
+    db_connection.reset_engine()
+
+
+@pytest.fixture
+def borrower(engine):
+    return crud.create_borrower("Ana", "Souza")["person_id"]
+
+
+@pytest.fixture
+def make_books(engine):
+    """`make_books(n)` adds `n` available books and returns their ids."""
+    def make(n):
+        return crud.create_books([{"title": f"Book {i}", "author": "Author"} for i in range(n)])
+
+    return make
+
+
+@pytest.fixture
+def check_counters(engine):
+    """Assert the maintained dashboard counters match a rebuild from the base tables."""
+    def check():
+        with engine.connect() as conn:
+            stored = dict(conn.execute(text("SELECT counter_name, counter_value FROM dashboard_counters")).fetchall())
+            due = dict(conn.execute(text("SELECT due_date, open_loans FROM loan_due_counts WHERE open_loans <> 0")).fetchall())
+        assert {name: int(value) for name, value in stored.items()} == crud._rebuild_dashboard_counters(engine)
+        with engine.connect() as conn:
+            assert dict(conn.execute(text("SELECT due_date, open_loans FROM loan_due_counts")).fetchall()) == due
+
+    return check
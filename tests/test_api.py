@@ -0,0 +1,137 @@
+"""The WSGI app: status mapping, ETag/304 and the catalog cache, called in-process."""
+
+import io
+import json
+
+import pytest
+
+from src import CRUD_Blueprint as crud
+from src import api
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    api._CATALOG_CACHE.clear()
+    yield
+    api._CATALOG_CACHE.clear()
+
+
+def call(method, path, body=None, headers=None):
+    """Run one request through `api.app`; returns `(status, headers, JSON or None)`."""
+    path, _, query = path.partition("?")
+    raw = json.dumps(body).encode("utf-8") if body is not None else b""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "CONTENT_LENGTH": str(len(raw)),
+        "wsgi.input": io.BytesIO(raw),
+    }
+    environ.update({"HTTP_" + k.upper().replace("-", "_"): v for k, v in (headers or {}).items()})
+    started = {}
+
+    def start_response(status, response_headers):
+        started["status"] = int(status.split()[0])
+        started["headers"] = dict(response_headers)
+
+    out = b"".join(api.app(environ, start_response))
+    return started["status"], started["headers"], json.loads(out) if out else None
+
+
+def test_get_answers_304_for_a_matching_etag(engine, make_books):
+    (book_id,) = make_books(1)
+    status, headers, book = call("GET", f"/books/{book_id}")
+    assert status == 200 and book["title"] == "Book 0"
+    etag = headers["ETag"]
+    # the second answer is served from the catalog cache, with the same tag
+    status, headers, body = call("GET", f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert (status, headers["ETag"], body) == (304, etag, None)
+
+    # a fresh render hashes to the same tag
+    api._CATALOG_CACHE.clear()
+    status, headers, body = call("GET", f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert (status, headers["ETag"], body) == (304, etag, None)
+    status, _, body = call("GET", f"/books/{book_id}", headers={"If-None-Match": '"stale"'})
+    assert status == 200 and body == book
+
+
+def test_uncached_reads_also_carry_an_etag(engine, borrower):
+    status, headers, _ = call("GET", "/borrowers")
+    assert status == 200
+    assert call("GET", "/borrowers", headers={"If-None-Match": headers["ETag"]})[0] == 304
+    assert call("HEAD", "/borrowers")[2] is None
+
+
+def test_writes_clear_the_catalog_cache(engine, make_books):
+    (book_id,) = make_books(1)
+    _, headers, _ = call("GET", f"/books/{book_id}")
+    # a write behind the API's back is not seen until the cache is cleared
+    crud.update_book_details(book_id, title="Renamed")
+    assert call("GET", f"/books/{book_id}")[2]["title"] == "Book 0"
+
+    status, _, _ = call("PATCH", f"/books/{book_id}", {"author": "Someone"})
+    assert status == 200
+    status, new_headers, book = call("GET", f"/books/{book_id}", headers={"If-None-Match": headers["ETag"]})
+    assert status == 200 and (book["title"], book["author"]) == ("Renamed", "Someone")
+    assert new_headers["ETag"] != headers["ETag"]
+
+
+def test_writes_inside_batch_clear_the_catalog_cache(engine, make_books):
+    (book_id,) = make_books(1)
+    call("GET", "/books?title=Book")
+    crud.update_book_details(book_id, title="Book renamed")
+    assert call("GET", "/books?title=Book")[2]["items"][0]["title"] == "Book 0"
+
+    status, _, body = call("POST", "/batch", {"requests": [
+        {"method": "PUT", "path": f"/books/{book_id}/status", "body": {"status": "lost"}},
+        {"method": "GET", "path": f"/books/{book_id}"},
+    ]})
+
+    assert status == 200
+    assert [r["status"] for r in body["responses"]] == [200, 200]
+    assert body["responses"][1]["body"]["book_status"].lower() == "lost"
+    (book,) = call("GET", "/books?title=Book")[2]["items"]
+    assert (book["title"], book["book_status"].lower()) == ("Book renamed", "lost")
+
+
+def test_error_statuses(engine, borrower, make_books):
+    (book_id,) = make_books(1)
+    assert call("POST", "/loans", {"book_id": book_id, "person_id": borrower})[0] == 201
+
+    # "does not exist" -> 404, the book is not in the needed state -> 409
+    status, _, body = call("POST", "/loans", {"book_id": 999999, "person_id": borrower})
+    assert (status, body["error"]) == (404, "Book with ID 999999 does not exist.")
+    status, _, body = call("POST", "/loans", {"book_id": book_id, "person_id": borrower})
+    assert status == 409 and "not available" in body["error"]
+    assert call("DELETE", f"/books/{book_id}")[0] == 409
+    assert call("POST", "/returns", {"book_id": book_id})[0] == 200
+    assert call("POST", "/returns", {"book_id": book_id})[0] == 409
+    # any other ValueError -> 400
+    status, _, body = call("PUT", f"/books/{book_id}/status", {"status": "shelved"})
+    assert status == 400 and body["error"].startswith("Invalid status")
+
+
+@pytest.mark.parametrize("message,status", [
+    ("Book with ID 1 does not exist.", 404),
+    ("Book id 1 not found.", 404),
+    ("No active loan found for book ID 1.", 409),
+    ("Book 'Dune' is not available (status: borrowed).", 409),
+    ("Transaction 1 already closed on 2024-01-01.", 409),
+    ("Cannot delete book id 1 as it is currently BORROWED.", 409),
+    ("No fields to update.", 400),
+])
+def test_error_status_mapping(message, status):
+    assert api._error_status(message) == status
+
+
+@pytest.mark.parametrize("method,path,body,error", [
+    ("POST", "/loans", {"book_id": "abc", "person_id": 1}, "Field 'book_id' must be an integer."),
+    ("POST", "/loans", {"book_id": 1, "person_id": [1]}, "Field 'person_id' must be an integer."),
+    ("POST", "/loans", {"person_id": 1}, "Field 'book_id' is required."),
+    ("POST", "/loans/batch", {"book_ids": [1, "x"], "person_id": 1}, "Field 'book_ids' must contain integer ids only."),
+    ("POST", "/loans/batch", {"book_ids": [1], "person_id": "one"}, "Field 'person_id' must be an integer."),
+    ("POST", "/returns", {"transaction_id": "abc"}, "Field 'transaction_id' must be an integer."),
+])
+def test_non_integer_ids_are_rejected(engine, method, path, body, error):
+    status, _, answer = call(method, path, body)
+    assert (status, answer) == (400, {"error": error})
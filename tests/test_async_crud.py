@@ -0,0 +1,63 @@
+"""async_crud: concurrent coroutines on one event loop."""
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from src import async_crud  # noqa: E402
+from src.trigram_index import reset_trigram_index  # noqa: E402
+
+
+def _run(coro, timeout=30):
+    """`asyncio.run(coro)` on a daemon thread, so a blocked loop fails the test instead of hanging it."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = asyncio.run(coro)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "event loop blocked"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def test_gathered_fuzzy_searches_on_a_cold_index(engine, make_books):
+    make_books(20)
+    reset_trigram_index()
+
+    async def main():
+        try:
+            return await asyncio.gather(*(async_crud.search_books_fuzzy("Bok 7") for _ in range(5)))
+        finally:
+            await async_crud.aclose()
+
+    try:
+        results = _run(main())
+    finally:
+        reset_trigram_index()
+    assert [df["book_id"].iloc[0] for df in results] == [results[0]["book_id"].iloc[0]] * 5
+    assert all(df["title"].iloc[0] == "Book 7" for df in results)
+
+
+def test_gathered_reads_share_the_loop(engine, make_books):
+    make_books(3)
+
+    async def main():
+        try:
+            return await asyncio.gather(async_crud.get_books(title="Book"), async_crud.get_dashboard_stats())
+        finally:
+            await async_crud.aclose()
+
+    books, stats = _run(main())
+    assert len(books) == 3
+    assert stats["total_books"] == 3
@@ -0,0 +1,114 @@
+"""create_loans / process_returns: per-item results, including lost races."""
+
+import pytest
+from sqlalchemy import event, text
+
+from src import CRUD_Blueprint as crud
+
+
+def _before_batch_update(engine, table, action):
+    """Run `action()` once, just before the first `UPDATE <table> ... IN (...)`."""
+    fired = []
+
+    def hook(conn, cursor, statement, parameters, context, executemany):
+        batch = statement.lstrip().startswith(f"UPDATE {table}") and " IN (" in statement
+        if batch and not fired:
+            fired.append(statement)
+            action()
+
+    event.listen(engine, "before_cursor_execute", hook)
+    return fired
+
+
+def _book_status(engine, book_id):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT book_status FROM books WHERE book_id = :id"), {"id": book_id}).scalar()
+
+
+def test_create_loans_reports_duplicate_missing_and_unavailable(engine, borrower, make_books, check_counters):
+    free, lent, other = make_books(3)
+    crud.create_loan(lent, borrower)
+
+    results = crud.create_loans(borrower, [free, free, 999999, lent, other])
+
+    assert [r["status"] for r in results] == ["active", "failed", "failed", "failed", "active"]
+    assert "more than once" in results[1]["error"]
+    assert "does not exist" in results[2]["error"]
+    assert "not available" in results[3]["error"]
+    assert results[0]["transaction_id"] and results[4]["transaction_id"]
+    assert _book_status(engine, free) == _book_status(engine, other) == "borrowed"
+    check_counters()
+
+
+def test_create_loans_lent_concurrently_fails_alone(engine, borrower, make_books, check_counters):
+    raced, kept = make_books(2)
+    rival = crud.create_borrower("Rita", "Lima")["person_id"]
+    # the rival loan commits between the availability check and the UPDATE
+    fired = _before_batch_update(engine, "books", lambda: crud.create_loan(raced, rival))
+
+    results = crud.create_loans(borrower, [raced, kept])
+
+    assert fired
+    assert results[0] == {"book_id": raced, "status": "failed", "error": "Book 'Book 0' was lent concurrently."}
+    assert results[1]["status"] == "active"
+    with engine.connect() as conn:
+        open_loans = dict(conn.execute(text("SELECT book_id, person_id FROM transactions WHERE actual_return_date IS NULL")).fetchall())
+    assert open_loans == {raced: rival, kept: borrower}
+    check_counters()
+
+
+def test_process_returns_reports_duplicate_missing_and_closed(engine, borrower, make_books, check_counters):
+    a, b = make_books(2)
+    first = crud.create_loan(a, borrower)["transaction_id"]
+    second = crud.create_loan(b, borrower)["transaction_id"]
+    crud.process_return(second)
+
+    results = crud.process_returns(transaction_ids=[first, first, 999999, second])
+
+    assert [r["status"] for r in results] == ["returned", "failed", "failed", "failed"]
+    assert "more than once" in results[1]["error"]
+    assert "does not exist" in results[2]["error"]
+    assert "already closed" in results[3]["error"]
+    assert _book_status(engine, a) == "available"
+    check_counters()
+
+
+def test_process_returns_by_book_skips_books_without_loan(engine, borrower, make_books, check_counters):
+    lent, idle = make_books(2)
+    crud.create_loan(lent, borrower)
+
+    results = crud.process_returns(book_ids=[lent, idle])
+
+    assert [r["status"] for r in results] == ["returned", "failed"]
+    assert results[1]["error"] == f"No active loan found for book ID {idle}."
+    check_counters()
+
+
+def test_process_returns_closed_concurrently_fails_alone(engine, borrower, make_books, check_counters):
+    a, b = make_books(2)
+    raced = crud.create_loan(a, borrower)["transaction_id"]
+    kept = crud.create_loan(b, borrower)["transaction_id"]
+    fired = _before_batch_update(engine, "transactions", lambda: crud.process_return(raced))
+
+    results = crud.process_returns(transaction_ids=[raced, kept])
+
+    assert fired
+    assert results[0] == {"transaction_id": raced, "status": "failed", "error": f"Transaction {raced} was already closed."}
+    assert results[1]["status"] == "returned"
+    assert _book_status(engine, a) == _book_status(engine, b) == "available"
+    check_counters()
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_create_loans_returns_each_loans_transaction_id(engine, borrower, make_books, monkeypatch, returning):
+    monkeypatch.setattr(engine.dialect, "insert_returning", returning)
+    book_ids = make_books(3)
+    crud.create_loan(book_ids[1], borrower)
+    crud.process_return_by_book(book_id=book_ids[1])
+
+    results = crud.create_loans(borrower, list(reversed(book_ids)))
+
+    with engine.connect() as conn:
+        loans = dict(conn.execute(text("SELECT transaction_id, book_id FROM transactions WHERE actual_return_date IS NULL")).fetchall())
+    assert {r["transaction_id"]: r["book_id"] for r in results} == loans
+    assert len(loans) == 3
@@ -0,0 +1,72 @@
+"""get_books / get_books_page on SQLite FTS5: prefix matching, LIKE fallback and merge."""
+
+import pytest
+from sqlalchemy import text
+
+from src import CRUD_Blueprint as crud
+from src.book_search import ensure_book_search_index
+
+
+TITLES = ["The Hobbit", "Hobbits of the Shire", "Thehobbitish Tales", "Dune"]
+
+
+@pytest.fixture
+def books(engine):
+    ids = crud.create_books([{"title": title, "author": "Author"} for title in TITLES])
+    return dict(zip(TITLES, ids))
+
+
+def _titles(df):
+    return sorted(df["title"]) if len(df) else []
+
+
+def _all_pages(**kwargs):
+    rows, cursor = [], None
+    while True:
+        page = crud.get_books_page(page_size=1, cursor=cursor, **kwargs)
+        rows += list(page.rows["title"])
+        cursor = page.next_cursor
+        if not cursor:
+            return rows
+
+
+def test_migration_creates_the_fts_index(engine):
+    assert ensure_book_search_index(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM sqlite_master WHERE name = 'books_fts'")).scalar() == 1
+
+
+def test_fallback_matches_word_prefixes_only_when_fulltext_hits(books):
+    # "hobbit" is a word prefix in two titles: LIKE is not consulted
+    assert _titles(crud.get_books(title="hobbit")) == ["Hobbits of the Shire", "The Hobbit"]
+    assert _all_pages(title="hobbit") == ["The Hobbit", "Hobbits of the Shire"]
+
+
+def test_fallback_uses_like_when_fulltext_misses(books):
+    assert _titles(crud.get_books(title="obbit")) == ["Hobbits of the Shire", "The Hobbit", "Thehobbitish Tales"]
+    assert _all_pages(title="obbit") == ["The Hobbit", "Hobbits of the Shire", "Thehobbitish Tales"]
+
+
+def test_merge_returns_the_like_results_too(books, monkeypatch):
+    monkeypatch.setenv("LIANES_SEARCH_SUBSTRING", "merge")
+    merged = crud.get_books(title="hobbit", ranked=True)
+
+    assert _titles(merged) == ["Hobbits of the Shire", "The Hobbit", "Thehobbitish Tales"]
+    relevance = dict(zip(merged["title"], merged["relevance"]))
+    assert relevance["Thehobbitish Tales"] == 0
+    assert min(relevance["The Hobbit"], relevance["Hobbits of the Shire"]) > 0
+    assert list(merged["title"])[-1] == "Thehobbitish Tales"
+    assert _all_pages(title="hobbit") == ["The Hobbit", "Hobbits of the Shire", "Thehobbitish Tales"]
+
+
+def test_merge_matches_the_like_backend(books, monkeypatch):
+    monkeypatch.setenv("LIANES_SEARCH_SUBSTRING", "merge")
+    merged = {q: _titles(crud.get_books(title=q)) for q in ("hobbit", "obbit", "dune", "the")}
+    monkeypatch.setenv("LIANES_BOOK_SEARCH", "like")
+    assert merged == {q: _titles(crud.get_books(title=q)) for q in merged}
+
+
+def test_merge_keeps_fulltext_only_matches(books, monkeypatch):
+    monkeypatch.setenv("LIANES_SEARCH_SUBSTRING", "merge")
+    # words out of order: full-text matches, LIKE '%shire hobbits%' does not
+    assert _titles(crud.get_books(title="shire hobbits")) == ["Hobbits of the Shire"]
@@ -0,0 +1,81 @@
+"""Book writes keep the dashboard counters exact."""
+
+import pytest
+from sqlalchemy import event, text
+
+from src import CRUD_Blueprint as crud
+
+
+def test_create_book_inserts_once_then_updates_by_isbn(engine, check_counters):
+    assert crud.create_book("Dune", "Herbert", isbn="0-441-17271-7") == "Added book 'Dune' by Herbert."
+    with engine.connect() as conn:
+        book_id = conn.execute(text("SELECT book_id FROM books WHERE isbn13 = '9780441172719'")).scalar()
+
+    message = crud.create_book("Dune (reissue)", "Frank Herbert", isbn="9780441172719", cost=12.5)
+
+    assert message == f"Book with ISBN 9780441172719 already exists (id {book_id}); updated it."
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT book_id, title, author, cost_book FROM books")).fetchall()
+    assert [tuple(r) for r in rows] == [(book_id, "Dune (reissue)", "Frank Herbert", 12.5)]
+    check_counters()
+
+
+def test_create_book_without_isbn_always_inserts(engine, check_counters):
+    crud.create_book("Untitled", "Anon")
+    crud.create_book("Untitled", "Anon")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM books")).scalar() == 2
+    check_counters()
+
+
+def _before_first(engine, prefix, action):
+    """Run `action()` once, just before the first statement starting with `prefix`."""
+    fired = []
+
+    def hook(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith(prefix) and not fired:
+            fired.append(statement)
+            action()
+
+    event.listen(engine, "before_cursor_execute", hook)
+    return fired
+
+
+@pytest.mark.parametrize("returner", ["process_return", "process_return_by_book", "process_returns"])
+def test_return_counts_from_the_status_it_replaces(engine, borrower, make_books, check_counters, returner):
+    (book_id,) = make_books(1)
+    transaction_id = crud.create_loan(book_id, borrower)["transaction_id"]
+    # the book is marked LOST between the return's read and its writes
+    fired = _before_first(engine, "UPDATE transactions", lambda: crud.update_book_status(book_id, "LOST"))
+
+    if returner == "process_return":
+        crud.process_return(transaction_id)
+    elif returner == "process_return_by_book":
+        crud.process_return_by_book(book_id=book_id)
+    else:
+        assert crud.process_returns(transaction_ids=[transaction_id])[0]["status"] == "returned"
+
+    assert fired
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT book_status FROM books WHERE book_id = :id"), {"id": book_id}).scalar() == "available"
+    check_counters()
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_create_books_returns_the_ids_of_its_rows(engine, monkeypatch, check_counters, returning):
+    # without RETURNING (MySQL) the ids are looked up, not derived from lastrowid
+    monkeypatch.setattr(engine.dialect, "insert_returning", returning)
+    crud.create_book("Existing", "Someone", isbn="0-441-17271-7")
+    records = [
+        {"title": "Plain A", "author": "X"},
+        {"title": "Dune", "author": "Herbert", "isbn": "9780441172719"},
+        {"title": "Plain B", "author": "Y"},
+        {"title": "Hobbit", "author": "Tolkien", "isbn": "0-306-40615-2"},
+    ]
+
+    ids = crud.create_books(records)
+
+    with engine.connect() as conn:
+        titles = dict(conn.execute(text("SELECT book_id, title FROM books")).fetchall())
+    assert [titles[book_id] for book_id in ids] == ["Plain A", "Dune", "Plain B", "Hobbit"]
+    check_counters()
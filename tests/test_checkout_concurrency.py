@@ -0,0 +1,43 @@
+"""Concurrent create_loan calls on one copy: exactly one checkout wins."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import text
+
+from src import CRUD_Blueprint as crud
+
+
+@pytest.mark.parametrize("workers", [2, 8, 16])
+def test_concurrent_checkouts_of_one_book(engine, make_books, check_counters, workers):
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+    (book_id,) = make_books(1)
+    people = [crud.create_borrower(f"Reader {i}", "Test")["person_id"] for i in range(workers)]
+    start = threading.Barrier(workers)
+
+    def checkout(person_id):
+        start.wait()
+        try:
+            return crud.create_loan(book_id, person_id)
+        except ValueError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(checkout, people))
+
+    loans = [o for o in outcomes if isinstance(o, dict)]
+    errors = [o for o in outcomes if isinstance(o, ValueError)]
+    assert len(loans) == 1
+    assert len(errors) == workers - 1
+    assert all("is not available" in str(e) for e in errors)
+    with engine.connect() as conn:
+        open_loans = conn.execute(
+            text("SELECT transaction_id, person_id FROM transactions WHERE book_id = :id AND actual_return_date IS NULL"),
+            {"id": book_id},
+        ).fetchall()
+        status = conn.execute(text("SELECT book_status FROM books WHERE book_id = :id"), {"id": book_id}).scalar()
+    assert [tuple(row) for row in open_loans] == [(loans[0]["transaction_id"], loans[0]["person_id"])]
+    assert status == "borrowed"
+    check_counters()
@@ -0,0 +1,84 @@
+"""get_exchange_rates lookup order: memo, table, one API call, fallback."""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from src import fx_rates
+from src.fx_rates import convert_prices, get_exchange_rates
+
+
+DAY = date(2024, 3, 1)
+
+
+@pytest.fixture
+def api(engine, monkeypatch):
+    """Fake FX API quoting 1 EUR in each currency; `api.calls` records the requests."""
+    monkeypatch.setattr(fx_rates, "_MEMO", {})
+    quotes = {"BRL": 5.0, "USD": 1.25}
+    calls = []
+
+    def fake_get(url, params=None, **kwargs):
+        calls.append(params)
+        if api.fail:
+            raise RuntimeError("offline")
+        symbols = params["symbols"].split(",")
+        return SimpleNamespace(json=lambda: {"rates": {s: quotes[s] for s in symbols if s in quotes}})
+
+    api = SimpleNamespace(calls=calls, fail=False)
+    monkeypatch.setattr(fx_rates, "http_get", fake_get)
+    return api
+
+
+def _stored(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT base_currency, rate FROM exchange_rates")).fetchall())
+
+
+def test_missing_rates_come_from_one_api_call_and_are_stored(engine, api):
+    rates = get_exchange_rates(["R$", "usd", "EUR", None, "JPY"], on=DAY)
+
+    assert rates == {"BRL": 0.2, "USD": 0.8, "EUR": 1.0}
+    assert api.calls == [{"base": "EUR", "symbols": "BRL,JPY,USD"}]
+    assert _stored(engine) == {"BRL": 0.2, "USD": 0.8}
+
+
+def test_memo_is_consulted_before_the_table(engine, api):
+    get_exchange_rates(["BRL"], on=DAY)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM exchange_rates"))
+
+    assert get_exchange_rates(["BRL"], on=DAY) == {"BRL": 0.2}
+    assert len(api.calls) == 1
+
+
+def test_table_is_consulted_before_the_api(engine, api, monkeypatch):
+    get_exchange_rates(["BRL"], on=DAY)
+    monkeypatch.setattr(fx_rates, "_MEMO", {})
+
+    # only the currency missing from the table is requested
+    assert get_exchange_rates(["BRL", "USD"], on=DAY) == {"BRL": 0.2, "USD": 0.8}
+    assert api.calls[1:] == [{"base": "EUR", "symbols": "USD"}]
+    assert get_exchange_rates(["BRL", "USD"], on=DAY) == {"BRL": 0.2, "USD": 0.8}
+    assert len(api.calls) == 2
+
+
+def test_fallback_when_the_api_fails(engine, api):
+    api.fail = True
+
+    assert get_exchange_rates(["BRL", "USD"], on=DAY) == {"BRL": fx_rates.FALLBACK_RATES_TO_EUR["BRL"]}
+    assert len(api.calls) == 1
+    assert _stored(engine) == {}
+    # fallbacks are not memoized: the next call asks again
+    api.fail = False
+    assert get_exchange_rates(["BRL"], on=DAY) == {"BRL": 0.2}
+
+
+def test_convert_prices_keeps_unconverted_rows():
+    df = convert_prices([10, "20.5", None, 7], ["R$", "USD", "BRL", None], {"BRL": 0.2})
+
+    assert df["price"].tolist()[:2] == [2.0, 20.5]
+    assert df["price"].isna().tolist() == [False, False, True, False]
+    assert df["currency"].tolist() == ["€", "USD", "€", "UNK"]
@@ -0,0 +1,168 @@
+"""CircuitBreaker states and http_get / http_get_async retries, with fake transports."""
+
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from src import http_client
+from src.http_client import CircuitBreaker, CircuitOpenError, get_breaker, http_get, http_get_async
+
+
+URL = "https://books.example/api"
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    monkeypatch.setenv("LIANES_HTTP_MAX_BACKOFF", "30")
+    http_client.reset_http_client()
+    yield
+    http_client.reset_http_client()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the delays http_get / http_get_async would have slept."""
+    slept = []
+
+    async def fake_async_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(http_client.time, "sleep", slept.append)
+    monkeypatch.setattr(http_client.asyncio, "sleep", fake_async_sleep)
+    return slept
+
+
+def _response(status, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp.url = URL
+    return resp
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Fake session answering with `session.replies` in order (exceptions are raised)."""
+    class FakeSession:
+        replies = []
+        calls = 0
+
+        def get(self, url, params=None, timeout=None):
+            FakeSession.calls += 1
+            reply = self.replies.pop(0)
+            if isinstance(reply, BaseException):
+                raise reply
+            return reply
+
+    fake = FakeSession()
+    monkeypatch.setattr(http_client, "get_session", lambda: fake)
+    return fake
+
+
+def test_breaker_opens_after_threshold_then_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=3600)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.reset_timeout = 0
+    assert breaker.state == "half-open"
+    # one trial at a time
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    breaker.reset_timeout = 3600
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_release_trial_lets_the_next_request_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.allow()
+    breaker.release_trial()
+    assert breaker.state == "half-open" and breaker.allow()
+
+
+def test_http_get_retries_then_succeeds(session, sleeps):
+    session.replies = [requests.ConnectionError("reset"), _response(503, {"Retry-After": "2"}), _response(200)]
+
+    assert http_get(URL, retries=3, backoff=0).status_code == 200
+    assert session.calls == 3
+    assert sleeps == [0.0, 2.0]
+    assert get_breaker("books.example").state == "closed"
+
+
+def test_http_get_opens_the_breaker_after_repeated_failures(session, sleeps, monkeypatch):
+    monkeypatch.setenv("LIANES_HTTP_BREAKER_THRESHOLD", "2")
+    session.replies = [_response(500)] * 4
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            http_get(URL, retries=1, backoff=0)
+    with pytest.raises(CircuitOpenError):
+        http_get(URL)
+    assert session.calls == 4
+
+
+def test_long_retry_after_fails_instead_of_retrying_early(session, sleeps):
+    session.replies = [_response(429, {"Retry-After": "120"}), _response(200)]
+
+    with pytest.raises(requests.HTTPError):
+        http_get(URL, retries=3)
+    assert session.calls == 1 and sleeps == []
+    assert get_breaker("books.example")._failures == 1
+
+
+def test_unexpected_error_releases_the_half_open_trial(session, monkeypatch):
+    monkeypatch.setenv("LIANES_HTTP_BREAKER_RESET", "0")
+    breaker = get_breaker("books.example")
+    breaker.failure_threshold = 1
+    breaker.record_failure()
+    session.replies = [requests.TooManyRedirects("loop")]
+
+    with pytest.raises(requests.TooManyRedirects):
+        http_get(URL)
+    assert breaker.allow()
+
+
+def _async_get(monkeypatch, handler, **kwargs):
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(http_client, "get_async_client", lambda: client)
+        try:
+            return await http_get_async(URL, **kwargs)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_http_get_async_retries_and_honours_retry_after(sleeps, monkeypatch):
+    replies = [httpx.Response(503, headers={"Retry-After": "2"}), httpx.Response(200, json={"ok": True})]
+
+    resp = _async_get(monkeypatch, lambda request: replies.pop(0), retries=3)
+
+    assert resp.json() == {"ok": True}
+    assert sleeps == [2.0]
+
+
+def test_http_get_async_long_retry_after_fails(sleeps, monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429, headers={"Retry-After": "120"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _async_get(monkeypatch, handler, retries=3)
+    assert len(calls) == 1 and sleeps == []
@@ -0,0 +1,107 @@
+"""ISBN normalization (scalar and vectorized) and the isbn13 upsert SQL."""
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from src.isbn import insert_new_book_sql, normalize_isbn, normalize_isbn_series, upsert_books_sql
+
+
+CASES = [
+    # ISBN-13, plain and with separators
+    ("9780306406157", "9780306406157"),
+    ("978-0-306-40615-7", "9780306406157"),
+    ("978 0 306 40615 7", "9780306406157"),
+    (" 978-0 306-40615-7 ", "9780306406157"),
+    # 979 prefix: kept as is, never mapped to an ISBN-10
+    ("979-10-90636-07-1", "9791090636071"),
+    ("9791090636071", "9791090636071"),
+    # ISBN-10 -> ISBN-13 with the 978 prefix and a new check digit
+    ("0306406152", "9780306406157"),
+    ("0-306-40615-2", "9780306406157"),
+    ("ISBN 0-306-40615-2", "9780306406157"),
+    # X check digit, either case
+    ("080442957X", "9780804429573"),
+    ("0-8044-2957-x", "9780804429573"),
+    # invalid: bad check digits, misplaced X, wrong lengths, no digits
+    ("9780306406158", None),
+    ("0306406153", None),
+    ("978030640615X", None),
+    ("X804429573", None),
+    ("97910906360", None),
+    ("030640615", None),
+    ("abc", None),
+    ("", None),
+    (None, None),
+    (float("nan"), None),
+]
+
+
+@pytest.mark.parametrize("value,expected", CASES)
+def test_normalize_isbn(value, expected):
+    assert normalize_isbn(value) == expected
+
+
+def test_normalize_isbn_accepts_integers():
+    assert normalize_isbn(9780306406157) == "9780306406157"
+
+
+def test_normalize_isbn_series_matches_scalar():
+    values = pd.Series([value for value, _ in CASES], dtype=object)
+    result = normalize_isbn_series(values)
+    assert str(result.dtype) == "string"
+    assert [None if pd.isna(v) else v for v in result] == [expected for _, expected in CASES]
+
+
+def test_normalize_isbn_series_keeps_duplicate_index():
+    values = pd.Series(["0306406152", "bad", "979-10-90636-07-1"], index=[7, 7, 3])
+    result = normalize_isbn_series(values)
+    assert list(result.index) == [7, 7, 3]
+    assert result.iloc[0] == "9780306406157"
+    assert pd.isna(result.iloc[1])
+    assert result.iloc[2] == "9791090636071"
+
+
+def _dialect(name):
+    return SimpleNamespace(dialect=SimpleNamespace(name=name))
+
+
+@pytest.mark.parametrize(
+    "dialect,update_columns,tail",
+    [
+        ("mysql", ("title", "author"), "ON DUPLICATE KEY UPDATE title = VALUES(title), author = VALUES(author)"),
+        ("mysql", (), "ON DUPLICATE KEY UPDATE isbn13 = isbn13"),
+        (
+            "sqlite",
+            ("title", "author"),
+            "ON CONFLICT (isbn13) DO UPDATE SET title = excluded.title, author = excluded.author"
+            " WHERE books.title IS NOT excluded.title OR books.author IS NOT excluded.author",
+        ),
+        ("sqlite", (), "ON CONFLICT (isbn13) DO NOTHING"),
+    ],
+)
+def test_upsert_books_sql_per_dialect(dialect, update_columns, tail):
+    sql = " ".join(upsert_books_sql(_dialect(dialect), update_columns).split())
+    assert sql.startswith("INSERT INTO books (title, author, ISBN, isbn13, cost_book, book_status)")
+    assert sql.endswith(tail)
+
+
+def test_insert_new_book_sql_per_dialect():
+    mysql = insert_new_book_sql(_dialect("mysql"))
+    assert "IGNORE" not in mysql
+    assert mysql.endswith("ON DUPLICATE KEY UPDATE book_id = book_id")
+    assert insert_new_book_sql(_dialect("sqlite")).endswith("ON CONFLICT (isbn13) DO NOTHING")
+
+
+def test_upsert_books_sql_on_sqlite(engine):
+    row = {"title": "Dune", "author": "Herbert", "ISBN": "0-441-17271-7", "isbn13": normalize_isbn("0-441-17271-7"), "cost_book": None, "book_status": "available"}
+    upsert = text(upsert_books_sql(engine))
+    with engine.begin() as conn:
+        assert conn.execute(upsert, row).rowcount == 1
+        # unchanged: the WHERE clause skips the rewrite
+        assert conn.execute(upsert, row).rowcount == 0
+        assert conn.execute(upsert, {**row, "title": "Dune (reissue)"}).rowcount == 1
+        books = conn.execute(text("SELECT title, isbn13 FROM books")).fetchall()
+    assert [tuple(b) for b in books] == [("Dune (reissue)", "9780441172719")]
@@ -0,0 +1,69 @@
+"""ensure_schema / migrate: idempotent steps, pending-only runs and legacy databases."""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src import CRUD_Blueprint as crud
+from src import migrations
+from src.migrations import MIGRATIONS, applied_versions, ensure_schema, migrate
+
+
+LATEST = [m.version for m in MIGRATIONS]
+
+
+@pytest.fixture
+def bare_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bare.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _schema(engine):
+    with engine.connect() as conn:
+        return sorted(tuple(row) for row in conn.execute(text("SELECT type, name, sql FROM sqlite_master")))
+
+
+def test_ensure_schema_is_idempotent(engine, make_books, monkeypatch):
+    make_books(2)
+    before = _schema(engine)
+    monkeypatch.setattr(migrations, "_READY", set())
+
+    ensure_schema(engine)
+    ensure_schema(engine)
+
+    assert migrate(engine) == []
+    assert sorted(applied_versions(engine)) == LATEST
+    assert _schema(engine) == before
+    assert len(crud.get_books()) == 2
+
+
+def test_every_step_can_be_rerun(engine, make_books):
+    # an interrupted run re-applies steps that already took effect
+    make_books(2)
+    before = _schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM schema_migrations"))
+
+    assert migrate(engine) == LATEST
+    assert _schema(engine) == before
+    assert len(crud.get_books(title="Book")) == 2
+
+
+def test_migrate_applies_only_pending_versions(bare_engine):
+    assert migrate(bare_engine, target=2) == [1, 2]
+    assert sorted(applied_versions(bare_engine)) == [1, 2]
+    assert migrate(bare_engine) == LATEST[2:]
+    assert migrate(bare_engine) == []
+
+
+def test_legacy_database_is_adopted(bare_engine):
+    # tables created by hand from the old .sql files, with a duplicated ISBN
+    with bare_engine.begin() as conn:
+        migrations._base_schema(conn)
+        conn.execute(text("INSERT INTO books (ISBN, title, author) VALUES ('0-306-40615-2', 'A', 'X'), ('9780306406157', 'B', 'Y'), ('bad', 'C', 'Z')"))
+
+    assert migrate(bare_engine) == LATEST
+    with bare_engine.connect() as conn:
+        rows = conn.execute(text("SELECT title, ISBN, isbn13 FROM books ORDER BY book_id")).fetchall()
+    # only the lowest book_id gets the canonical value of a shared ISBN
+    assert [tuple(r) for r in rows] == [("A", "0-306-40615-2", "9780306406157"), ("B", "9780306406157", None), ("C", "bad", None)]
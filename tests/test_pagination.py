@@ -0,0 +1,119 @@
+"""Keyset pagination: cursors, ties and NULLs, with no row skipped or repeated."""
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from src import CRUD_Blueprint as crud
+from src.CRUD_Blueprint import _decode_cursor, _encode_cursor, _keyset_page
+
+
+# duplicates and NULLs in the leading sort key
+AUTHORS = ["Borges", None, "Austen", "Borges", "", None, "Austen", "Calvino", "Borges", None, ""]
+
+
+@pytest.fixture
+def authored_books(engine, make_books):
+    ids = make_books(len(AUTHORS))
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE books SET author = :author WHERE book_id = :book_id"),
+            [{"author": author, "book_id": book_id} for author, book_id in zip(AUTHORS, ids)],
+        )
+    return ids
+
+
+def _walk(engine, page_size, descending, nullable_first=True):
+    keys = [("b.author", "author"), ("b.book_id", "book_id")]
+    rows, cursor, pages = [], None, 0
+    while True:
+        df, cursor = _keyset_page(
+            engine, "t", "SELECT b.* FROM books b WHERE 1=1", {}, keys, page_size, cursor,
+            descending=descending, nullable_first=nullable_first,
+        )
+        assert len(df) <= page_size
+        rows += [(None if pd.isna(a) else a, int(b)) for a, b in zip(df["author"], df["book_id"])]
+        pages += 1
+        if cursor is None:
+            return rows, pages
+
+
+def _expected(engine, descending):
+    direction = "DESC" if descending else "ASC"
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT author, book_id FROM books ORDER BY author {direction}, book_id {direction}")).fetchall()
+    return [tuple(r) for r in rows]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4, 11, 50])
+def test_keyset_walk_with_ties_and_nulls(engine, authored_books, descending, page_size):
+    rows, pages = _walk(engine, page_size, descending)
+    assert rows == _expected(engine, descending)
+    assert len(set(rows)) == len(AUTHORS)
+    assert pages == max(1, -(-len(AUTHORS) // page_size))
+
+
+def test_cursor_round_trip():
+    values = [date(2024, 5, 1), 42, None, "São Paulo"]
+    cursor = _encode_cursor("scope", values)
+    assert "=" not in cursor
+    assert _decode_cursor("scope", cursor, 4) == ["2024-05-01", 42, None, "São Paulo"]
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "e30", _encode_cursor("books", [1]), _encode_cursor("borrowers", [1])])
+def test_bad_cursor_is_rejected(engine, cursor):
+    # garbage, an empty payload, another scope, or the wrong number of keys
+    with pytest.raises(ValueError):
+        crud.get_borrowers_page(cursor=cursor)
+
+
+def test_page_size_must_be_positive(engine):
+    with pytest.raises(ValueError):
+        crud.get_books_page(page_size=0)
+
+
+def test_borrowers_pages_put_missing_first_names_last(engine):
+    names = ["Ana", None, "Bia", "Ana", "", None, "Caio"]
+    for i, name in enumerate(names):
+        crud.create_borrower(name, f"Last {i}")
+    rows, cursor = [], None
+    while True:
+        page = crud.get_borrowers_page(page_size=2, cursor=cursor)
+        rows += [(r["first_name"], r["person_id"]) for r in page.rows]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert [r[0] for r in rows] == ["Caio", "Bia", "Ana", "Ana", "", None, None]
+    assert len({r[1] for r in rows}) == len(names)
+    assert [r[1] for r in rows[2:4]] == sorted((r[1] for r in rows[2:4]), reverse=True)
+
+
+def test_active_loans_pages_break_due_date_ties(engine, borrower, make_books):
+    book_ids = make_books(7)
+    today = date.today()
+    for i, book_id in enumerate(book_ids):
+        crud.create_loan(book_id, borrower, loan_date=today, due_date=today + timedelta(days=i % 2))
+    seen, cursor = [], None
+    while True:
+        page = crud.get_active_loans_page(page_size=3, cursor=cursor)
+        seen += list(zip(page.rows["due_date"].astype(str), page.rows["transaction_id"]))
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == 7 and len(set(seen)) == 7
+    assert seen == sorted(seen)
+
+
+def test_books_pages_walk_every_book_once(engine, make_books):
+    book_ids = make_books(9)
+    seen, cursor = [], None
+    while True:
+        page = crud.get_books_page(page_size=4, cursor=cursor)
+        seen += [int(b) for b in page.rows["book_id"]]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == sorted(book_ids)
@@ -0,0 +1,86 @@
+"""Trigram index candidates and search_books_fuzzy ranking."""
+
+import pytest
+
+from src import CRUD_Blueprint as crud
+from src.trigram_index import TrigramIndex, get_trigram_index, reset_trigram_index, trigrams
+
+
+@pytest.fixture
+def fresh_index():
+    reset_trigram_index()
+    yield
+    reset_trigram_index()
+
+
+def test_trigrams_are_padded_per_word():
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("ab cd") == {"  a", " ab", "ab ", "  c", " cd", "cd "}
+    assert trigrams("") == set()
+
+
+def test_misspelt_query_ranks_the_closest_title_first():
+    index = TrigramIndex()
+    index.add(1, "The Hobbit", "J. R. R. Tolkien")
+    index.add(2, "The Hobbit Companion", "David Day")
+    index.add(3, "Dune", "Frank Herbert")
+
+    results = index.search("hobitt", k=10)
+
+    assert [book_id for book_id, _ in results] == [1, 2]
+    assert 0 < results[1][1] <= results[0][1] <= 1
+    assert [book_id for book_id, _ in index.search("frank herbrt")] == [3]
+    assert index.search("zzzz") == []
+
+
+def test_updates_and_removals_retract_old_trigrams():
+    index = TrigramIndex()
+    index.add(1, "Dune", "Frank Herbert")
+    # None keeps the indexed author
+    index.add(1, "Emma", None)
+    assert index.search("dune") == []
+    assert [b for b, _ in index.search("emma")] == [1]
+    assert [b for b, _ in index.search("herbert")] == [1]
+
+    index.remove(1)
+    assert len(index) == 0 and 1 not in index
+    assert index.search("emma") == [] and index._postings == {}
+
+
+def test_common_trigrams_are_skipped_for_candidates():
+    index = TrigramIndex(max_postings=2)
+    for book_id in range(1, 5):
+        index.add(book_id, f"Saga {book_id}", "")
+    index.add(9, "Sagan Cosmos", "")
+
+    # every "saga" trigram is common: only the least common one ("ga ",
+    # not in "sagan") generates candidates
+    assert {b for b, _ in index.search("saga", k=10)} == {1, 2, 3, 4}
+    # "cosmos" trigrams are rare: only book 9 is a candidate
+    assert [b for b, _ in index.search("saga cosmos", k=10)] == [9]
+
+
+def test_search_books_fuzzy_ranks_by_similarity(engine, fresh_index):
+    ids = crud.create_books([
+        {"title": "The Lord of the Rings", "author": "Tolkien"},
+        {"title": "Lord of the Flies", "author": "Golding"},
+        {"title": "Dune", "author": "Herbert"},
+    ])
+
+    df = crud.search_books_fuzzy("lord of the rigns", k=5)
+
+    assert list(df["book_id"])[:2] == ids[:2]
+    assert list(df["similarity"]) == sorted(df["similarity"], reverse=True)
+    assert crud.search_books_fuzzy("qqqq").empty
+
+
+def test_search_books_fuzzy_sees_later_writes(engine, fresh_index):
+    crud.create_books([{"title": "Dune", "author": "Herbert"}])
+    assert get_trigram_index() is not None
+
+    crud.create_book("Neuromancer", "Gibson")
+    (book_id,) = crud.search_books_fuzzy("neuromancr")["book_id"]
+    crud.update_book_details(int(book_id), title="Count Zero")
+
+    assert crud.search_books_fuzzy("neuromancr").empty
+    assert list(crud.search_books_fuzzy("count zro")["book_id"]) == [book_id]